@@ -0,0 +1,102 @@
+"""Shared helpers for the benchmark scripts in this directory."""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def test_database(path=None):
+    """Create a throwaway, fully migrated database file and remove it afterwards."""
+    from django.db import connection
+
+    with tempfile.TemporaryDirectory() as tmp:
+        connection.settings_dict.setdefault("TEST", {})
+        connection.settings_dict["TEST"]["NAME"] = str(path or Path(tmp) / "bench.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0, serialize=False)
+        try:
+            yield connection
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def seed(participants, texts=10, batch_size=5000, seed=0):
+    """Fill the database with synthetic texts, participants and responses."""
+    import random
+
+    from study.models import Participant, Response, Study, TextItem
+
+    rng = random.Random(seed)
+    # Von der Migration angelegt
+    study = Study.objects.get(slug="default")
+    text_items = TextItem.objects.bulk_create(
+        TextItem(
+            study=study,
+            title=f"Text {i}",
+            body=" ".join(["Lorem ipsum dolor sit amet."] * 40),
+            origin="ai" if i % 2 else "human",
+        )
+        for i in range(texts)
+    )
+    departments = ["English", "History", "Physics", "Law", "Medicine"]
+
+    for start in range(0, participants, batch_size):
+        people = Participant.objects.bulk_create(
+            Participant(
+                study=study,
+                name=f"Participant {i}",
+                experience=rng.randint(0, 30),
+                department=rng.choice(departments),
+            )
+            for i in range(start, min(start + batch_size, participants))
+        )
+        responses = []
+        for participant in people:
+            order = text_items[:]
+            rng.shuffle(order)
+            for index, text in enumerate(order, start=1):
+                responses.append(
+                    Response(
+                        participant=participant,
+                        text=text,
+                        classification=rng.choice(["ai", "human"]),
+                        confidence=rng.randint(1, 5),
+                        response_time=rng.randint(5000, 120000),
+                        index=index,
+                    )
+                )
+        Response.objects.bulk_create(responses, batch_size=batch_size)
+
+    return text_items
+
+
+def timed(fn, repeat=5):
+    """Run ``fn`` ``repeat`` times, return (median ms, min ms, result of the last run)."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), min(timings), result
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..100) of a non-empty sequence."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
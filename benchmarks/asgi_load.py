@@ -0,0 +1,223 @@
+"""Compare the WSGI and the ASGI deployment profile under load.
+
+Starts gunicorn with sync workers (``config.wsgi``, sync views) and with
+uvicorn workers (``config.asgi``, ``STUDY_ASYNC_VIEWS=1``) on a throwaway
+SQLite database, lets --participants simulated participants go through the
+study at the same time (start, every text, finish) and reports requests/sec
+and latency percentiles per profile. --slow-ms delays every request body
+after the headers were sent, like a slow mobile connection:
+
+    python benchmarks/asgi_load.py --participants 50
+    python benchmarks/asgi_load.py --participants 200 --slow-ms 300 --workers 2
+"""
+
+import argparse
+import http.client
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from _common import BASE_DIR, percentile
+
+PROFILES = {
+    "wsgi": (["config.wsgi:application"], {}),
+    "asgi": (["config.asgi:application", "-k", "uvicorn_worker.UvicornWorker"],
+             {"STUDY_ASYNC_VIEWS": "1"}),
+}
+
+SETTINGS = """\
+from config.settings import *
+
+DEBUG = False
+DATABASES["default"]["NAME"] = {database!r}
+"""
+
+CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class Participant:
+    """One simulated participant with its own connection and cookies"""
+
+    def __init__(self, port, slow, timings, errors):
+        self.port = port
+        self.slow = slow
+        self.timings = timings
+        self.errors = errors
+        self.cookies = {}
+
+    def request(self, method, path, data=None):
+        body = urlencode(data).encode() if data else b""
+        headers = {"Host": f"127.0.0.1:{self.port}"}
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        if method == "POST":
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+            headers["Content-Length"] = str(len(body))
+            headers["Referer"] = f"http://127.0.0.1:{self.port}{path}"
+
+        started = time.perf_counter()
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=120)
+        try:
+            conn.putrequest(method, path, skip_host=True, skip_accept_encoding=True)
+            for name, value in headers.items():
+                conn.putheader(name, value)
+            conn.endheaders()
+            if self.slow:
+                time.sleep(self.slow)
+            if body:
+                conn.send(body)
+            response = conn.getresponse()
+            content = response.read().decode()
+        finally:
+            conn.close()
+        self.timings.append(time.perf_counter() - started)
+
+        for header in response.msg.get_all("Set-Cookie") or []:
+            name, _, rest = header.partition("=")
+            self.cookies[name] = rest.split(";", 1)[0]
+        if response.status >= 400:
+            self.errors.append(f"{method} {path}: {response.status}")
+        return response.status, response.getheader("Location"), content
+
+    def csrf(self, content):
+        match = CSRF_INPUT.search(content)
+        return match.group(1) if match else ""
+
+    def run(self, number):
+        _, _, content = self.request("GET", "/")
+        _, location, _ = self.request("POST", "/", {
+            "csrfmiddlewaretoken": self.csrf(content),
+            "name": f"Load test {number}",
+            "experience": number % 30,
+            "department": "Benchmark",
+        })
+        while location and "/task/" in location:
+            path = urlsplit(location)
+            path = path.path + (f"?{path.query}" if path.query else "")
+            _, _, content = self.request("GET", path)
+            _, location, _ = self.request("POST", path, {
+                "csrfmiddlewaretoken": self.csrf(content),
+                "classification": "ai" if number % 2 else "human",
+                "confidence": 3,
+                "response_time": 5000,
+            })
+        if location:
+            path = urlsplit(location)
+            self.request("GET", path.path + (f"?{path.query}" if path.query else ""))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def prepare_database(texts, env):
+    code = (
+        "import django; django.setup()\n"
+        "from django.core.management import call_command\n"
+        "from study.models import Study, TextItem\n"
+        "call_command('migrate', verbosity=0)\n"
+        "study = Study.objects.get(slug='default')\n"
+        f"TextItem.objects.bulk_create(TextItem(study=study, title=f'Text {{i}}', "
+        f"body='Lorem ipsum dolor sit amet. ' * 40, origin='ai' if i % 2 else 'human') "
+        f"for i in range({texts}))\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, env=env, check=True)
+
+
+def run_profile(name, args, tmp):
+    server_args, extra_env = PROFILES[name]
+    database = Path(tmp) / f"{name}.sqlite3"
+    (Path(tmp) / f"bench_{name}.py").write_text(SETTINGS.format(database=str(database)))
+
+    env = dict(os.environ, **extra_env)
+    env["PYTHONPATH"] = os.pathsep.join([tmp, str(BASE_DIR)])
+    env["DJANGO_SETTINGS_MODULE"] = f"bench_{name}"
+    if args.progress:
+        env["STUDY_PROGRESS"] = args.progress
+    prepare_database(args.texts, env)
+
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", *server_args, "--bind", f"127.0.0.1:{port}",
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BASE_DIR, env=env,
+    )
+    try:
+        wait_for(port, process)
+        timings, errors = [], []
+        threads = [
+            threading.Thread(target=Participant(port, args.slow_ms / 1000, timings, errors).run,
+                             args=(number,))
+            for number in range(args.participants)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        "requests": len(timings),
+        "errors": len(errors),
+        "rps": len(timings) / elapsed,
+        "p50": percentile(timings, 50) * 1000,
+        "p99": percentile(timings, 99) * 1000,
+        "elapsed": elapsed,
+        "first_error": errors[0] if errors else "",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--participants", type=int, default=50,
+                        help="Participants going through the study at the same time")
+    parser.add_argument("--texts", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn worker processes")
+    parser.add_argument("--slow-ms", type=int, default=0,
+                        help="Delay between request headers and body (slow clients)")
+    parser.add_argument("--progress", choices=["session", "token"],
+                        help="STUDY_PROGRESS for the servers (default: settings)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), action="append",
+                        help="Only run this profile (repeatable)")
+    args = parser.parse_args()
+
+    print(f"{args.participants} participants, {args.texts} texts, {args.workers} worker(s), "
+          f"{args.slow_ms} ms client delay\n")
+    print(f"{'profile':<8} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.profile or list(PROFILES):
+            result = run_profile(name, args, tmp)
+            print(f"{name:<8} {result['requests']:>9} {result['errors']:>7} {result['rps']:>8.1f} "
+                  f"{result['p50']:>9.1f} {result['p99']:>9.1f}")
+            if result["first_error"]:
+                print(f"         first error: {result['first_error']}")
+
+
+if __name__ == "__main__":
+    main()
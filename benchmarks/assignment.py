@@ -0,0 +1,53 @@
+"""Time the adaptive text assignment (``study.assignment.assign``).
+
+Seeds a throwaway SQLite database, loads the counts of the default study
+once and then times ``assign`` alone, the way the start page calls it for
+every new participant:
+
+    python benchmarks/assignment.py --texts 300 --sample-size 20
+"""
+
+import argparse
+
+from _common import seed, setup_django, test_database, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--participants", type=int, default=100)
+    parser.add_argument("--texts", type=int, default=300)
+    parser.add_argument("--sample-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from study import assignment, summary
+    from study.corpus import get_corpus
+    from study.models import Study
+
+    with test_database():
+        seed(args.participants, args.texts)
+        # bulk_create zählt nicht mit, die Zuweisung liest TextSummary
+        summary.rebuild()
+        study = Study.objects.get(slug="default")
+        pool = get_corpus().pool(study.id)
+        print(f"Seeded {args.participants} participants, {args.texts} texts\n")
+
+        with CaptureQueriesContext(connection) as queries:
+            median, _, _ = timed(lambda: assignment.assign(study.id, pool, args.sample_size), 1)
+        print(f"first assign (loads the counts) {median:>8.2f} ms {len(queries):>4} queries")
+
+        with CaptureQueriesContext(connection) as queries:
+            median, best, _ = timed(
+                lambda: assignment.assign(study.id, pool, args.sample_size), args.repeat
+            )
+        print(f"assign                          {median:>8.3f} ms (min {best:.3f} ms) "
+              f"{len(queries):>4} queries in {args.repeat} runs")
+
+
+if __name__ == "__main__":
+    main()
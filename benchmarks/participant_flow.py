@@ -0,0 +1,248 @@
+"""Load test of the participant flow with query counts and lock contention.
+
+Runs --participants simulated participants in parallel threads, each with
+its own Django test client, through start -> every text -> finish on a
+throwaway SQLite database, with random think times between the steps. For
+every step it reports latency percentiles and queries per request, plus the
+overall throughput, requests that failed with "database is locked" and the
+time spent in write statements (which includes waiting for the SQLite
+lock). The think times are drawn from --seed, so runs are repeatable.
+
+Results can be saved as JSON and compared with an earlier run:
+
+    python benchmarks/participant_flow.py --participants 50 --output before.json
+    python benchmarks/participant_flow.py --participants 50 --compare before.json
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+
+from _common import BASE_DIR, percentile, setup_django, test_database
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "COMMIT", "RELEASE")
+
+
+class Recorder:
+    """Collects timings and query counts from all participant threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.steps = defaultdict(lambda: {"ms": [], "queries": []})
+        self.writes = []
+        self.lock_errors = 0
+        self.errors = []
+
+    def request(self, step, ms, queries):
+        with self.lock:
+            self.steps[step]["ms"].append(ms)
+            self.steps[step]["queries"].append(queries)
+
+    def write(self, ms):
+        with self.lock:
+            self.writes.append(ms)
+
+    def error(self, step, exc):
+        with self.lock:
+            if "locked" in str(exc):
+                self.lock_errors += 1
+            self.errors.append(f"{step}: {exc}")
+
+
+class QueryCounter:
+    """execute_wrapper that counts queries and times write statements"""
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        if not sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.recorder.write((time.perf_counter() - started) * 1000)
+
+
+def participant(number, args, recorder, barrier):
+    from django.db import connection
+    from django.test import Client
+
+    rng = random.Random(f"{args.seed}:{number}")
+    client = Client()
+    counter = QueryCounter(recorder)
+
+    def step(name, method, path, data=None):
+        if args.think_ms:
+            # Exponentialverteilte Bedenkzeit mit Mittelwert --think-ms
+            time.sleep(rng.expovariate(1000 / args.think_ms))
+        counter.count = 0
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(counter):
+                response = getattr(client, method)(path, data)
+        except Exception as exc:  # noqa: BLE001 - jede Störung zählen, weitermachen
+            recorder.error(name, exc)
+            return None
+        recorder.request(name, (time.perf_counter() - started) * 1000, counter.count)
+        return response
+
+    barrier.wait()
+    step("start (GET)", "get", "/")
+    response = step("start (POST)", "post", "/", {
+        "name": f"Participant {number}",
+        "experience": rng.randint(0, 30),
+        "department": "Benchmark",
+    })
+    location = response and response.get("Location")
+    while location and "/task/" in location:
+        step("classify (GET)", "get", location)
+        response = step("classify (POST)", "post", location, {
+            "classification": rng.choice(["ai", "human"]),
+            "confidence": rng.randint(1, 5),
+            "response_time": rng.randint(5000, 60000),
+        })
+        location = response and response.get("Location")
+    if location:
+        step("finish (GET)", "get", location)
+    connection.close()
+
+
+def summarize(recorder, elapsed, args):
+    steps = {}
+    for name, data in recorder.steps.items():
+        steps[name] = {
+            "requests": len(data["ms"]),
+            "p50_ms": percentile(data["ms"], 50),
+            "p90_ms": percentile(data["ms"], 90),
+            "p99_ms": percentile(data["ms"], 99),
+            "max_ms": max(data["ms"]),
+            "queries_mean": sum(data["queries"]) / len(data["queries"]),
+            "queries_max": max(data["queries"]),
+        }
+    requests = sum(step["requests"] for step in steps.values())
+    latencies = [ms for data in recorder.steps.values() for ms in data["ms"]]
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "config": vars(args) | {"output": None, "compare": None},
+        "elapsed_s": elapsed,
+        "requests": requests,
+        "requests_per_s": requests / elapsed,
+        "participants_per_s": args.participants / elapsed,
+        "p50_ms": percentile(latencies, 50) if latencies else None,
+        "p99_ms": percentile(latencies, 99) if latencies else None,
+        "errors": len(recorder.errors),
+        "lock_errors": recorder.lock_errors,
+        "write_statements": len(recorder.writes),
+        "write_p99_ms": percentile(recorder.writes, 99) if recorder.writes else None,
+        "write_max_ms": max(recorder.writes, default=None),
+        "steps": steps,
+    }
+
+
+def report(result, baseline=None):
+    def change(key, current):
+        old = (baseline or {}).get(key)
+        if not old or current is None:
+            return ""
+        return f" ({(current - old) / old * 100:+.0f}%)"
+
+    print(f"{'step':<18} {'requests':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'queries':>8}")
+    for name, step in result["steps"].items():
+        print(f"{name:<18} {step['requests']:>9} {step['p50_ms']:>8.1f} {step['p90_ms']:>8.1f} "
+              f"{step['p99_ms']:>8.1f} {step['max_ms']:>8.1f} {step['queries_mean']:>8.1f}")
+    print()
+    print(f"throughput:        {result['requests_per_s']:.1f} req/s"
+          f"{change('requests_per_s', result['requests_per_s'])}, "
+          f"{result['participants_per_s']:.2f} participants/s")
+    print(f"latency:           p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms"
+          f"{change('p99_ms', result['p99_ms'])}")
+    print(f"errors:            {result['errors']} ({result['lock_errors']} database is locked)")
+    if result["write_statements"]:
+        print(f"write statements:  {result['write_statements']}, p99 {result['write_p99_ms']:.1f} ms"
+              f"{change('write_p99_ms', result['write_p99_ms'])}, "
+              f"max {result['write_max_ms']:.1f} ms")
+    if baseline is not None:
+        print(f"\ncompared with {baseline.get('commit') or 'baseline'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--participants", type=int, default=20,
+                        help="Participants going through the study at the same time")
+    parser.add_argument("--texts", type=int, default=10)
+    parser.add_argument("--think-ms", type=float, default=200,
+                        help="Mean think time before every request (0 = none)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--progress", choices=["session", "token"],
+                        help="STUDY_PROGRESS (default: settings)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Show the change against an earlier JSON result")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.test.utils import override_settings
+
+    from study.models import Study, TextItem
+
+    # Der Ablauf wird Text für Text durchgespielt
+    overrides = {"STUDY_CLASSIFY_MODE": "paged"}
+    if args.progress:
+        overrides["STUDY_PROGRESS"] = args.progress
+
+    with test_database(), override_settings(**overrides):
+        study = Study.objects.get(slug="default")
+        TextItem.objects.bulk_create(
+            TextItem(study=study, title=f"Text {i}", body=" ".join(["Lorem ipsum dolor sit amet."] * 40),
+                     origin="ai" if i % 2 else "human")
+            for i in range(args.texts)
+        )
+        recorder = Recorder()
+        barrier = threading.Barrier(args.participants + 1)
+        threads = [
+            threading.Thread(target=participant, args=(number, args, recorder, barrier))
+            for number in range(args.participants)
+        ]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    result = summarize(recorder, elapsed, args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print(f"{args.participants} participants, {args.texts} texts, "
+          f"{args.think_ms:.0f} ms mean think time\n")
+    report(result, baseline)
+    if recorder.errors:
+        print(f"first error: {recorder.errors[0]}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
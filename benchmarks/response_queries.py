@@ -0,0 +1,81 @@
+"""Time the Response query paths on a large synthetic dataset.
+
+Seeds a throwaway SQLite database and times the Response admin changelist
+(unfiltered and filtered the way list_filter does it), the finish page, the
+streaming export and the tablib-based admin export:
+
+    python benchmarks/response_queries.py --participants 5000
+
+The script seeds and queries through the current models, so it only runs
+against the current schema. To compare with an older state (e.g. before the
+Response indexes), run it from a checkout of that revision.
+"""
+
+import argparse
+
+from _common import seed, setup_django, test_database, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--participants", type=int, default=5000)
+    parser.add_argument("--texts", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth.models import User
+    from django.db import connection, reset_queries
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    from study.admin import ResponseResource
+    from study.export import iter_csv
+
+    with test_database():
+        texts = seed(args.participants, args.texts)
+        print(
+            f"Seeded {args.participants} participants, {args.texts} texts, "
+            f"{args.participants * args.texts} responses\n"
+        )
+
+        admin = User.objects.create_superuser("bench", "bench@example.com", "bench")
+        client = Client()
+        client.force_login(admin)
+
+        participant_client = Client()
+        session = participant_client.session
+        session["participant_id"] = args.participants // 2
+        session["current_index"] = args.texts
+        session.save()
+
+        cases = [
+            ("admin changelist", lambda: client.get("/admin/study/response/")),
+            (
+                "admin changelist, filter classification",
+                lambda: client.get("/admin/study/response/?classification__exact=ai"),
+            ),
+            (
+                "admin changelist, filter text + classification",
+                lambda: client.get(
+                    f"/admin/study/response/?classification__exact=ai&text__id__exact={texts[0].id}"
+                ),
+            ),
+            ("finish page", lambda: participant_client.get("/finish/")),
+        ]
+        cases.append(("streaming export (csv)", lambda: sum(map(len, iter_csv()))))
+        # Der tablib-Export dauert sehr lange, daher nur einmal
+        cases.append(("admin export (tablib csv)", lambda: ResponseResource().export().csv, 1))
+
+        print(f"{'case':<48} {'median ms':>10} {'min ms':>10} {'queries':>8}")
+        for label, fn, *repeat in cases:
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                fn()
+            median, best, _ = timed(fn, repeat[0] if repeat else args.repeat)
+            print(f"{label:<48} {median:>10.1f} {best:>10.1f} {len(queries):>8}")
+
+
+if __name__ == "__main__":
+    main()
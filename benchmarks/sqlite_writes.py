@@ -0,0 +1,132 @@
+"""Write throughput of the database profiles with several worker processes.
+
+Every profile (DB_PROFILE, see config/settings/base.py) gets a fresh SQLite
+file. --workers processes, like gunicorn workers, then each store the
+responses of their own participants the way the classify view does (one
+transaction per response, including the dashboard counters) as fast as
+they can. Reports responses/sec, "database is locked" failures and the
+latency of a single write:
+
+    python benchmarks/sqlite_writes.py --workers 4 --responses 500
+"""
+
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _common import BASE_DIR, percentile, setup_django
+
+PROFILES = ["sqlite", "sqlite-wal"]
+
+
+def configure(profile, database):
+    os.environ["DB_PROFILE"] = profile
+    os.environ["SQLITE_PATH"] = str(database)
+
+
+def prepare(profile, database, workers, texts):
+    env = dict(os.environ, DB_PROFILE=profile, SQLITE_PATH=str(database))
+    env.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    subprocess.run([sys.executable, "manage.py", "migrate", "--verbosity", "0"],
+                   cwd=BASE_DIR, env=env, check=True)
+    code = (
+        "import django; django.setup()\n"
+        "from study.models import Participant, Study, TextItem\n"
+        "study = Study.objects.get(slug='default')\n"
+        f"TextItem.objects.bulk_create(TextItem(study=study, title=f'Text {{i}}', body='Lorem ipsum', "
+        f"origin='ai' if i % 2 else 'human') for i in range({texts}))\n"
+        f"Participant.objects.bulk_create(Participant(study=study, name=f'Worker {{i}}', experience=1, "
+        f"department='Benchmark') for i in range({workers}))\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, env=env, check=True)
+
+
+def worker(profile, database, number, responses, texts, start, results):
+    configure(profile, database)
+    setup_django()
+
+    from django.db import OperationalError, connection
+
+    from study.models import Participant, TextItem
+    from study.views import _save_response
+    from study.progress import Progress
+
+    participant = Participant.objects.order_by("id")[number]
+    text_items = list(TextItem.objects.order_by("id"))
+    # Jede Antwort eine eigene Position, damit der Unique-Constraint nicht greift
+    state = Progress(participant.id, [])
+    timings, locked = [], 0
+
+    start.wait()
+    for i in range(responses):
+        state.current_index = i
+        data = {"classification": "ai" if i % 2 else "human", "confidence": 3,
+                "response_time": 5000}
+        started = time.perf_counter()
+        try:
+            _save_response(state, text_items[i % texts], data)
+        except OperationalError as exc:
+            if "locked" not in str(exc):
+                raise
+            locked += 1
+        timings.append((time.perf_counter() - started) * 1000)
+    connection.close()
+    results.put((timings, locked))
+
+
+def run(profile, args, tmp):
+    database = Path(tmp) / f"{profile}.sqlite3"
+    prepare(profile, database, args.workers, args.texts)
+
+    context = multiprocessing.get_context("spawn")
+    start = context.Barrier(args.workers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(profile, database, number, args.responses,
+                                             args.texts, start, results))
+        for number in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    start.wait()
+    started = time.perf_counter()
+    collected = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    timings = [ms for worker_timings, _ in collected for ms in worker_timings]
+    locked = sum(worker_locked for _, worker_locked in collected)
+    return {
+        "writes_per_s": (len(timings) - locked) / elapsed,
+        "locked": locked,
+        "p50": percentile(timings, 50),
+        "p99": percentile(timings, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4, help="Writing processes")
+    parser.add_argument("--responses", type=int, default=500, help="Responses per process")
+    parser.add_argument("--texts", type=int, default=10)
+    parser.add_argument("--profile", choices=PROFILES, action="append",
+                        help="Only run this profile (repeatable)")
+    args = parser.parse_args()
+
+    print(f"{args.workers} processes x {args.responses} responses\n")
+    print(f"{'profile':<12} {'responses/s':>12} {'locked':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in args.profile or PROFILES:
+            result = run(profile, args, tmp)
+            print(f"{profile:<12} {result['writes_per_s']:>12.1f} {result['locked']:>8} "
+                  f"{result['p50']:>8.2f} {result['p99']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -55,10 +55,61 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
-DATABASES = {
+# DB_PROFILE:
+# "sqlite" (default): SQLite with Django's defaults
+# "sqlite-wal": SQLite for several workers: WAL journal, synchronous=NORMAL,
+#   busy timeout, write transactions start immediately and connections are
+#   kept open (pragmas are set on connect, see study/signals.py)
+# "postgres": PostgreSQL configured from the POSTGRES_* variables
+DB_PROFILE = os.getenv("DB_PROFILE", "sqlite")
+SQLITE_PATH = os.getenv("SQLITE_PATH", str(BASE_DIR / "db.sqlite3"))
+SQLITE_PRAGMAS = {}
+
+if DB_PROFILE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("POSTGRES_DB", "study"),
+            "USER": os.getenv("POSTGRES_USER", "study"),
+            "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+            "HOST": os.getenv("POSTGRES_HOST", "localhost"),
+            "PORT": os.getenv("POSTGRES_PORT", "5432"),
+            "CONN_MAX_AGE": int(os.getenv("CONN_MAX_AGE", "60")),
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": SQLITE_PATH,
+        }
+    }
+
+if DB_PROFILE == "sqlite-wal":
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": int(os.getenv("CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # Sekunden, die auf die Schreibsperre gewartet wird
+            "timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "20")),
+            "transaction_mode": "IMMEDIATE",
+        },
+    })
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "20")) * 1000,
+    }
+
+# Default: per-process memory. With several workers, point this at a shared
+# backend, e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
     }
 }
 
@@ -86,4 +137,66 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Stylesheets that {% css_bundle %} links either one by one or, with
+# STATIC_BUNDLE_CSS=1, as a single file built by manage.py bundle_css
+CSS_BUNDLES = {
+    "css/bundle.css": ["css/base.css", "css/forms.css", "css/header.css", "css/footer.css"],
+}
+STATIC_BUILD_DIR = BASE_DIR / "build" / "static"
+STATIC_BUNDLE_CSS = os.getenv("STATIC_BUNDLE_CSS", "0") == "1"
+if STATIC_BUNDLE_CSS:
+    STATICFILES_DIRS.append(STATIC_BUILD_DIR)
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Study
+# "paged": one POST per text, "single": all texts on one page, answers are
+# submitted together as JSON at the end.
+STUDY_CLASSIFY_MODE = os.getenv("STUDY_CLASSIFY_MODE", "paged")
+
+# Store the TextItem snapshot in the cache as well, so that workers share it
+STUDY_CORPUS_SHARED_CACHE = os.getenv("STUDY_CORPUS_SHARED_CACHE", "0") == "1"
+
+# Seconds the corpus version (stored in the database) is kept in the cache;
+# with a per-process cache, changes made by other processes (ingest_texts)
+# show up after at most this long
+STUDY_CORPUS_VERSION_TTL = int(os.getenv("STUDY_CORPUS_VERSION_TTL", 5))
+
+# Study (slug) that participants on the start page "/" take part in; the
+# others are reached under /s/<slug>/
+STUDY_DEFAULT = os.getenv("STUDY_DEFAULT", "default")
+
+# Rendered text bodies per worker (study/rendering.py), bounded in characters
+# of HTML. STUDY_PRERENDER_BODIES=1 renders all of them whenever a worker
+# loads the corpus instead of on first view.
+STUDY_BODY_CACHE_SIZE = int(os.getenv("STUDY_BODY_CACHE_SIZE", 32 * 1024 * 1024))
+STUDY_PRERENDER_BODIES = os.getenv("STUDY_PRERENDER_BODIES", "0") == "1"
+
+# "session": participant progress lives in the session (database),
+# "token": in a signed token in the URL, without touching the session table
+STUDY_PROGRESS = os.getenv("STUDY_PROGRESS", "session")
+
+# Text order per participant, see study/ordering.py. The order is stored when
+# a participant starts, so changing either value only affects new participants
+# (but breaks the balance of latin/balanced designs within a study).
+STUDY_ORDER_SEED = os.getenv("STUDY_ORDER_SEED", "0")
+STUDY_ORDER_STRATEGY = os.getenv("STUDY_ORDER_STRATEGY", "random")
+
+# "adaptive" strategy (study/assignment.py): seconds until the texts of a
+# participant who stopped answering are free again, and how often the
+# per-text counts are reloaded from the database
+STUDY_ASSIGNMENT_TTL = int(os.getenv("STUDY_ASSIGNMENT_TTL", 30 * 60))
+STUDY_ASSIGNMENT_REFRESH = int(os.getenv("STUDY_ASSIGNMENT_REFRESH", 60))
+
+# Use the async variants of start/classify/finish. Meant for the ASGI
+# profile (docker-compose.asgi.yml); under WSGI every async view call runs
+# its own event loop and is slower than the sync view.
+STUDY_ASYNC_VIEWS = os.getenv("STUDY_ASYNC_VIEWS", "0") == "1"
+
+# Write-behind: the text pages only queue responses in a separate SQLite file
+# and a background process (manage.py drain_responses --loop) stores them,
+# see study/writebehind.py
+STUDY_WRITE_BEHIND = os.getenv("STUDY_WRITE_BEHIND", "0") == "1"
+STUDY_QUEUE_PATH = os.getenv(
+    "STUDY_QUEUE_PATH", str(Path(SQLITE_PATH).with_name("response_queue.sqlite3"))
+)
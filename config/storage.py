@@ -0,0 +1,46 @@
+"""Static files storage for production.
+
+``ManifestStaticFilesStorage`` gives every file a content hash in its name
+(``base.css`` -> ``base.3f2a9c1b7d4e.css``), so nginx can serve them with an
+immutable cache header. After hashing, text-based files also get
+precompressed ``.gz`` and, if the ``brotli`` package is installed, ``.br``
+siblings for nginx's ``gzip_static``/``brotli_static``.
+"""
+
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = (".css", ".js", ".svg", ".json", ".webmanifest", ".txt", ".map", ".ico")
+# Kleinere Dateien lohnen den zusätzlichen Request-Header-Aufwand nicht
+MIN_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            if name.endswith(COMPRESSIBLE):
+                self._compress(name)
+
+    def _compress(self, name):
+        path = self.path(name)
+        with open(path, "rb") as f:
+            content = f.read()
+        if len(content) < MIN_SIZE:
+            return
+
+        variants = [(".gz", gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(content, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(content):
+                with open(path + suffix, "wb") as f:
+                    f.write(compressed)
@@ -0,0 +1,117 @@
+"""Aggregate tables shared by all report sections.
+
+Every section of the report used to run its own groupby over the responses.
+``Aggregates`` computes the per-participant, per-text and per-origin tables,
+the confusion matrix and the correct/incorrect partitions once, and the
+sections only read from it.
+
+The tables are derived from sufficient statistics (counts, sums and sums of
+squares per participant, text and origin/classification), which can be
+merged, so the incremental mode (``incremental.py``) only has to compute
+them for new rows.
+"""
+
+import pandas as pd
+
+from loading import ORIGIN_DTYPE
+
+SUM_COLUMNS = ['correct', 'confidence', 'response_time']
+
+GROUPS = {
+    'participant': ['participant__id'],
+    'participant_origin': ['participant__id', 'text__origin'],
+    'text': ['text__id', 'text__origin'],
+    'origin': ['text__origin', 'classification'],
+}
+
+
+def sufficient_statistics(df):
+    """Counts, sums and sums of squares per participant, text and origin"""
+    values = df[SUM_COLUMNS].astype('float64')
+    frame = pd.concat([values, (values ** 2).add_suffix('_sq')], axis=1)
+
+    stats = {}
+    for name, keys in GROUPS.items():
+        grouped = frame.groupby([df[key] for key in keys], observed=True)
+        table = grouped.sum()
+        table['n'] = grouped.size()
+        stats[name] = table
+
+    stats['participant_info'] = df.groupby('participant__id')[
+        ['participant__experience', 'participant__department']
+    ].first()
+    return stats
+
+
+def merge_statistics(old, new):
+    """Fold the statistics of new rows into existing ones"""
+    merged = {}
+    for name in GROUPS:
+        table = old[name].add(new[name], fill_value=0)
+        merged[name] = _restore_index(table.sort_index())
+    # Angaben der Teilnehmenden: bestehende Zeilen behalten
+    info = pd.concat([old['participant_info'], new['participant_info']])
+    merged['participant_info'] = info[~info.index.duplicated()].sort_index()
+    return merged
+
+
+def _restore_index(table):
+    # Nach add() sind kategoriale Index-Level wieder object
+    if isinstance(table.index, pd.MultiIndex):
+        table.index = table.index.set_levels(
+            [level.astype(ORIGIN_DTYPE) if level.name in ('text__origin', 'classification') else level
+             for level in table.index.levels]
+        )
+    return table
+
+
+def _means(table):
+    return table[SUM_COLUMNS].div(table['n'], axis=0)
+
+
+class Aggregates:
+    """Tables computed once from the response DataFrame"""
+
+    def __init__(self, df, stats=None):
+        df['response_time_sec'] = df['response_time'] / 1000
+        self.df = df
+        self.stats = stats if stats is not None else sufficient_statistics(df)
+
+        # Correct / incorrect responses
+        is_correct = df['correct'] == 1
+        self.correct = df[is_correct]
+        self.incorrect = df[~is_correct]
+
+        # One row per participant
+        self.per_participant = _means(self.stats['participant']).join(
+            self.stats['participant_info']
+        )
+        self.per_participant['accuracy'] = self.per_participant['correct'] * 100
+        self.participant_accuracy = self.per_participant['accuracy']
+
+        # Correct responses and responses per participant and origin
+        # (columns: ('correct' | 'n', origin))
+        self.per_participant_origin = (
+            self.stats['participant_origin'][['correct', 'n']]
+            .unstack('text__origin', fill_value=0)
+            .reindex(self.per_participant.index, fill_value=0)
+        )
+
+        # One row per text
+        self.per_text = _means(self.stats['text'])
+
+        # One row per text origin
+        by_origin = self.stats['origin'].groupby(level='text__origin', observed=True).sum()
+        self.per_origin = pd.DataFrame({
+            'accuracy': by_origin['correct'] / by_origin['n'] * 100,
+            'correct': by_origin['correct'].astype('int64'),
+            'responses': by_origin['n'].astype('int64'),
+            'texts': self.per_text.groupby(level='text__origin', observed=True).size(),
+        })
+
+        # Actual origin x classification
+        self.confusion = (
+            self.stats['origin']['n'].astype('int64')
+            .unstack('classification', fill_value=0)
+            .rename_axis(index='text__origin', columns='classification')
+        )
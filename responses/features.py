@@ -0,0 +1,287 @@
+"""Text features for the item analysis.
+
+Every text gets a few dense features computed from its body
+
+- ``characters``, ``words``
+- ``type_token_ratio``: distinct words / words (case-insensitive)
+- ``sentence_length``, ``sentence_length_sd``: words per sentence
+- ``punctuation_rate``: punctuation marks per word
+- ``function_word_rate``: share of German and English function words
+
+and a character n-gram profile: the relative frequencies of all
+``NGRAM``-grams (lowercased, whitespace collapsed), hashed into
+``NGRAM_BUCKETS`` columns of a sparse matrix. The n-grams of a whole batch
+of texts are hashed in one pass over their concatenated code points and
+counted by building the CSR matrix, without a Python loop per n-gram.
+
+The features are cached next to the texts export
+(``<name>.features.npz``), keyed by the content hash of the body
+(``content_hash`` column of ``manage.py export_texts``, else computed like
+``study.models.body_hash``), so on the next run only new or edited texts
+are processed. ``regress`` fits several per-text outcomes on one feature
+at a time (adjusted for the origin of the text), all models in one batched
+QR factorization.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy import stats
+
+# Ändern, wenn sich die Extraktion ändert (macht den Cache ungültig)
+FEATURE_VERSION = 1
+NGRAM = 3
+NGRAM_BUCKETS = 2 ** 14
+BATCH_SIZE = 500
+
+DENSE_FEATURES = [
+    'characters', 'words', 'type_token_ratio', 'sentence_length', 'sentence_length_sd',
+    'punctuation_rate', 'function_word_rate',
+]
+
+WORD = re.compile(r"\w+(?:['’]\w+)*")
+SENTENCE_END = re.compile(r"[.!?…]+(?=\s|$)")
+PUNCTUATION = re.compile(r"[.,;:!?…\-–—()\"'„“”‚‘’«»]")
+
+FUNCTION_WORDS = frozenset("""
+    der die das den dem des ein eine einer eines einem einen und oder aber denn doch
+    sondern weil dass ob wenn als wie auch nicht noch schon nur sehr so zu in im an am
+    auf aus bei mit nach von vom zum zur für über unter vor durch gegen ohne um es er
+    sie wir ihr ich du man sich ist sind war waren wird werden wurde hat haben kann
+    the a an and or but because that if as than of to in on at by for with from about
+    into through over under it he she they we you i is are was were be been has have
+    had will would can could this these those which who not no so very also
+""".split())
+
+# Multiplikatoren für den Rolling Hash über Codepoints (uint64, Überlauf gewollt)
+_BASE = np.uint64(1_000_003)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_BUCKET_SHIFT = np.uint64(64 - int(np.log2(NGRAM_BUCKETS)))
+
+
+def body_hash(body):
+    # Wie study.models.body_hash
+    normalized = body.replace("\r\n", "\n").strip()
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def dense_features(body):
+    # Wörter satzweise, so wird der Text nur einmal mit WORD durchsucht
+    sentences = [WORD.findall(part) for part in SENTENCE_END.split(body.lower())]
+    words = [word for sentence in sentences for word in sentence]
+    sentences = [len(sentence) for sentence in sentences if sentence] or [0]
+    n_words = max(len(words), 1)
+    return [
+        len(body),
+        len(words),
+        len(set(words)) / n_words,
+        np.mean(sentences),
+        np.std(sentences),
+        len(PUNCTUATION.findall(body)) / n_words,
+        sum(word in FUNCTION_WORDS for word in words) / n_words,
+    ]
+
+
+def ngram_profiles(bodies):
+    """Hashed character n-gram frequencies of the bodies as a CSR matrix (one row per text)"""
+    # Alle Texte hintereinander, getrennt durch Codepoint 0
+    texts = [" ".join(body.lower().replace("\0", " ").split()) for body in bodies]
+    codes = np.frombuffer("\0".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    n = len(codes) - NGRAM + 1
+    if n <= 0:
+        return sp.csr_matrix((len(bodies), NGRAM_BUCKETS), dtype=np.float32)
+
+    hashes = np.zeros(n, dtype=np.uint64)
+    for offset in range(NGRAM):
+        hashes = hashes * _BASE + codes[offset:offset + n]
+    buckets = ((hashes * _MIX) >> _BUCKET_SHIFT).astype(np.int64)
+
+    # N-Gramme über eine Textgrenze hinweg verwerfen
+    separators = np.concatenate([[0], np.cumsum(codes == 0)])
+    valid = separators[NGRAM:] == separators[:n]
+    rows = np.repeat(np.arange(len(texts)), [len(text) + 1 for text in texts])[:n]
+
+    counts = sp.csr_matrix(
+        (np.ones(valid.sum(), dtype=np.float32), (rows[valid], buckets[valid])),
+        shape=(len(texts), NGRAM_BUCKETS),
+    )
+    totals = np.asarray(counts.sum(axis=1)).ravel()
+    totals[totals == 0] = 1
+    return (sp.diags((1 / totals).astype(np.float32)) @ counts).tocsr()
+
+
+def extract(bodies):
+    """Dense feature matrix and n-gram profiles of a list of bodies"""
+    dense = np.array([dense_features(body) for body in bodies], dtype=float)
+    dense = dense.reshape(-1, len(DENSE_FEATURES))
+    profiles = [ngram_profiles(bodies[start:start + BATCH_SIZE])
+                for start in range(0, len(bodies), BATCH_SIZE)]
+    ngrams = sp.vstack(profiles, format='csr') if profiles else ngram_profiles([])
+    return dense, ngrams
+
+
+def cache_path(path):
+    path = Path(path)
+    return path.with_name(path.name + '.features.npz')
+
+
+def _load_cache(cache):
+    try:
+        with np.load(cache, allow_pickle=False) as data:
+            if int(data['version']) != FEATURE_VERSION or int(data['buckets']) != NGRAM_BUCKETS:
+                return None
+            ngrams = sp.csr_matrix(
+                (data['data'], data['indices'], data['indptr']), shape=tuple(data['shape'])
+            )
+            return list(data['hashes']), data['dense'], ngrams
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _save_cache(cache, hashes, dense, ngrams):
+    try:
+        with open(cache, 'wb') as f:
+            np.savez(
+                f, version=FEATURE_VERSION, buckets=NGRAM_BUCKETS, hashes=np.array(hashes, dtype=str),
+                dense=dense, data=ngrams.data, indices=ngrams.indices, indptr=ngrams.indptr,
+                shape=np.array(ngrams.shape),
+            )
+    except OSError:
+        # Schreibgeschützter Ordner: dann eben ohne Cache
+        pass
+
+
+def text_features(texts, cache=None):
+    """Features of the texts (``text__id``, ``body``, optional ``content_hash``).
+
+    Returns the dense features as a DataFrame indexed by ``text__id``, the
+    n-gram profiles as a CSR matrix in the same row order and the number of
+    texts that had to be processed (the others came from ``cache``).
+    """
+    bodies = texts['body'].fillna('').astype(str).tolist()
+    if 'content_hash' in texts.columns:
+        hashes = [h if isinstance(h, str) and h else body_hash(body)
+                  for h, body in zip(texts['content_hash'], bodies)]
+    else:
+        hashes = [body_hash(body) for body in bodies]
+
+    cached = _load_cache(cache) if cache is not None else None
+    known_hashes, known_dense, known_ngrams = cached or ([], np.empty((0, len(DENSE_FEATURES))), None)
+    known = {h: row for row, h in enumerate(known_hashes)}
+
+    missing = {}
+    for h, body in zip(hashes, bodies):
+        if h not in known and h not in missing:
+            missing[h] = body
+    dense, ngrams = extract(list(missing.values()))
+
+    # Gespeichert werden nur noch vorhandene Texte
+    keep = sorted({known[h] for h in hashes if h in known})
+    all_hashes = [known_hashes[row] for row in keep] + list(missing)
+    all_dense = np.vstack([known_dense[keep], dense])
+    all_ngrams = sp.vstack([known_ngrams[keep], ngrams], format='csr') if keep else ngrams
+    if cache is not None and (missing or len(keep) != len(known_hashes)):
+        _save_cache(cache, all_hashes, all_dense, all_ngrams)
+
+    position = {h: row for row, h in enumerate(all_hashes)}
+    rows = [position[h] for h in hashes]
+    features = pd.DataFrame(
+        all_dense[rows], columns=DENSE_FEATURES, index=pd.Index(texts['text__id'], name='text__id')
+    )
+    return features, all_ngrams[rows], len(missing)
+
+
+def profile_contrast(ngrams, is_ai):
+    """Cosine similarity of each n-gram profile to the AI texts minus that to the human texts.
+
+    The centroids leave the text itself out, so the value only reflects
+    how much a text resembles the *other* texts of each origin.
+    """
+    is_ai = np.asarray(is_ai, dtype=bool)
+    norms = np.sqrt(np.asarray(ngrams.multiply(ngrams).sum(axis=1)).ravel())
+    self_dot = norms ** 2
+    contrast = np.zeros(ngrams.shape[0])
+    for group, sign in ((is_ai, 1), (~is_ai, -1)):
+        total = np.asarray(ngrams[group].sum(axis=0)).ravel()
+        # Zentroid ohne den Text selbst: (Summe - x) · x und |Summe - x|
+        dot = ngrams @ total - group * self_dot
+        total_sq = total @ total
+        other_norm = np.sqrt(np.maximum(total_sq - 2 * group * (ngrams @ total) + group * self_dot, 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarity = np.where(norms * other_norm > 0, dot / (norms * other_norm), 0)
+        contrast += sign * similarity
+    return contrast
+
+
+def _slopes(designs, Y):
+    # designs (Modelle, Texte, Spalten); die Steigung steht in Spalte 1
+    models, n, p = designs.shape
+    dof = n - p
+    Q, R = np.linalg.qr(designs)
+    # Merkmale, die (fast) mit der Kontrollvariable zusammenfallen, bleiben leer
+    diagonal = np.abs(np.diagonal(R, axis1=1, axis2=2))
+    singular = (diagonal <= 1e-10 * diagonal.max(axis=1, keepdims=True)).any(axis=1)
+    R[singular] = np.eye(p)
+    coef = np.linalg.solve(R, Q.transpose(0, 2, 1) @ Y)
+    residuals = Y - designs @ coef
+    sigma2 = (residuals ** 2).sum(axis=1) / dof
+    # Diagonale von R^-1 R^-T an der Stelle der Steigung
+    unscaled = (np.linalg.inv(R)[:, 1, :] ** 2).sum(axis=1)
+    se = np.sqrt(unscaled[:, None] * sigma2)
+    total = ((Y - Y.mean(axis=0)) ** 2).sum(axis=0)
+    r2 = 1 - (residuals ** 2).sum(axis=1) / np.where(total > 0, total, np.nan)
+    slope = coef[:, 1, :]
+    for values in (slope, se, r2):
+        values[singular] = np.nan
+    return slope, se, r2, dof
+
+
+def regress(features, outcomes, control='ai_generated'):
+    """Regress every outcome on one standardized feature at a time, adjusted for ``control``.
+
+    Each feature gets its own model ``[1, z(feature), z(control)]`` (the
+    control itself ``[1, z(control)]``), so three texts more than that are
+    enough, unlike one model with all features. The models of all features
+    are stacked and solved together: one batched QR factorization gives the
+    coefficients of all outcomes and the unscaled variance of each slope.
+    Constant features are dropped. Returns None if there are not more texts
+    than coefficients per model.
+    """
+    X = features.to_numpy(dtype=float)
+    Y = outcomes.to_numpy(dtype=float)
+    sd = X.std(axis=0, ddof=1)
+    used = sd > 0
+    names = list(features.columns[used])
+    Z = (X[:, used] - X[:, used].mean(axis=0)) / sd[used]
+    z = dict(zip(names, Z.T))
+    n = len(Z)
+    ones = np.ones(n)
+    adjust = [z[control]] if control in z else []
+    others = [name for name in names if name != control]
+    if n - 2 - len(adjust) <= 0:
+        return None
+
+    fits = []
+    if others:
+        designs = np.stack([np.column_stack([ones, z[name], *adjust]) for name in others])
+        fits.append(_slopes(designs, Y))
+    if adjust:
+        fits.append(_slopes(np.column_stack([ones, *adjust])[None], Y))
+    slope, se, r2 = (np.vstack([fit[i] for fit in fits]) for i in range(3))
+    dof = np.concatenate([np.full(len(fit[0]), fit[3]) for fit in fits])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = slope / se
+
+    index = pd.Index(others + [control] * bool(adjust), name='feature')
+    columns = outcomes.columns
+    return {
+        'coef': pd.DataFrame(slope, index=index, columns=columns),
+        'se': pd.DataFrame(se, index=index, columns=columns),
+        'p': pd.DataFrame(2 * stats.t.sf(np.abs(t), dof[:, None]), index=index, columns=columns),
+        'r2': pd.DataFrame(r2, index=index, columns=columns),
+        'dof': n - 2 - len(adjust),
+    }
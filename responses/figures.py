@@ -0,0 +1,268 @@
+"""Figure rendering for the visualization section.
+
+Every figure is an independent render task: a module-level function that
+gets the output path, the DPI and only the precomputed arrays it draws.
+``figure_tasks`` builds the tasks from the aggregates and ``render_all``
+renders them, in parallel on a process pool when more than one worker is
+requested. Workers use the non-interactive Agg backend.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+from matplotlib.patches import Patch
+
+
+def apply_style():
+    """Plot style shared by the main process and the workers"""
+    sns.set_style("whitegrid")
+    plt.rcParams['figure.figsize'] = (12, 8)
+    plt.rcParams['font.size'] = 10
+
+
+apply_style()
+
+
+def _save(path, dpi):
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    plt.close()
+
+
+# 1. Accuracy visualizations
+
+def accuracy_histogram(path, dpi, participant_accuracy, mean_accuracy):
+    """Histogram of participant accuracy"""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.hist(participant_accuracy, bins=10, edgecolor='black', alpha=0.7)
+    ax.axvline(50, color='red', linestyle='--', label='Chance level (50%)')
+    ax.axvline(mean_accuracy, color='green', linestyle='-',
+               label=f'Mean ({mean_accuracy:.1f}%)')
+    ax.set_xlabel('Accuracy (%)')
+    ax.set_ylabel('Number of Participants')
+    ax.set_title('Distribution of Participant Accuracy')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    _save(path, dpi)
+
+
+def accuracy_boxplot(path, dpi, participant_accuracy):
+    """Box plot of accuracy"""
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.boxplot([participant_accuracy], labels=['Participants'])
+    ax.axhline(50, color='red', linestyle='--', label='Chance level')
+    ax.set_ylabel('Accuracy (%)')
+    ax.set_title('Accuracy Distribution (Box Plot)')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    _save(path, dpi)
+
+
+def accuracy_by_origin(path, dpi, ai_accuracy, human_accuracy):
+    """Accuracy by text origin"""
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.bar(['AI-generated', 'Human-written'],
+           [ai_accuracy, human_accuracy],
+           color=['#e74c3c', '#3498db'], alpha=0.7, edgecolor='black')
+    ax.axhline(50, color='red', linestyle='--', label='Chance level')
+    ax.set_ylabel('Accuracy (%)')
+    ax.set_title('Accuracy by Text Origin')
+    ax.legend()
+    ax.grid(True, alpha=0.3, axis='y')
+    _save(path, dpi)
+
+
+def confusion_matrix(path, dpi, confusion):
+    """Confusion matrix heatmap"""
+    fig, ax = plt.subplots(figsize=(8, 6))
+    sns.heatmap(confusion, annot=True, fmt='d', cmap='Blues', ax=ax,
+                xticklabels=['AI', 'Human'], yticklabels=['AI', 'Human'])
+    ax.set_xlabel('Classified as')
+    ax.set_ylabel('Actual origin')
+    ax.set_title('Confusion Matrix')
+    _save(path, dpi)
+
+
+# 2. Confidence and Response Time visualizations
+
+def confidence_distribution(path, dpi, confidence):
+    """Confidence distribution"""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.hist(confidence, bins=5, edgecolor='black', alpha=0.7, range=(0.5, 5.5))
+    ax.set_xlabel('Confidence Rating')
+    ax.set_ylabel('Frequency')
+    ax.set_title('Distribution of Confidence Ratings')
+    ax.set_xticks([1, 2, 3, 4, 5])
+    ax.grid(True, alpha=0.3, axis='y')
+    _save(path, dpi)
+
+
+def confidence_by_correctness(path, dpi, correct_conf, incorrect_conf):
+    """Confidence by correctness"""
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.boxplot([correct_conf, incorrect_conf], labels=['Correct', 'Incorrect'])
+    ax.set_ylabel('Confidence Rating')
+    ax.set_title('Confidence by Response Correctness')
+    ax.grid(True, alpha=0.3, axis='y')
+    _save(path, dpi)
+
+
+def response_time_distribution(path, dpi, response_time_sec):
+    """Response time distribution (in seconds)"""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.hist(response_time_sec, bins=20, edgecolor='black', alpha=0.7)
+    ax.set_xlabel('Response Time (seconds)')
+    ax.set_ylabel('Frequency')
+    ax.set_title('Distribution of Response Times')
+    ax.grid(True, alpha=0.3, axis='y')
+    _save(path, dpi)
+
+
+def response_time_by_correctness(path, dpi, correct_time, incorrect_time):
+    """Response time by correctness"""
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.boxplot([correct_time, incorrect_time], labels=['Correct', 'Incorrect'])
+    ax.set_ylabel('Response Time (seconds)')
+    ax.set_title('Response Time by Correctness')
+    ax.grid(True, alpha=0.3, axis='y')
+    _save(path, dpi)
+
+
+# 3. Correlation visualizations
+
+def experience_vs_accuracy(path, dpi, experience, accuracy):
+    """Experience vs Accuracy"""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.scatter(experience, accuracy, s=100, alpha=0.6)
+    ax.axhline(50, color='red', linestyle='--', label='Chance level')
+
+    # Add trend line
+    z = np.polyfit(experience, accuracy, 1)
+    p = np.poly1d(z)
+    ax.plot(experience, p(experience), "r--", alpha=0.5, label='Trend line')
+
+    ax.set_xlabel('Teaching Experience (years)')
+    ax.set_ylabel('Accuracy (%)')
+    ax.set_title('Teaching Experience vs. Accuracy')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    _save(path, dpi)
+
+
+def confidence_vs_accuracy(path, dpi, confidence, accuracy):
+    """Confidence vs Accuracy"""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.scatter(confidence, accuracy, s=100, alpha=0.6)
+    ax.axhline(50, color='red', linestyle='--', label='Chance level')
+    ax.set_xlabel('Mean Confidence Rating')
+    ax.set_ylabel('Accuracy (%)')
+    ax.set_title('Confidence vs. Accuracy')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    _save(path, dpi)
+
+
+# 4. Text-level analysis (using text ID only)
+
+def accuracy_by_text(path, dpi, accuracy, text_ids, origins):
+    """Classification accuracy per text, sorted by accuracy"""
+    fig, ax = plt.subplots(figsize=(12, 8))
+
+    colors = ['#e74c3c' if origin == 'ai' else '#3498db' for origin in origins]
+
+    ax.barh(range(len(accuracy)), accuracy,
+            color=colors, alpha=0.7, edgecolor='black')
+    ax.axvline(50, color='red', linestyle='--', label='Chance level')
+    ax.set_yticks(range(len(accuracy)))
+    # Use text ID instead of title
+    ax.set_yticklabels([f"Text {text_id}" for text_id in text_ids])
+    ax.set_xlabel('Accuracy (%)')
+    ax.set_title('Classification Accuracy by Text')
+
+    # Custom legend
+    legend_elements = [Patch(facecolor='#e74c3c', alpha=0.7, label='AI-generated'),
+                       Patch(facecolor='#3498db', alpha=0.7, label='Human-written'),
+                       plt.Line2D([0], [0], color='red', linestyle='--', label='Chance level')]
+    ax.legend(handles=legend_elements, loc='lower right')
+    ax.grid(True, alpha=0.3, axis='x')
+    _save(path, dpi)
+
+
+def figure_tasks(agg):
+    """Return (name, render function, arrays) for every figure, in report order"""
+    participant_accuracy = agg.participant_accuracy.to_numpy()
+    participant_data = agg.per_participant
+    text_stats = agg.per_text['correct'].mul(100).sort_values()
+
+    return [
+        ('accuracy/histogram', accuracy_histogram, {
+            'participant_accuracy': participant_accuracy,
+            'mean_accuracy': agg.participant_accuracy.mean(),
+        }),
+        ('accuracy/boxplot', accuracy_boxplot, {
+            'participant_accuracy': participant_accuracy,
+        }),
+        ('accuracy/by_origin', accuracy_by_origin, {
+            'ai_accuracy': agg.per_origin.loc['ai', 'accuracy'],
+            'human_accuracy': agg.per_origin.loc['human', 'accuracy'],
+        }),
+        ('accuracy/confusion_matrix', confusion_matrix, {
+            'confusion': agg.confusion,
+        }),
+        ('confidence_time/confidence_distribution', confidence_distribution, {
+            'confidence': agg.df['confidence'].to_numpy(),
+        }),
+        ('confidence_time/confidence_by_correctness', confidence_by_correctness, {
+            'correct_conf': agg.correct['confidence'].to_numpy(),
+            'incorrect_conf': agg.incorrect['confidence'].to_numpy(),
+        }),
+        ('confidence_time/response_time_distribution', response_time_distribution, {
+            'response_time_sec': agg.df['response_time_sec'].to_numpy(),
+        }),
+        ('confidence_time/response_time_by_correctness', response_time_by_correctness, {
+            'correct_time': agg.correct['response_time_sec'].to_numpy(),
+            'incorrect_time': agg.incorrect['response_time_sec'].to_numpy(),
+        }),
+        ('correlations/experience_vs_accuracy', experience_vs_accuracy, {
+            'experience': participant_data['participant__experience'].to_numpy(),
+            'accuracy': participant_data['accuracy'].to_numpy(),
+        }),
+        ('correlations/confidence_vs_accuracy', confidence_vs_accuracy, {
+            'confidence': participant_data['confidence'].to_numpy(),
+            'accuracy': participant_data['accuracy'].to_numpy(),
+        }),
+        ('by_text/accuracy_by_text', accuracy_by_text, {
+            'accuracy': text_stats.to_numpy(),
+            'text_ids': text_stats.index.get_level_values('text__id').to_numpy(),
+            'origins': np.asarray(text_stats.index.get_level_values('text__origin')),
+        }),
+    ]
+
+
+def _render(render, path, dpi, arrays):
+    render(path, dpi, **arrays)
+    return path
+
+
+def render_all(tasks, output_dir, workers=1, dpi=300, format='png'):
+    """Render the tasks into output_dir and return the relative file names in task order"""
+    names = [f"{name}.{format}" for name, _, _ in tasks]
+    jobs = [(render, output_dir / name, dpi, arrays)
+            for name, (_, render, arrays) in zip(names, tasks)]
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        for job in jobs:
+            _render(*job)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=apply_style) as pool:
+            # list() re-raises the first exception of a worker
+            list(pool.map(_render, *zip(*jobs)))
+    return names
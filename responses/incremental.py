@@ -0,0 +1,94 @@
+"""Incremental analysis mode.
+
+``python script.py data.csv --incremental`` writes into a fixed
+``analysis_<name>/`` directory and keeps a state file there with the hashes
+of all rows seen so far, the sufficient statistics (see ``aggregates.py``)
+and a fingerprint of the inputs of every figure. On the next run only the
+rows with unknown hashes are aggregated and folded into the statistics,
+and only the figures whose inputs changed are rendered again. If rows were
+changed or removed since the last run, the statistics are rebuilt.
+"""
+
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from aggregates import merge_statistics, sufficient_statistics
+from loading import DTYPES
+
+STATE_VERSION = 2
+STATE_FILE = '.analysis_state.pkl'
+
+
+def row_hashes(df):
+    """One 64-bit hash per response row"""
+    columns = [column for column in DTYPES if column in df.columns]
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def load_state(output_dir):
+    try:
+        with open(output_dir / STATE_FILE, 'rb') as f:
+            state = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+    if not isinstance(state, dict) or state.get('version') != STATE_VERSION:
+        return None
+    return state
+
+
+def save_state(output_dir, hashes, stats, figures):
+    state = {'version': STATE_VERSION, 'hashes': hashes, 'stats': stats, 'figures': figures}
+    path = output_dir / STATE_FILE
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def update_statistics(df, state):
+    """Return (statistics, row hashes, number of rows aggregated in this run)"""
+    hashes = row_hashes(df)
+    if state is not None:
+        known = np.isin(hashes, state['hashes'])
+        # Nur angehängt, wenn alle bisherigen Zeilen noch genau einmal da sind
+        if known.sum() == len(state['hashes']):
+            new_rows = df[~known]
+            if len(new_rows) == 0:
+                return state['stats'], hashes, 0
+            stats = merge_statistics(state['stats'], sufficient_statistics(new_rows))
+            return stats, hashes, len(new_rows)
+    return sufficient_statistics(df), hashes, len(df)
+
+
+def fingerprint(render, arrays, dpi, format):
+    """Hash of everything a figure is drawn from"""
+    digest = hashlib.sha1(f"{render.__name__}:{dpi}:{format}".encode())
+    for key in sorted(arrays):
+        value = arrays[key]
+        if isinstance(value, pd.DataFrame):
+            value = value.to_numpy()
+        value = np.asarray(value)
+        digest.update(key.encode())
+        if value.dtype == object:
+            digest.update(repr(value.tolist()).encode())
+        else:
+            digest.update(f"{value.dtype}{value.shape}".encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+    return digest.hexdigest()
+
+
+def stale_tasks(tasks, previous, output_dir, dpi, format):
+    """Return the tasks whose inputs changed and the fingerprints of all tasks"""
+    fingerprints = {}
+    stale = []
+    for task in tasks:
+        name, render, arrays = task
+        fingerprints[name] = fingerprint(render, arrays, dpi, format)
+        exists = (output_dir / f"{name}.{format}").exists()
+        if previous.get(name) != fingerprints[name] or not exists:
+            stale.append(task)
+    return stale, fingerprints
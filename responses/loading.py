@@ -0,0 +1,114 @@
+"""Typed loading of the exported responses.
+
+Every column gets an explicit dtype instead of being inferred: categoricals
+for the repeated strings (``text__origin`` and ``classification`` share one
+categorical type so they can be compared directly), small integer widths
+for the Likert ratings and positions. CSV files are parsed with pyarrow if
+it is installed, and a binary copy is kept next to the CSV
+(``<name>.csv.cache.feather``, or ``.pkl`` without pyarrow) that is used
+as long as it is newer than the CSV.
+
+Parquet/Feather/Arrow files (``manage.py export_responses``) are read
+directly. ``read_texts`` reads the texts export (``manage.py
+export_texts``) the same way, without a binary copy.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+ORIGIN_DTYPE = CategoricalDtype(["ai", "human"])
+
+DTYPES = {
+    "participant__id": "int64",
+    "participant__name": "category",
+    "participant__experience": "uint16",
+    "participant__department": "category",
+    "text__id": "int64",
+    "text__title": "category",
+    "text__origin": ORIGIN_DTYPE,
+    "classification": ORIGIN_DTYPE,
+    "confidence": "uint8",
+    "response_time": "uint32",
+    "index": "uint16",
+}
+
+TEXT_DTYPES = {
+    "text__id": "int64",
+    "text__origin": ORIGIN_DTYPE,
+}
+
+try:
+    import pyarrow  # noqa: F401
+
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def read_responses(filepath, use_cache=True):
+    """Read a CSV, Parquet or Feather export into a typed DataFrame"""
+    path = Path(filepath)
+    suffix = path.suffix.lower()
+
+    if suffix == ".parquet":
+        df = pd.read_parquet(path)
+    elif suffix in (".feather", ".arrow"):
+        df = pd.read_feather(path)
+    elif use_cache:
+        df = _read_csv_cached(path)
+    else:
+        df = read_csv(path)
+
+    return apply_dtypes(df)
+
+
+def read_texts(filepath):
+    """Read a CSV, Parquet or Feather export of the texts"""
+    path = Path(filepath)
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        df = pd.read_parquet(path)
+    elif suffix in (".feather", ".arrow"):
+        df = pd.read_feather(path)
+    else:
+        df = pd.read_csv(path, dtype={"content_hash": "string"}, keep_default_na=False)
+    dtypes = {column: dtype for column, dtype in TEXT_DTYPES.items() if column in df.columns}
+    return df.astype(dtypes)
+
+
+def read_csv(path):
+    """Parse a CSV export with explicit dtypes"""
+    engine = "pyarrow" if HAS_PYARROW else "c"
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {column: dtype for column, dtype in DTYPES.items() if column in header}
+    return pd.read_csv(path, dtype=dtypes, engine=engine)
+
+
+def apply_dtypes(df):
+    """Cast the known columns to their dtypes (no-op for columns already typed)"""
+    dtypes = {column: dtype for column, dtype in DTYPES.items() if column in df.columns}
+    return df.astype(dtypes)
+
+
+def cache_path(path):
+    suffix = ".cache.feather" if HAS_PYARROW else ".cache.pkl"
+    return path.with_name(path.name + suffix)
+
+
+def _read_csv_cached(path):
+    cache = cache_path(path)
+    if cache.exists() and cache.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+        return pd.read_feather(cache) if HAS_PYARROW else pd.read_pickle(cache)
+
+    df = read_csv(path)
+    try:
+        if HAS_PYARROW:
+            df.to_feather(cache)
+        else:
+            df.to_pickle(cache)
+    except OSError:
+        # Schreibgeschützter Ordner: dann eben ohne Cache
+        pass
+    return df
@@ -0,0 +1,143 @@
+"""Bootstrap confidence intervals and permutation tests.
+
+Participants are the resampling unit. A chunk of ``B`` bootstrap samples is
+one ``(B x participants)`` index matrix; every statistic is computed from
+the per-participant arrays indexed with it, without a Python loop over
+resamples. Chunks are sized to bound memory, each chunk gets its own child
+of one ``SeedSequence`` (the result depends on the seed only, not on the
+number of workers), and chunks can be spread over processes.
+
+The permutation test for H0 (mean accuracy = 50%) flips the sign of each
+participant's deviation from chance. With few participants all ``2^n``
+sign patterns are enumerated (exact p-value), otherwise they are sampled.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Elemente pro Index-Matrix, ca. 16 MB als float64
+CHUNK_ELEMENTS = 2_000_000
+EXACT_LIMIT = 20
+
+
+def _chunks(total, chunk_size):
+    sizes = [chunk_size] * (total // chunk_size)
+    if total % chunk_size:
+        sizes.append(total % chunk_size)
+    return sizes
+
+
+def _chunk_size(participants):
+    return max(1, CHUNK_ELEMENTS // max(participants, 1))
+
+
+def _map(function, jobs, workers):
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return [function(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(function, *zip(*jobs)))
+
+
+# Statistics: ``data`` holds per-participant arrays resampled to (B x n)
+
+def mean_accuracy(data):
+    return data['accuracy'].mean(axis=1)
+
+
+def cohens_d(data, chance=50):
+    accuracy = data['accuracy']
+    return (accuracy.mean(axis=1) - chance) / accuracy.std(axis=1, ddof=1)
+
+
+def sensitivity(data):
+    return data['ai_correct'].sum(axis=1) / data['ai_n'].sum(axis=1) * 100
+
+
+def specificity(data):
+    return data['human_correct'].sum(axis=1) / data['human_n'].sum(axis=1) * 100
+
+
+STATISTICS = {
+    'Mean accuracy (%)': mean_accuracy,
+    "Cohen's d": cohens_d,
+    'Sensitivity (%)': sensitivity,
+    'Specificity (%)': specificity,
+}
+
+
+def _bootstrap_chunk(arrays, size, seed):
+    rng = np.random.default_rng(seed)
+    participants = len(next(iter(arrays.values())))
+    index = rng.integers(0, participants, size=(size, participants))
+    data = {name: values[index] for name, values in arrays.items()}
+    return {name: statistic(data) for name, statistic in STATISTICS.items()}
+
+
+def bootstrap(arrays, n_resamples=10000, seed=0, workers=1, chunk_size=None):
+    """Bootstrap distributions of all STATISTICS, as {name: array of n_resamples}"""
+    participants = len(next(iter(arrays.values())))
+    sizes = _chunks(n_resamples, chunk_size or _chunk_size(participants))
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    results = _map(_bootstrap_chunk, [(arrays, size, s) for size, s in zip(sizes, seeds)], workers)
+    return {name: np.concatenate([result[name] for result in results]) for name in STATISTICS}
+
+
+def percentile_ci(distribution, level=0.95):
+    alpha = (1 - level) / 2
+    distribution = distribution[np.isfinite(distribution)]
+    return tuple(np.quantile(distribution, [alpha, 1 - alpha]))
+
+
+def _exact_chunk(deviations, start, stop):
+    # Bit k von i entscheidet über das Vorzeichen von Teilnehmer k
+    patterns = np.arange(start, stop, dtype=np.int64)[:, None]
+    signs = 1 - 2 * ((patterns >> np.arange(len(deviations))) & 1)
+    return signs @ deviations
+
+
+def _monte_carlo_chunk(deviations, size, seed):
+    rng = np.random.default_rng(seed)
+    signs = rng.choice(np.array([-1.0, 1.0]), size=(size, len(deviations)))
+    return signs @ deviations
+
+
+def sign_flip_test(accuracy, chance=50, n_resamples=10000, seed=0, workers=1, chunk_size=None):
+    """Two-sided permutation p-value for mean(accuracy) == chance.
+
+    Returns (p-value, number of permutations, exact).
+    """
+    deviations = np.asarray(accuracy, dtype=float) - chance
+    observed = abs(deviations.sum())
+    # Toleranz gegen Rundungsfehler bei gleich großen Summen
+    tolerance = 1e-9 * max(1.0, np.abs(deviations).sum())
+    participants = len(deviations)
+    chunk_size = chunk_size or _chunk_size(participants)
+
+    if participants <= EXACT_LIMIT:
+        total = 2 ** participants
+        bounds = range(0, total, chunk_size)
+        jobs = [(deviations, start, min(start + chunk_size, total)) for start in bounds]
+        sums = _map(_exact_chunk, jobs, workers)
+        extreme = sum(int((np.abs(s) >= observed - tolerance).sum()) for s in sums)
+        return extreme / total, total, True
+
+    sizes = _chunks(n_resamples, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    sums = _map(_monte_carlo_chunk, [(deviations, size, s) for size, s in zip(sizes, seeds)], workers)
+    extreme = sum(int((np.abs(s) >= observed - tolerance).sum()) for s in sums)
+    return (extreme + 1) / (n_resamples + 1), n_resamples, False
+
+
+def participant_arrays(agg):
+    """Per-participant arrays the statistics are computed from"""
+    counts = agg.per_participant_origin
+    return {
+        'accuracy': agg.participant_accuracy.to_numpy(dtype=float),
+        'ai_correct': counts[('correct', 'ai')].to_numpy(dtype=float),
+        'ai_n': counts[('n', 'ai')].to_numpy(dtype=float),
+        'human_correct': counts[('correct', 'human')].to_numpy(dtype=float),
+        'human_n': counts[('n', 'human')].to_numpy(dtype=float),
+    }
@@ -1,7 +1,6 @@
+import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from scipy import stats
 from scipy.stats import ttest_1samp, pearsonr, spearmanr, chi2_contingency
 import sys
@@ -9,6 +8,14 @@ import os
 from datetime import datetime
 from pathlib import Path
 
+from aggregates import Aggregates
+from features import cache_path as features_cache_path, profile_contrast, regress, text_features
+from figures import figure_tasks, render_all
+from incremental import load_state, save_state, stale_tasks, update_statistics
+from irt import VARIANCE_FLOOR, fit_rasch
+from loading import read_responses, read_texts
+from resampling import STATISTICS, bootstrap, participant_arrays, percentile_ci, sign_flip_test
+
 """
 To run:
 python -m venv .venv
@@ -16,14 +23,13 @@ source .venv/bin/activate  #unix
 .venv\Scripts\activate #windows
 cd responses
 pip install pandas numpy matplotlib seaborn scipy
+pip install pyarrow  # optional: faster loading, Parquet/Feather input
 python ./script.py path_to_your_data.csv
+python ./script.py path_to_your_data.csv --workers 4 --dpi 150 --format pdf
+python ./script.py path_to_your_data.csv --resamples 100000 --seed 1
+python ./script.py path_to_your_data.csv --texts texts.csv  # manage.py export_texts texts.csv
 """
 
-# Set style for better-looking plots
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (12, 8)
-plt.rcParams['font.size'] = 10
-
 # Global variables
 output_file = None
 output_dir = None
@@ -34,7 +40,7 @@ def print_and_log(text="", console_only=False):
     if output_file and not console_only:
         output_file.write(text + "\n")
 
-def create_output_structure(csv_filepath):
+def create_output_structure(csv_filepath, incremental=False):
     """Create output directory structure based on CSV filename"""
     global output_dir
     
@@ -42,8 +48,11 @@ def create_output_structure(csv_filepath):
     csv_name = Path(csv_filepath).stem
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
-    # Create main output directory
-    output_dir = Path(f"analysis_{csv_name}_{timestamp}")
+    # Create main output directory (fixed name in incremental mode, reused between runs)
+    if incremental:
+        output_dir = Path(f"analysis_{csv_name}")
+    else:
+        output_dir = Path(f"analysis_{csv_name}_{timestamp}")
     output_dir.mkdir(exist_ok=True)
     
     # Create subdirectories
@@ -54,11 +63,11 @@ def create_output_structure(csv_filepath):
     return output_dir
 
 def load_data(filepath):
-    """Load and prepare the data"""
-    df = pd.read_csv(filepath)
+    """Load and prepare the data (CSV, Parquet or Feather)"""
+    df = read_responses(filepath)
     
     # Add a column for correctness
-    df['correct'] = (df['classification'] == df['text__origin']).astype(int)
+    df['correct'] = (df['classification'] == df['text__origin']).astype('uint8')
     
     return df
 
@@ -85,10 +94,11 @@ def export_text_mapping(df):
     for _, row in text_mapping.iterrows():
         print(f"Text {row['text__id']}: {row['text__title']}")
 
-def descriptive_statistics(df):
+def descriptive_statistics(agg):
     """Calculate and display descriptive statistics"""
+    df = agg.df
     # Participant information
-    participants = df.groupby('participant__id').first()
+    participants = agg.per_participant
     
     print_and_log(f"**Number of participants:** {len(participants)}\n")
     
@@ -104,9 +114,9 @@ def descriptive_statistics(df):
     
     # Text information
     print_and_log("### Text Information\n")
-    print_and_log(f"- **Total number of texts:** {df['text__id'].nunique()}")
-    print_and_log(f"- **AI-generated texts:** {df[df['text__origin'] == 'ai']['text__id'].nunique()}")
-    print_and_log(f"- **Human-written texts:** {df[df['text__origin'] == 'human']['text__id'].nunique()}\n")
+    print_and_log(f"- **Total number of texts:** {len(agg.per_text)}")
+    print_and_log(f"- **AI-generated texts:** {agg.per_origin.loc['ai', 'texts']}")
+    print_and_log(f"- **Human-written texts:** {agg.per_origin.loc['human', 'texts']}\n")
     
     # Response information
     print_and_log("### Response Information\n")
@@ -121,21 +131,20 @@ def descriptive_statistics(df):
     print_and_log(f"- **Median:** {df['confidence'].median():.0f}")
     print_and_log(f"- **Range:** {df['confidence'].min():.0f} - {df['confidence'].max():.0f}\n")
     
-    # Response times (convert from ms to seconds)
-    df['response_time_sec'] = df['response_time'] / 1000
+    # Response times (in seconds)
     print_and_log("### Response Times\n")
     print_and_log(f"- **Mean:** {df['response_time_sec'].mean():.2f} seconds (SD = {df['response_time_sec'].std():.2f})")
     print_and_log(f"- **Median:** {df['response_time_sec'].median():.2f} seconds")
     print_and_log(f"- **Range:** {df['response_time_sec'].min():.2f} - {df['response_time_sec'].max():.2f} seconds\n")
 
-def accuracy_analysis(df):
+def accuracy_analysis(agg):
     """Analyze classification accuracy"""
     # Overall accuracy
-    overall_accuracy = df['correct'].mean() * 100
+    overall_accuracy = agg.df['correct'].mean() * 100
     print_and_log(f"**Overall accuracy:** {overall_accuracy:.2f}%\n")
     
     # Accuracy by participant
-    participant_accuracy = df.groupby('participant__id')['correct'].mean() * 100
+    participant_accuracy = agg.participant_accuracy
     print_and_log("### Participant-Level Accuracy\n")
     print_and_log(f"- **Mean:** {participant_accuracy.mean():.2f}% (SD = {participant_accuracy.std():.2f}%)")
     print_and_log(f"- **Range:** {participant_accuracy.min():.2f}% - {participant_accuracy.max():.2f}%\n")
@@ -143,30 +152,26 @@ def accuracy_analysis(df):
     # Accuracy by text origin
     print_and_log("### Accuracy by Text Origin\n")
     for origin in ['ai', 'human']:
-        origin_df = df[df['text__origin'] == origin]
-        accuracy = origin_df['correct'].mean() * 100
-        print_and_log(f"- **{origin.upper()}-generated:** {accuracy:.2f}% ({origin_df['correct'].sum()}/{len(origin_df)} correct)")
+        accuracy = agg.per_origin.loc[origin, 'accuracy']
+        correct = agg.per_origin.loc[origin, 'correct']
+        responses = agg.per_origin.loc[origin, 'responses']
+        print_and_log(f"- **{origin.upper()}-generated:** {accuracy:.2f}% ({correct}/{responses} correct)")
     print_and_log("")
     
     # Confusion matrix
-    confusion = pd.crosstab(df['text__origin'], df['classification'], margins=True)
+    confusion = agg.confusion
     print_and_log("### Confusion Matrix\n")
     print_and_log("| Actual \\ Classified | AI | Human | Total |")
     print_and_log("|---------------------|----:|------:|------:|")
     
     for idx in confusion.index:
-        if idx == 'All':
-            print_and_log(f"| **Total** | **{confusion.loc[idx, 'ai']}** | **{confusion.loc[idx, 'human']}** | **{confusion.loc[idx, 'All']}** |")
-        else:
-            print_and_log(f"| **{idx.upper()}** | {confusion.loc[idx, 'ai']} | {confusion.loc[idx, 'human']} | {confusion.loc[idx, 'All']} |")
+        print_and_log(f"| **{idx.upper()}** | {confusion.loc[idx, 'ai']} | {confusion.loc[idx, 'human']} | {confusion.loc[idx].sum()} |")
+    print_and_log(f"| **Total** | **{confusion['ai'].sum()}** | **{confusion['human'].sum()}** | **{confusion.values.sum()}** |")
     print_and_log("")
     
-    # Sensitivity and Specificity
-    ai_texts = df[df['text__origin'] == 'ai']
-    human_texts = df[df['text__origin'] == 'human']
-    
-    sensitivity = (ai_texts['classification'] == 'ai').mean() * 100
-    specificity = (human_texts['classification'] == 'human').mean() * 100
+    # Sensitivity and Specificity (= accuracy on AI / human texts)
+    sensitivity = agg.per_origin.loc['ai', 'accuracy']
+    specificity = agg.per_origin.loc['human', 'accuracy']
     
     print_and_log("### Diagnostic Measures\n")
     print_and_log(f"- **Sensitivity (True Positive Rate):** {sensitivity:.2f}%")
@@ -174,8 +179,9 @@ def accuracy_analysis(df):
     
     return participant_accuracy
 
-def hypothesis_testing(df, participant_accuracy):
+def hypothesis_testing(agg, resamples=10000, seed=0, workers=None):
     """Test hypotheses using statistical tests"""
+    participant_accuracy = agg.participant_accuracy
     print_and_log("### Hypotheses\n")
     print_and_log("- **H₀ (Null Hypothesis):** Accuracy = 50% (chance level)")
     print_and_log("- **H₁ (Alternative Hypothesis):** Accuracy ≠ 50%\n")
@@ -215,17 +221,35 @@ def hypothesis_testing(df, participant_accuracy):
     print_and_log("### Effect Size\n")
     print_and_log(f"- **Cohen's d:** {cohens_d:.3f}")
     print_and_log(f"- **Interpretation:** {effect_interpretation} effect\n")
+    
+    if resamples > 0:
+        resampling_tests(agg, resamples, seed, workers)
+
+def resampling_tests(agg, resamples, seed, workers):
+    """Bootstrap confidence intervals and sign-flip permutation test"""
+    arrays = participant_arrays(agg)
+    distributions = bootstrap(arrays, n_resamples=resamples, seed=seed, workers=workers)
+    
+    print_and_log("### Bootstrap and Permutation Tests\n")
+    print_and_log(f"Participants resampled with replacement ({resamples} resamples, seed {seed}).\n")
+    print_and_log("| Measure | Estimate | 95% Bootstrap CI |")
+    print_and_log("|---------|---------:|-----------------:|")
+    for name, statistic in STATISTICS.items():
+        estimate = statistic({key: values[None, :] for key, values in arrays.items()})[0]
+        lower, upper = percentile_ci(distributions[name])
+        print_and_log(f"| {name} | {estimate:.3f} | [{lower:.3f}, {upper:.3f}] |")
+    print_and_log("")
+    
+    p_value, permutations, exact = sign_flip_test(
+        arrays['accuracy'], n_resamples=resamples, seed=seed, workers=workers
+    )
+    kind = "exact" if exact else "Monte Carlo"
+    print_and_log(f"- **Sign-flip permutation test (H₀: accuracy = 50%):** p = {p_value:.4f} "
+                  f"({kind}, {permutations} sign patterns)\n")
 
-def correlation_analysis(df):
+def correlation_analysis(agg):
     """Analyze correlations between variables"""
-    # Aggregate by participant
-    participant_data = df.groupby('participant__id').agg({
-        'correct': 'mean',
-        'confidence': 'mean',
-        'response_time': 'mean',
-        'participant__experience': 'first'
-    })
-    participant_data['accuracy'] = participant_data['correct'] * 100
+    participant_data = agg.per_participant
     
     print_and_log("### Participant-Level Correlations\n")
     
@@ -248,26 +272,22 @@ def correlation_analysis(df):
     print_and_log("### Response-Level Analysis\n")
     print_and_log("**Confidence by Correctness:**\n")
     
-    correct_conf = df[df['correct'] == 1]['confidence'].mean()
-    incorrect_conf = df[df['correct'] == 0]['confidence'].mean()
-    correct_sd = df[df['correct'] == 1]['confidence'].std()
-    incorrect_sd = df[df['correct'] == 0]['confidence'].std()
+    correct_conf = agg.correct['confidence'].mean()
+    incorrect_conf = agg.incorrect['confidence'].mean()
+    correct_sd = agg.correct['confidence'].std()
+    incorrect_sd = agg.incorrect['confidence'].std()
     
     print_and_log(f"- **Correct responses:** M = {correct_conf:.2f} (SD = {correct_sd:.2f})")
     print_and_log(f"- **Incorrect responses:** M = {incorrect_conf:.2f} (SD = {incorrect_sd:.2f})\n")
     
-    t_stat, p_value = stats.ttest_ind(df[df['correct'] == 1]['confidence'], 
-                                       df[df['correct'] == 0]['confidence'])
+    t_stat, p_value = stats.ttest_ind(agg.correct['confidence'], 
+                                       agg.incorrect['confidence'])
     print_and_log(f"**Independent t-test:** t = {t_stat:.3f}, p = {p_value:.4f}\n")
 
-def text_difficulty_analysis(df):
+def text_difficulty_analysis(agg):
     """Analyze which texts were most difficult to classify"""
     # Use only text ID, not title
-    text_stats = df.groupby(['text__id', 'text__origin']).agg({
-        'correct': 'mean',
-        'confidence': 'mean',
-        'response_time': 'mean'
-    }).round(2)
+    text_stats = agg.per_text.round(2)
     text_stats['accuracy'] = (text_stats['correct'] * 100).round(1)
     text_stats = text_stats.sort_values('accuracy')
     
@@ -279,216 +299,149 @@ def text_difficulty_analysis(df):
         print_and_log(f"| {text_id} | {origin.upper()} | {row['accuracy']:.1f} | {row['confidence']:.2f} | {row['response_time']:.0f} |")
     print_and_log("")
 
-def create_visualizations(df, participant_accuracy):
-    """Create all necessary visualizations"""
-    print_and_log("Generating visualizations...\n")
+def item_response_model(agg):
+    """Fit the crossed random-effects (Rasch) model"""
+    model = fit_rasch(agg.df)
+    difficulties = model['difficulties'].sort_values('difficulty', ascending=False)
+    abilities = model['abilities']
+    
+    print_and_log("Crossed random-effects logistic model (Rasch model) over all responses:\n")
+    print_and_log("$$\\text{logit}\\,P(\\text{correct}_{ij}) = \\mu + \\theta_i - b_j$$\n")
+    print_and_log(f"- **Participants:** {len(abilities)}, **texts:** {len(difficulties)}, "
+                  f"**participant × text cells:** {model['cells']}")
+    status = "converged" if model['converged'] else "NOT converged"
+    print_and_log(f"- **Fit:** {status} after {model['iterations']} variance updates "
+                  f"({model['newton_iterations']} Newton steps)\n")
+    
+    print_and_log("### Model Estimates\n")
+    print_and_log(f"- **Intercept μ:** {model['intercept']:.3f} (SE = {model['intercept_se']:.3f})")
+    for label, key in [("participant ability θ", 'var_ability'), ("text difficulty b", 'var_difficulty')]:
+        boundary = " (lower bound, no detectable variance)" if model[key] <= VARIANCE_FLOOR else ""
+        print_and_log(f"- **SD of {label}:** {np.sqrt(model[key]):.3f}{boundary}")
+    print_and_log("")
+    
+    print_and_log("### Text Difficulties\n")
+    print_and_log("Texts ranked by difficulty (logit scale, hardest first):\n")
+    print_and_log("| Text ID | Origin | Difficulty | SE | 95% CI | Responses |")
+    print_and_log("|--------:|:-------|-----------:|---:|-------:|----------:|")
+    for text_id, row in difficulties.iterrows():
+        lower, upper = row['difficulty'] - 1.96 * row['se'], row['difficulty'] + 1.96 * row['se']
+        print_and_log(f"| {text_id} | {row['text__origin'].upper()} | {row['difficulty']:.3f} | "
+                      f"{row['se']:.3f} | [{lower:.2f}, {upper:.2f}] | {row['responses']} |")
+    print_and_log("")
     
-    # 1. Accuracy visualizations
-    # Histogram of participant accuracy
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.hist(participant_accuracy, bins=10, edgecolor='black', alpha=0.7)
-    ax.axvline(50, color='red', linestyle='--', label='Chance level (50%)')
-    ax.axvline(participant_accuracy.mean(), color='green', linestyle='-', 
-               label=f'Mean ({participant_accuracy.mean():.1f}%)')
-    ax.set_xlabel('Accuracy (%)')
-    ax.set_ylabel('Number of Participants')
-    ax.set_title('Distribution of Participant Accuracy')
-    ax.legend()
-    ax.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(output_dir / 'accuracy' / 'histogram.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print_and_log("- ✓ `accuracy/histogram.png`")
-    
-    # Box plot of accuracy
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.boxplot([participant_accuracy], labels=['Participants'])
-    ax.axhline(50, color='red', linestyle='--', label='Chance level')
-    ax.set_ylabel('Accuracy (%)')
-    ax.set_title('Accuracy Distribution (Box Plot)')
-    ax.legend()
-    ax.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(output_dir / 'accuracy' / 'boxplot.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print_and_log("- ✓ `accuracy/boxplot.png`")
+    print_and_log("### Participant Abilities\n")
+    print_and_log(f"- **Mean SE:** {abilities['se'].mean():.3f}")
+    print_and_log(f"- **Range:** [{abilities['ability'].min():.3f}, {abilities['ability'].max():.3f}]")
+    experience = agg.per_participant['participant__experience'].reindex(abilities.index)
+    r_exp, p_exp = pearsonr(abilities['ability'], experience)
+    print_and_log(f"- **Ability vs. Teaching Experience:** Pearson r = {r_exp:.3f}, p = {p_exp:.4f}")
+    abilities.to_csv(output_dir / 'participant_abilities.csv')
+    print_and_log("- Estimates per participant: `participant_abilities.csv`\n")
     
-    # Accuracy by text origin
-    fig, ax = plt.subplots(figsize=(8, 6))
-    origin_accuracy = df.groupby('text__origin')['correct'].mean() * 100
-    ax.bar(['AI-generated', 'Human-written'], 
-           [origin_accuracy['ai'], origin_accuracy['human']], 
-           color=['#e74c3c', '#3498db'], alpha=0.7, edgecolor='black')
-    ax.axhline(50, color='red', linestyle='--', label='Chance level')
-    ax.set_ylabel('Accuracy (%)')
-    ax.set_title('Accuracy by Text Origin')
-    ax.legend()
-    ax.grid(True, alpha=0.3, axis='y')
-    plt.tight_layout()
-    plt.savefig(output_dir / 'accuracy' / 'by_origin.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print_and_log("- ✓ `accuracy/by_origin.png`")
-    
-    # Confusion matrix heatmap
-    fig, ax = plt.subplots(figsize=(8, 6))
-    confusion = pd.crosstab(df['text__origin'], df['classification'])
-    sns.heatmap(confusion, annot=True, fmt='d', cmap='Blues', ax=ax,
-                xticklabels=['AI', 'Human'], yticklabels=['AI', 'Human'])
-    ax.set_xlabel('Classified as')
-    ax.set_ylabel('Actual origin')
-    ax.set_title('Confusion Matrix')
-    plt.tight_layout()
-    plt.savefig(output_dir / 'accuracy' / 'confusion_matrix.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print_and_log("- ✓ `accuracy/confusion_matrix.png`")
-    
-    # 2. Confidence and Response Time visualizations
-    # Confidence distribution
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.hist(df['confidence'], bins=5, edgecolor='black', alpha=0.7, range=(0.5, 5.5))
-    ax.set_xlabel('Confidence Rating')
-    ax.set_ylabel('Frequency')
-    ax.set_title('Distribution of Confidence Ratings')
-    ax.set_xticks([1, 2, 3, 4, 5])
-    ax.grid(True, alpha=0.3, axis='y')
-    plt.tight_layout()
-    plt.savefig(output_dir / 'confidence_time' / 'confidence_distribution.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print_and_log("- ✓ `confidence_time/confidence_distribution.png`")
-    
-    # Confidence by correctness
-    fig, ax = plt.subplots(figsize=(8, 6))
-    correct_conf = df[df['correct'] == 1]['confidence']
-    incorrect_conf = df[df['correct'] == 0]['confidence']
-    ax.boxplot([correct_conf, incorrect_conf], labels=['Correct', 'Incorrect'])
-    ax.set_ylabel('Confidence Rating')
-    ax.set_title('Confidence by Response Correctness')
-    ax.grid(True, alpha=0.3, axis='y')
-    plt.tight_layout()
-    plt.savefig(output_dir / 'confidence_time' / 'confidence_by_correctness.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print_and_log("- ✓ `confidence_time/confidence_by_correctness.png`")
-    
-    # Response time distribution (in seconds)
-    df['response_time_sec'] = df['response_time'] / 1000
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.hist(df['response_time_sec'], bins=20, edgecolor='black', alpha=0.7)
-    ax.set_xlabel('Response Time (seconds)')
-    ax.set_ylabel('Frequency')
-    ax.set_title('Distribution of Response Times')
-    ax.grid(True, alpha=0.3, axis='y')
-    plt.tight_layout()
-    plt.savefig(output_dir / 'confidence_time' / 'response_time_distribution.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print_and_log("- ✓ `confidence_time/response_time_distribution.png`")
-    
-    # Response time by correctness
-    fig, ax = plt.subplots(figsize=(8, 6))
-    correct_time = df[df['correct'] == 1]['response_time_sec']
-    incorrect_time = df[df['correct'] == 0]['response_time_sec']
-    ax.boxplot([correct_time, incorrect_time], labels=['Correct', 'Incorrect'])
-    ax.set_ylabel('Response Time (seconds)')
-    ax.set_title('Response Time by Correctness')
-    ax.grid(True, alpha=0.3, axis='y')
-    plt.tight_layout()
-    plt.savefig(output_dir / 'confidence_time' / 'response_time_by_correctness.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print_and_log("- ✓ `confidence_time/response_time_by_correctness.png`")
-    
-    # 3. Correlation visualizations
-    participant_data = df.groupby('participant__id').agg({
-        'correct': 'mean',
-        'participant__experience': 'first',
-        'confidence': 'mean'
-    })
-    participant_data['accuracy'] = participant_data['correct'] * 100
-    
-    # Experience vs Accuracy
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.scatter(participant_data['participant__experience'], 
-               participant_data['accuracy'], s=100, alpha=0.6)
-    ax.axhline(50, color='red', linestyle='--', label='Chance level')
-    
-    # Add trend line
-    z = np.polyfit(participant_data['participant__experience'], 
-                   participant_data['accuracy'], 1)
-    p = np.poly1d(z)
-    ax.plot(participant_data['participant__experience'], 
-            p(participant_data['participant__experience']), 
-            "r--", alpha=0.5, label='Trend line')
-    
-    ax.set_xlabel('Teaching Experience (years)')
-    ax.set_ylabel('Accuracy (%)')
-    ax.set_title('Teaching Experience vs. Accuracy')
-    ax.legend()
-    ax.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(output_dir / 'correlations' / 'experience_vs_accuracy.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print_and_log("- ✓ `correlations/experience_vs_accuracy.png`")
-    
-    # Confidence vs Accuracy
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.scatter(participant_data['confidence'], 
-               participant_data['accuracy'], s=100, alpha=0.6)
-    ax.axhline(50, color='red', linestyle='--', label='Chance level')
-    ax.set_xlabel('Mean Confidence Rating')
-    ax.set_ylabel('Accuracy (%)')
-    ax.set_title('Confidence vs. Accuracy')
-    ax.legend()
-    ax.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(output_dir / 'correlations' / 'confidence_vs_accuracy.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print_and_log("- ✓ `correlations/confidence_vs_accuracy.png`")
-    
-    # 4. Text-level analysis (using text ID only)
-    fig, ax = plt.subplots(figsize=(12, 8))
-    
-    text_stats = df.groupby(['text__id', 'text__origin']).agg({
-        'correct': 'mean'
+    return model
+
+def text_feature_analysis(agg, model, texts_path):
+    """Relate features of the texts to their difficulty"""
+    if texts_path is None:
+        print_and_log("Skipped: no texts given. Export them with `python manage.py export_texts texts.csv` "
+                      "and pass `--texts texts.csv`.\n")
+        return
+    
+    per_text = agg.per_text.reset_index('text__origin')
+    texts = read_texts(texts_path)
+    texts = texts[texts['text__id'].isin(per_text.index)].drop_duplicates('text__id')
+    if len(texts) < len(per_text):
+        print_and_log(f"**Note:** {len(per_text) - len(texts)} text(s) with responses are missing "
+                      f"from `{Path(texts_path).name}` and left out.\n")
+    
+    features, ngrams, extracted = text_features(texts, cache=features_cache_path(texts_path))
+    print_and_log(f"(features extracted for {extracted} of {len(texts)} texts, the rest cached)",
+                  console_only=True)
+    is_ai = (texts['text__origin'] == 'ai').to_numpy()
+    features['ngram_contrast'] = profile_contrast(ngrams, is_ai)
+    features['ai_generated'] = is_ai.astype(float)
+    
+    per_text = per_text.reindex(features.index)
+    outcomes = pd.DataFrame({
+        'difficulty': model['difficulties']['difficulty'].reindex(features.index),
+        'accuracy': per_text['correct'] * 100,
+        'confidence': per_text['confidence'],
+        'response_time': per_text['response_time'] / 1000,
     })
-    text_stats['accuracy'] = text_stats['correct'] * 100
-    text_stats = text_stats.sort_values('accuracy')
+    features.join(outcomes).to_csv(output_dir / 'text_features.csv')
+    
+    print_and_log("### Features\n")
+    print_and_log("| Feature | Mean (AI) | Mean (Human) | r with Difficulty |")
+    print_and_log("|---------|----------:|-------------:|------------------:|")
+    correlations = features.corrwith(outcomes['difficulty'])
+    for name in features.columns.drop('ai_generated'):
+        print_and_log(f"| {name} | {features.loc[is_ai, name].mean():.3f} | "
+                      f"{features.loc[~is_ai, name].mean():.3f} | {correlations[name]:.3f} |")
+    print_and_log("")
+    
+    fit = regress(features, outcomes)
+    print_and_log("### Regression on Standardized Features\n")
+    if fit is None:
+        print_and_log(f"Skipped: {len(features)} texts are too few for one feature and the origin.\n")
+        return
+    print_and_log(f"Coefficient per SD of each feature, adjusted for AI generation (p-value), "
+                  f"one model per feature with {fit['dof']} residual degrees of freedom:\n")
+    print_and_log("| Feature | Difficulty | Accuracy (%) | Confidence | Response Time (s) |")
+    print_and_log("|---------|-----------:|-------------:|-----------:|------------------:|")
+    for name in fit['coef'].index:
+        cells = [f"{fit['coef'].loc[name, outcome]:.3f} ({fit['p'].loc[name, outcome]:.3f})"
+                 for outcome in outcomes.columns]
+        print_and_log(f"| {name} | " + " | ".join(cells) + " |")
+    print_and_log("")
+    print_and_log("- Features and outcomes per text: `text_features.csv`\n")
+
+def create_visualizations(agg, workers=None, dpi=300, format='png', previous=None):
+    """Create all necessary visualizations
+    
+    With ``previous`` (figure fingerprints of the last incremental run) only
+    figures whose inputs changed are rendered. Returns the new fingerprints.
+    """
+    print_and_log("Generating visualizations...\n")
+    
+    tasks = figure_tasks(agg)
+    names = [f"{name}.{format}" for name, _, _ in tasks]
+    fingerprints = None
+    if previous is not None:
+        tasks, fingerprints = stale_tasks(tasks, previous, output_dir, dpi, format)
+        print_and_log(f"(re-rendering {len(tasks)} of {len(names)} figures)", console_only=True)
+    render_all(tasks, output_dir, workers=workers, dpi=dpi, format=format)
     
-    colors = ['#e74c3c' if origin == 'ai' else '#3498db' 
-              for origin in text_stats.index.get_level_values('text__origin')]
-    
-    bars = ax.barh(range(len(text_stats)), text_stats['accuracy'], 
-                   color=colors, alpha=0.7, edgecolor='black')
-    ax.axvline(50, color='red', linestyle='--', label='Chance level')
-    ax.set_yticks(range(len(text_stats)))
-    # Use text ID instead of title
-    ax.set_yticklabels([f"Text {text_id}" 
-                        for text_id in text_stats.index.get_level_values('text__id')])
-    ax.set_xlabel('Accuracy (%)')
-    ax.set_title('Classification Accuracy by Text')
-    
-    # Custom legend
-    from matplotlib.patches import Patch
-    legend_elements = [Patch(facecolor='#e74c3c', alpha=0.7, label='AI-generated'),
-                       Patch(facecolor='#3498db', alpha=0.7, label='Human-written'),
-                       plt.Line2D([0], [0], color='red', linestyle='--', label='Chance level')]
-    ax.legend(handles=legend_elements, loc='lower right')
-    ax.grid(True, alpha=0.3, axis='x')
-    
-    plt.tight_layout()
-    plt.savefig(output_dir / 'by_text' / 'accuracy_by_text.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print_and_log("- ✓ `by_text/accuracy_by_text.png`\n")
+    for name in names[:-1]:
+        print_and_log(f"- ✓ `{name}`")
+    print_and_log(f"- ✓ `{names[-1]}`\n")
+    
+    return fingerprints
 
 def main():
     """Main analysis function"""
     global output_file, output_dir
     
-    if len(sys.argv) < 2:
-        print("Usage: python script.py <path_to_csv_file>")
-        sys.exit(1)
-    
-    filepath = sys.argv[1]
+    parser = argparse.ArgumentParser(description="AI Text Detection Study - Statistical Analysis")
+    parser.add_argument("filepath", help="CSV, Parquet or Feather export of the responses")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes for rendering the figures (default: number of CPUs)")
+    parser.add_argument("--dpi", type=int, default=300, help="Resolution of the figures")
+    parser.add_argument("--format", default="png", choices=["png", "pdf", "svg", "jpg"],
+                        help="File format of the figures")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reuse analysis_<name>/ and only process rows and figures that changed")
+    parser.add_argument("--resamples", type=int, default=10000,
+                        help="Bootstrap/permutation resamples in the hypothesis section (0 = skip)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the resampling")
+    parser.add_argument("--texts", default=None,
+                        help="Texts export (manage.py export_texts) for the text feature section")
+    args = parser.parse_args()
+    
+    filepath = args.filepath
     
     # Create output directory structure
-    output_dir = create_output_structure(filepath)
+    output_dir = create_output_structure(filepath, incremental=args.incremental)
     
     # Create output log file (now in markdown)
     log_filename = output_dir / "analysis_results.md"
@@ -505,29 +458,52 @@ def main():
         # Export text ID mapping
         export_text_mapping(df)
         
+        # Aggregate once for all sections
+        if args.incremental:
+            state = load_state(output_dir)
+            stats, hashes, new_rows = update_statistics(df, state)
+            print_and_log(f"(incremental: {new_rows} of {len(df)} rows aggregated)", console_only=True)
+            agg = Aggregates(df, stats)
+        else:
+            state = None
+            agg = Aggregates(df)
+        
         # Run analyses
         print_and_log("## 1. Descriptive Statistics\n")
-        descriptive_statistics(df)
+        descriptive_statistics(agg)
         
         print_and_log("---\n")
         print_and_log("## 2. Accuracy Analysis\n")
-        participant_accuracy = accuracy_analysis(df)
+        accuracy_analysis(agg)
         
         print_and_log("---\n")
         print_and_log("## 3. Hypothesis Testing\n")
-        hypothesis_testing(df, participant_accuracy)
+        hypothesis_testing(agg, resamples=args.resamples, seed=args.seed, workers=args.workers)
         
         print_and_log("---\n")
         print_and_log("## 4. Correlation Analysis\n")
-        correlation_analysis(df)
+        correlation_analysis(agg)
         
         print_and_log("---\n")
         print_and_log("## 5. Text Difficulty Analysis\n")
-        text_difficulty_analysis(df)
+        text_difficulty_analysis(agg)
+        
+        print_and_log("---\n")
+        print_and_log("## 6. Item Response Model\n")
+        model = item_response_model(agg)
+        
+        print_and_log("---\n")
+        print_and_log("## 7. Text Features\n")
+        text_feature_analysis(agg, model, args.texts)
         
         print_and_log("---\n")
-        print_and_log("## 6. Visualizations\n")
-        create_visualizations(df, participant_accuracy)
+        print_and_log("## 8. Visualizations\n")
+        figures = create_visualizations(
+            agg, workers=args.workers, dpi=args.dpi, format=args.format,
+            previous=(state or {}).get('figures', {}) if args.incremental else None,
+        )
+        if args.incremental:
+            save_state(output_dir, hashes, stats, figures)
         
         print_and_log("---\n")
         print_and_log("## Summary\n")
@@ -535,7 +511,9 @@ def main():
         print_and_log("### Generated Files\n")
         print_and_log("**Reports:**")
         print_and_log("- `analysis_results.md` - This comprehensive analysis report")
-        print_and_log("- `text_id_mapping.md` - Reference guide mapping text IDs to titles\n")
+        print_and_log("- `text_id_mapping.md` - Reference guide mapping text IDs to titles")
+        print_and_log("- `participant_abilities.csv` - Model-based participant abilities with standard errors")
+        print_and_log("- `text_features.csv` - Text features with difficulty and per-text means (with `--texts`)\n")
         print_and_log("**Visualizations:**")
         print_and_log("- `accuracy/` - Accuracy distribution and performance metrics")
         print_and_log("- `confidence_time/` - Confidence and response time analyses")
@@ -0,0 +1,511 @@
+"""Tests for the analysis modules.
+
+The modules import each other as top-level modules, like ``script.py``
+does, so run the tests from this directory (or with it as start dir):
+
+    python -m unittest tests                               # in responses/
+    python -m unittest discover -s responses -p tests.py  # from the root
+"""
+
+import itertools
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import scipy.optimize
+import scipy.sparse as sp
+from scipy.special import expit
+
+import features
+import irt
+import loading
+from aggregates import Aggregates
+from features import DENSE_FEATURES, profile_contrast, regress, text_features
+from figures import figure_tasks, render_all
+from incremental import (
+    STATE_FILE, STATE_VERSION, load_state, row_hashes, save_state, stale_tasks, update_statistics,
+)
+from irt import fit_rasch
+from loading import DTYPES, ORIGIN_DTYPE, read_responses
+from resampling import (
+    STATISTICS, bootstrap, participant_arrays, percentile_ci, sign_flip_test,
+)
+
+
+def make_responses(participants=8, texts=6, seed=0):
+    """Synthetic export: every participant answers every text once"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for participant in range(1, participants + 1):
+        order = rng.permutation(texts) + 1
+        for index, text in enumerate(order, start=1):
+            origin = 'ai' if text % 2 else 'human'
+            rows.append({
+                'participant__id': participant,
+                'participant__name': f'Participant {participant}',
+                'participant__experience': participant % 5,
+                'participant__department': ['English', 'History'][participant % 2],
+                'text__id': int(text),
+                'text__title': f'Text {text}',
+                'text__origin': origin,
+                'classification': rng.choice(['ai', 'human']),
+                'confidence': int(rng.integers(1, 6)),
+                'response_time': int(rng.integers(5000, 60000)),
+                'index': index,
+            })
+    return pd.DataFrame(rows)
+
+
+def prepare(df):
+    # Wie load_data in script.py
+    df = loading.apply_dtypes(df)
+    df['correct'] = (df['classification'] == df['text__origin']).astype('uint8')
+    return df
+
+
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+
+class LoadingTests(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.raw = make_responses()
+        self.path = self.tmp / 'responses.csv'
+        self.raw.to_csv(self.path, index=False)
+
+    def test_dtypes(self):
+        df = read_responses(self.path, use_cache=False)
+        self.assertEqual(list(df.columns), list(DTYPES))
+        for column, dtype in DTYPES.items():
+            self.assertEqual(df[column].dtype, dtype, column)
+        # Gleicher kategorialer Typ, also direkt vergleichbar
+        self.assertEqual(df['text__origin'].dtype, ORIGIN_DTYPE)
+        np.testing.assert_array_equal(df['classification'] == df['text__origin'],
+                                      self.raw['classification'] == self.raw['text__origin'])
+        pd.testing.assert_frame_equal(df.astype(self.raw.dtypes.to_dict()), self.raw)
+
+    def test_cache(self):
+        first = read_responses(self.path)
+        cache = loading.cache_path(self.path)
+        self.assertTrue(cache.exists())
+        with mock.patch.object(loading, 'read_csv', side_effect=AssertionError('parsed again')):
+            pd.testing.assert_frame_equal(read_responses(self.path), first)
+
+        # Eine neuere CSV wird neu eingelesen
+        self.raw.iloc[:3].to_csv(self.path, index=False)
+        stamp = cache.stat().st_mtime_ns + 1_000_000_000
+        os.utime(self.path, ns=(stamp, stamp))
+        self.assertEqual(len(read_responses(self.path)), 3)
+
+    @unittest.skipUnless(loading.HAS_PYARROW, 'needs pyarrow')
+    def test_binary_exports(self):
+        expected = read_responses(self.path, use_cache=False)
+        for name in ('responses.parquet', 'responses.feather'):
+            with self.subTest(name=name):
+                path = self.tmp / name
+                if name.endswith('.parquet'):
+                    self.raw.to_parquet(path)
+                else:
+                    self.raw.to_feather(path)
+                pd.testing.assert_frame_equal(read_responses(path), expected)
+
+
+class AggregatesTests(unittest.TestCase):
+    def setUp(self):
+        self.df = prepare(make_responses(participants=10, texts=6))
+        self.agg = Aggregates(self.df.copy())
+
+    def test_per_participant(self):
+        grouped = self.df.groupby('participant__id')
+        np.testing.assert_allclose(self.agg.participant_accuracy,
+                                   grouped['correct'].mean() * 100)
+        np.testing.assert_allclose(self.agg.per_participant['confidence'],
+                                   grouped['confidence'].mean())
+        pd.testing.assert_series_equal(
+            self.agg.per_participant['participant__department'],
+            grouped['participant__department'].first(),
+        )
+        counts = self.agg.per_participant_origin
+        for origin in ('ai', 'human'):
+            rows = self.df[self.df['text__origin'] == origin].groupby('participant__id')
+            np.testing.assert_array_equal(counts[('correct', origin)], rows['correct'].sum())
+            np.testing.assert_array_equal(counts[('n', origin)], rows.size())
+
+    def test_per_text_and_origin(self):
+        per_text = self.df.groupby(['text__id', 'text__origin'], observed=True)[
+            ['correct', 'response_time']].mean()
+        np.testing.assert_allclose(self.agg.per_text[['correct', 'response_time']], per_text)
+
+        for origin in ('ai', 'human'):
+            rows = self.df[self.df['text__origin'] == origin]
+            self.assertAlmostEqual(self.agg.per_origin.loc[origin, 'accuracy'],
+                                   rows['correct'].mean() * 100)
+            self.assertEqual(self.agg.per_origin.loc[origin, 'responses'], len(rows))
+            self.assertEqual(self.agg.per_origin.loc[origin, 'texts'], rows['text__id'].nunique())
+
+        pd.testing.assert_frame_equal(
+            self.agg.confusion,
+            pd.crosstab(self.df['text__origin'], self.df['classification']),
+            check_names=False, check_dtype=False, check_categorical=False,
+        )
+        self.assertEqual(len(self.agg.correct) + len(self.agg.incorrect), len(self.df))
+        self.assertTrue((self.agg.correct['correct'] == 1).all())
+
+
+def failing_figure(path, dpi, value):
+    raise ValueError(value)
+
+
+class FiguresTests(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tasks = figure_tasks(Aggregates(prepare(make_responses())))
+
+    def render(self, name, tasks, workers):
+        output_dir = self.tmp / name
+        for task_name, _, _ in tasks:
+            (output_dir / task_name).parent.mkdir(parents=True, exist_ok=True)
+        return output_dir, render_all(tasks, output_dir, workers=workers, dpi=20)
+
+    def test_parallel_matches_serial(self):
+        serial_dir, serial = self.render('serial', self.tasks, workers=1)
+        parallel_dir, parallel = self.render('parallel', self.tasks, workers=2)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial, [f'{name}.png' for name, _, _ in self.tasks])
+        for name in serial:
+            with self.subTest(name=name):
+                data = (parallel_dir / name).read_bytes()
+                self.assertTrue(data.startswith(b'\x89PNG'))
+                self.assertEqual(data, (serial_dir / name).read_bytes())
+
+    def test_worker_error(self):
+        tasks = self.tasks[:1] + [('broken', failing_figure, {'value': 'broken figure'})]
+        with self.assertRaisesRegex(ValueError, 'broken figure'):
+            self.render('broken', tasks, workers=2)
+
+
+class IncrementalTests(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.df = prepare(make_responses(participants=10))
+        # Die ersten 6 Teilnehmenden waren beim letzten Lauf schon da
+        self.old = self.df[self.df['participant__id'] <= 6]
+
+    def state(self, df):
+        stats, hashes, _ = update_statistics(df, None)
+        return {'hashes': hashes, 'stats': stats}
+
+    def assert_same_aggregates(self, stats, df):
+        incremental, full = Aggregates(df.copy(), stats), Aggregates(df.copy())
+        pd.testing.assert_frame_equal(incremental.per_participant, full.per_participant,
+                                      check_dtype=False)
+        pd.testing.assert_frame_equal(incremental.per_participant_origin,
+                                      full.per_participant_origin, check_dtype=False)
+        pd.testing.assert_frame_equal(incremental.per_text, full.per_text, check_dtype=False)
+        pd.testing.assert_frame_equal(incremental.per_origin, full.per_origin)
+        pd.testing.assert_frame_equal(incremental.confusion, full.confusion)
+
+    def test_appended_rows(self):
+        stats, hashes, aggregated = update_statistics(self.df, self.state(self.old))
+        self.assertEqual(aggregated, len(self.df) - len(self.old))
+        np.testing.assert_array_equal(hashes, row_hashes(self.df))
+        self.assert_same_aggregates(stats, self.df)
+
+    def test_unchanged(self):
+        state = self.state(self.df)
+        stats, _, aggregated = update_statistics(self.df, state)
+        self.assertEqual(aggregated, 0)
+        self.assertIs(stats, state['stats'])
+
+    def test_edited_or_removed_rows_rebuild(self):
+        state = self.state(self.old)
+        edited = self.df.copy()
+        edited.loc[0, 'confidence'] = 5 if edited.loc[0, 'confidence'] != 5 else 1
+        for df in (edited, self.df.iloc[1:]):
+            with self.subTest(rows=len(df)):
+                stats, _, aggregated = update_statistics(df, state)
+                self.assertEqual(aggregated, len(df))
+                self.assert_same_aggregates(stats, df)
+
+    def test_state_file(self):
+        self.assertIsNone(load_state(self.tmp))
+        state = self.state(self.df)
+        save_state(self.tmp, state['hashes'], state['stats'], {'figure': 'abc'})
+        loaded = load_state(self.tmp)
+        np.testing.assert_array_equal(loaded['hashes'], state['hashes'])
+        self.assertEqual(loaded['figures'], {'figure': 'abc'})
+
+        # Zustand einer anderen Version wird verworfen
+        with mock.patch('incremental.STATE_VERSION', STATE_VERSION + 1):
+            self.assertIsNone(load_state(self.tmp))
+        (self.tmp / STATE_FILE).write_bytes(b'not a pickle')
+        self.assertIsNone(load_state(self.tmp))
+
+    def test_stale_tasks(self):
+        tasks = figure_tasks(Aggregates(self.df.copy()))
+        for name, _, _ in tasks:
+            (self.tmp / f'{name}.png').parent.mkdir(parents=True, exist_ok=True)
+            (self.tmp / f'{name}.png').touch()
+        stale, fingerprints = stale_tasks(tasks, {}, self.tmp, 300, 'png')
+        self.assertEqual(len(stale), len(tasks))
+        self.assertEqual(stale_tasks(tasks, fingerprints, self.tmp, 300, 'png')[0], [])
+
+        # Andere DPI: alles neu; fehlende Datei oder geänderte Daten: nur diese Abbildung
+        self.assertEqual(len(stale_tasks(tasks, fingerprints, self.tmp, 150, 'png')[0]),
+                         len(tasks))
+        (self.tmp / f'{tasks[0][0]}.png').unlink()
+        changed = self.df.copy()
+        changed.loc[0, 'response_time'] += 1000
+        stale, _ = stale_tasks(figure_tasks(Aggregates(changed)), fingerprints, self.tmp, 300, 'png')
+        self.assertEqual({name for name, _, _ in stale}, {
+            tasks[0][0],
+            'confidence_time/response_time_distribution',
+            'confidence_time/response_time_by_correctness',
+        })
+
+
+class ResamplingTests(unittest.TestCase):
+    def setUp(self):
+        self.arrays = participant_arrays(Aggregates(prepare(make_responses(participants=30))))
+
+    def test_bootstrap_reproducible(self):
+        first = bootstrap(self.arrays, n_resamples=500, seed=1, chunk_size=64)
+        self.assertEqual(set(first), set(STATISTICS))
+        # Gleiche Chunks, andere Anzahl Prozesse: gleiches Ergebnis
+        for result in (bootstrap(self.arrays, n_resamples=500, seed=1, chunk_size=64),
+                       bootstrap(self.arrays, n_resamples=500, seed=1, chunk_size=64, workers=2)):
+            for name in STATISTICS:
+                np.testing.assert_array_equal(result[name], first[name])
+        other = bootstrap(self.arrays, n_resamples=500, seed=2, chunk_size=64)
+        self.assertFalse(np.array_equal(other['Mean accuracy (%)'], first['Mean accuracy (%)']))
+
+    def test_bootstrap_distribution(self):
+        accuracy = self.arrays['accuracy']
+        distribution = bootstrap(self.arrays, n_resamples=4000, seed=0)['Mean accuracy (%)']
+        self.assertEqual(len(distribution), 4000)
+        standard_error = accuracy.std(ddof=1) / np.sqrt(len(accuracy))
+        self.assertAlmostEqual(distribution.mean(), accuracy.mean(), delta=standard_error / 5)
+        self.assertAlmostEqual(distribution.std(), standard_error, delta=standard_error / 5)
+
+        sensitivity = bootstrap(self.arrays, n_resamples=10, seed=0, chunk_size=3)['Sensitivity (%)']
+        self.assertTrue(((sensitivity >= 0) & (sensitivity <= 100)).all())
+
+    def test_percentile_ci(self):
+        distribution = np.concatenate([np.arange(101.0), [np.nan, np.inf]])
+        np.testing.assert_allclose(percentile_ci(distribution, level=0.9), (5, 95))
+
+    def test_exact_sign_flip(self):
+        accuracy = np.array([50, 60, 70, 45, 80, 55, 65, 40], dtype=float)
+        deviations = accuracy - 50
+        sums = [abs(np.dot(signs, deviations))
+                for signs in itertools.product([-1, 1], repeat=len(deviations))]
+        expected = np.mean(np.array(sums) >= abs(deviations.sum()) - 1e-9)
+        for chunk_size in (None, 7):
+            p, permutations, exact = sign_flip_test(accuracy, chunk_size=chunk_size)
+            self.assertTrue(exact)
+            self.assertEqual(permutations, 2 ** len(accuracy))
+            self.assertAlmostEqual(p, expected)
+        self.assertEqual(sign_flip_test(np.full(5, 50.0))[0], 1.0)
+
+    def test_monte_carlo_sign_flip(self):
+        accuracy = self.arrays['accuracy'][:12]
+        exact_p, _, _ = sign_flip_test(accuracy)
+        with mock.patch('resampling.EXACT_LIMIT', 0):
+            p, permutations, exact = sign_flip_test(accuracy, n_resamples=20000, seed=3)
+            self.assertEqual(sign_flip_test(accuracy, n_resamples=20000, seed=3, workers=2)[0], p)
+        self.assertFalse(exact)
+        self.assertEqual(permutations, 20000)
+        self.assertAlmostEqual(p, exact_p, delta=0.02)
+
+
+def simulate_rasch(participants, texts, sd_ability, sd_difficulty, intercept=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    ability = rng.normal(0, sd_ability, participants)
+    difficulty = rng.normal(0, sd_difficulty, texts)
+    p_index, t_index = np.divmod(np.arange(participants * texts), texts)
+    eta = intercept + ability[p_index] - difficulty[t_index]
+    df = pd.DataFrame({
+        'participant__id': p_index + 1,
+        'text__id': t_index + 1,
+        'text__origin': pd.Categorical(np.where(t_index % 2, 'ai', 'human'), dtype=ORIGIN_DTYPE),
+        'correct': (rng.random(len(eta)) < expit(eta)).astype('uint8'),
+    })
+    return df, ability, difficulty
+
+
+class RaschTests(unittest.TestCase):
+    def test_recovers_parameters(self):
+        df, ability, difficulty = simulate_rasch(150, 30, 1.0, 1.5)
+        model = fit_rasch(df)
+        self.assertTrue(model['converged'])
+        self.assertEqual(model['cells'], 150 * 30)
+        self.assertGreater(np.corrcoef(model['difficulties']['difficulty'], difficulty)[0, 1], 0.95)
+        self.assertGreater(np.corrcoef(model['abilities']['ability'], ability)[0, 1], 0.8)
+        self.assertAlmostEqual(np.sqrt(model['var_difficulty']), 1.5, delta=0.4)
+        self.assertAlmostEqual(np.sqrt(model['var_ability']), 1.0, delta=0.3)
+        self.assertEqual(model['difficulties']['responses'].tolist(), [150] * 30)
+        self.assertEqual(model['difficulties']['text__origin'].tolist()[:2], ['human', 'ai'])
+
+    def test_no_ability_variance(self):
+        df, _, _ = simulate_rasch(60, 20, 0.0, 1.0, seed=1)
+        model = fit_rasch(df)
+        self.assertLess(model['var_ability'], 0.05)
+        self.assertGreater(model['var_difficulty'], 0.3)
+
+    def test_newton_matches_dense_solution(self):
+        # Modus und Standardfehler für feste Varianzen gegen die dichte Rechnung
+        df, _, _ = simulate_rasch(12, 5, 1.0, 1.0, seed=2)
+        df = pd.concat([df, df.sample(frac=0.5, random_state=0)])
+        participants, texts, p_index, t_index, k, n = irt._cells(df)
+        Zp = irt._incidence(p_index, len(participants))
+        Zt = irt._incidence(t_index, len(texts))
+        var_theta, var_b = 0.8, 1.3
+        x, D, DinvC, factor, _ = irt._newton(Zp, Zt, k, n, np.zeros(1 + 12 + 5), var_theta,
+                                              var_b, 1e-10, 50)
+        var_a, var_t = irt._covariance_diagonal(D, DinvC, factor)
+
+        X = sp.hstack([np.ones((len(k), 1)), Zp, -Zt]).toarray()
+        prior = np.concatenate([[0], np.full(12, 1 / var_theta), np.full(5, 1 / var_b)])
+
+        def objective(x):
+            eta = X @ x
+            value = -(k * eta - n * np.logaddexp(0, eta)).sum() + (prior * x ** 2).sum() / 2
+            return value, -X.T @ (k - n * expit(eta)) + prior * x
+
+        reference = scipy.optimize.minimize(objective, np.zeros(18), jac=True, method='BFGS',
+                                            options={'gtol': 1e-10}).x
+        np.testing.assert_allclose(x, reference, atol=1e-5)
+
+        w = n * expit(X @ x) * (1 - expit(X @ x))
+        covariance = np.linalg.inv(X.T @ (w[:, None] * X) + np.diag(prior))
+        diagonal = np.diag(covariance)
+        np.testing.assert_allclose(var_a, diagonal[[0, *range(13, 18)]], rtol=1e-8)
+        np.testing.assert_allclose(var_t, diagonal[1:13], rtol=1e-8)
+
+
+class FeaturesTests(TempDirTestCase):
+    def texts(self, bodies):
+        return pd.DataFrame({'text__id': range(1, len(bodies) + 1), 'body': bodies})
+
+    def test_dense_features(self):
+        values = dict(zip(DENSE_FEATURES, features.dense_features(
+            'Der Hund schläft. The dog, the cat!'
+        )))
+        self.assertEqual(values['words'], 7)
+        self.assertAlmostEqual(values['type_token_ratio'], 6 / 7)
+        self.assertEqual(values['sentence_length'], 3.5)
+        self.assertEqual(values['sentence_length_sd'], 0.5)
+        self.assertAlmostEqual(values['punctuation_rate'], 3 / 7)
+        # der, the, the
+        self.assertAlmostEqual(values['function_word_rate'], 3 / 7)
+
+    def test_ngram_profiles(self):
+        bodies = ['Ein  kurzer\nText', 'ein kurzer text', 'ganz anders', '', 'ab']
+        profiles = features.ngram_profiles(bodies)
+        self.assertEqual(profiles.shape, (5, features.NGRAM_BUCKETS))
+        np.testing.assert_allclose(profiles.sum(axis=1).A.ravel(), [1, 1, 1, 0, 0], rtol=1e-6)
+        # Kleinschreibung und Leerraum sind egal
+        self.assertEqual((profiles[0] != profiles[1]).nnz, 0)
+        # Keine N-Gramme über Textgrenzen: einzeln gleich wie im Stapel
+        for row, body in enumerate(bodies):
+            self.assertEqual((features.ngram_profiles([body])[0] != profiles[row]).nnz, 0)
+        self.assertEqual(features.ngram_profiles(['abc'])[0].nnz, 1)
+        self.assertEqual(features.ngram_profiles(['abcabc'])[0].nnz, 3)
+
+    def test_cache(self):
+        bodies = ['First text.', 'Second text!', 'First text.']
+        cache = self.tmp / 'texts.csv.features.npz'
+        first, ngrams, processed = text_features(self.texts(bodies), cache)
+        self.assertEqual(processed, 2)
+        np.testing.assert_array_equal(first.iloc[0], first.iloc[2])
+
+        again, cached_ngrams, processed = text_features(self.texts(bodies), cache)
+        self.assertEqual(processed, 0)
+        pd.testing.assert_frame_equal(again, first)
+        self.assertEqual((cached_ngrams != ngrams).nnz, 0)
+
+        # Nur der bearbeitete Text wird neu berechnet, der alte fällt aus dem Cache
+        edited, _, processed = text_features(self.texts(['First text.', 'Edited.']), cache)
+        self.assertEqual(processed, 1)
+        self.assertEqual(edited.loc[2, 'words'], 1)
+        self.assertEqual(len(features._load_cache(cache)[0]), 2)
+
+        with mock.patch('features.FEATURE_VERSION', features.FEATURE_VERSION + 1):
+            self.assertEqual(text_features(self.texts(bodies), cache)[2], 2)
+
+    def test_profile_contrast(self):
+        rng = np.random.default_rng(0)
+        ngrams = sp.random(8, 50, density=0.3, format='csr', random_state=1)
+        is_ai = rng.random(8) < 0.5
+        dense = ngrams.toarray()
+
+        def cosine(a, b):
+            norm = np.linalg.norm(a) * np.linalg.norm(b)
+            return a @ b / norm if norm else 0
+
+        expected = []
+        for row in range(8):
+            others = np.arange(8) != row
+            ai = dense[others & is_ai].sum(axis=0)
+            human = dense[others & ~is_ai].sum(axis=0)
+            expected.append(cosine(dense[row], ai) - cosine(dense[row], human))
+        np.testing.assert_allclose(profile_contrast(ngrams, is_ai), expected, atol=1e-12)
+
+    def test_regress(self):
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.normal(size=(40, 3)), columns=['a', 'b', 'c'])
+        X['constant'] = 1.0
+        X['ai_generated'] = (np.arange(40) % 2).astype(float)
+        Y = pd.DataFrame({'y1': X['a'] * 2 + rng.normal(size=40),
+                          'y2': -X['c'] + X['ai_generated'] + rng.normal(size=40)})
+        result = regress(X, Y)
+        self.assertEqual(list(result['coef'].index), ['a', 'b', 'c', 'ai_generated'])
+        self.assertEqual(result['dof'], 37)
+
+        Z = (X - X.mean()) / X.std()
+        for name, columns in (('a', ['a', 'ai_generated']), ('c', ['c', 'ai_generated']),
+                              ('ai_generated', ['ai_generated'])):
+            design = np.column_stack([np.ones(40), Z[columns]])
+            dof = 40 - design.shape[1]
+            for outcome in Y:
+                coef, residual, _, _ = np.linalg.lstsq(design, Y[outcome], rcond=None)
+                self.assertAlmostEqual(result['coef'].loc[name, outcome], coef[1])
+                se = np.sqrt(np.linalg.inv(design.T @ design)[1, 1] * residual[0] / dof)
+                self.assertAlmostEqual(result['se'].loc[name, outcome], se)
+                total = ((Y[outcome] - Y[outcome].mean()) ** 2).sum()
+                self.assertAlmostEqual(result['r2'].loc[name, outcome], 1 - residual[0] / total)
+        self.assertLess(result['p'].loc['a', 'y1'], 0.001)
+        self.assertIsNone(regress(X.iloc[:3], Y.iloc[:3]))
+
+    def test_regress_ten_texts(self):
+        # So viele Texte wie in der Beispielstudie, mit allen Merkmalen aus script.py
+        rng = np.random.default_rng(1)
+        columns = DENSE_FEATURES + ['ngram_contrast']
+        X = pd.DataFrame(rng.normal(size=(10, len(columns))), columns=columns)
+        X['ai_generated'] = [1.0, 0.0] * 5
+        Y = pd.DataFrame({'difficulty': X['words'] + rng.normal(scale=0.1, size=10)})
+        result = regress(X, Y)
+        self.assertEqual(result['dof'], 7)
+        self.assertEqual(list(result['coef'].index), columns + ['ai_generated'])
+        self.assertFalse(result['coef'].isna().any().any())
+        self.assertLess(result['p'].loc['words', 'difficulty'], 0.001)
+
+    def test_regress_collinear_with_control(self):
+        X = pd.DataFrame({'same': [0.0, 1.0] * 5, 'other': np.arange(10.0),
+                          'ai_generated': [0.0, 1.0] * 5})
+        Y = pd.DataFrame({'y': np.arange(10.0) ** 2})
+        result = regress(X, Y)
+        self.assertTrue(np.isnan(result['coef'].loc['same', 'y']))
+        self.assertFalse(np.isnan(result['coef'].loc['other', 'y']))
+
+
+if __name__ == '__main__':
+    unittest.main()
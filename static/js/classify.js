@@ -1,7 +1,74 @@
 let startTime = Date.now();
 
-document.getElementById("classify-form").addEventListener("submit", () => {
-    let endTime = Date.now();
-    let responseTime = endTime - startTime;
-    document.querySelector('input[name="response_time"]').value = responseTime;
-});
+// Paged mode: one form per text
+const form = document.getElementById("classify-form");
+
+if (form) {
+    form.addEventListener("submit", () => {
+        let endTime = Date.now();
+        let responseTime = endTime - startTime;
+        document.querySelector('input[name="response_time"]').value = responseTime;
+    });
+}
+
+// Single-page mode: answers are buffered and submitted together
+const batch = document.getElementById("classify-batch");
+
+if (batch) {
+    const steps = Array.from(batch.querySelectorAll(".classify-step"));
+    const error = document.getElementById("classify-error");
+    const answers = [];
+
+    const submit = () => {
+        const token = batch.querySelector('input[name="csrfmiddlewaretoken"]').value;
+        const lastButton = steps[steps.length - 1].querySelector("button");
+        lastButton.disabled = true;
+        error.hidden = true;
+
+        fetch(batch.dataset.submitUrl, {
+            method: "POST",
+            headers: { "Content-Type": "application/json", "X-CSRFToken": token },
+            body: JSON.stringify({ responses: answers }),
+        })
+            .then((response) => response.json().then((data) => ({ ok: response.ok, data })))
+            .then(({ ok, data }) => {
+                if (!ok) {
+                    throw new Error(data.error || "Submission failed.");
+                }
+                window.location.href = data.redirect;
+            })
+            .catch((err) => {
+                error.textContent = `${err.message} Please try again.`;
+                error.hidden = false;
+                lastButton.disabled = false;
+            });
+    };
+
+    steps.forEach((step, position) => {
+        step.addEventListener("submit", (event) => {
+            event.preventDefault();
+
+            // Bei erneutem Absenden (Fehler) nicht doppelt puffern
+            if (answers.length === position) {
+                const data = new FormData(step);
+                const field = (name) => data.get(`${step.dataset.prefix}-${name}`);
+
+                answers.push({
+                    text: Number(step.dataset.textId),
+                    classification: field("classification"),
+                    confidence: field("confidence"),
+                    response_time: Date.now() - startTime,
+                });
+            }
+
+            if (position + 1 < steps.length) {
+                step.hidden = true;
+                steps[position + 1].hidden = false;
+                window.scrollTo(0, 0);
+                startTime = Date.now();
+            } else {
+                submit();
+            }
+        });
+    });
+}
@@ -0,0 +1,24 @@
+// Results page: full texts are only loaded when a row is expanded
+document.querySelectorAll("details.result-text").forEach((details) => {
+    details.addEventListener("toggle", () => {
+        if (!details.open || details.dataset.loaded) {
+            return;
+        }
+        details.dataset.loaded = "1";
+        const body = details.querySelector(".result-body");
+        fetch(details.dataset.src)
+            .then((response) => {
+                if (!response.ok) {
+                    throw new Error("Could not load the text.");
+                }
+                return response.text();
+            })
+            .then((html) => {
+                body.innerHTML = html;
+            })
+            .catch((err) => {
+                delete details.dataset.loaded;
+                body.textContent = err.message;
+            });
+    });
+});
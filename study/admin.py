@@ -1,5 +1,19 @@
-from django.contrib import admin
-from .models import TextItem, Participant, Response
+import os
+import tempfile
+
+from django.contrib import admin, messages
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from . import search, summary
+from .export import (
+    CONTENT_TYPES, EXPORT_FIELDS, FORMATS, aiter_csv, aiter_file, iter_csv, write_arrow,
+)
+from .models import Study, StudySummary, TextItem, Participant, Response
 from import_export.admin import ExportMixin
 from import_export import resources
 
@@ -8,24 +22,17 @@ from import_export import resources
 class ResponseResource(resources.ModelResource):
     class Meta:
         model = Response
-        fields = (
-            "participant__id",
-            "participant__name",
-            "participant__experience",
-            "participant__department",
-            "text__id",
-            "text__title",
-            "text__origin",
-            "classification",
-            "confidence",
-            "response_time",
-            "index",
-        )
+        fields = EXPORT_FIELDS
         export_order = fields
 
+    def get_queryset(self):
+        # participant__* und text__* ohne eine Abfrage pro Zeile
+        return super().get_queryset().select_related("participant", "text")
+
 
 class ResponseAdmin(ExportMixin, admin.ModelAdmin):
     resource_class = ResponseResource
+    import_export_change_list_template = "admin/study/response/change_list_export.html"
     list_display = (
         "participant",
         "text",
@@ -34,8 +41,87 @@ class ResponseAdmin(ExportMixin, admin.ModelAdmin):
         "response_time",
         "index",
     )
-    list_filter = ("classification", "text")
+    list_filter = ("participant__study", "classification", "text")
     search_fields = ("participant__name", "text__title")
+    list_select_related = ("participant", "text")
+
+    def get_urls(self):
+        urls = [
+            path(
+                "dashboard/",
+                self.admin_site.admin_view(self.dashboard_view),
+                name="study_response_dashboard",
+            ),
+            path(
+                "export-stream/",
+                self.admin_site.admin_view(self.stream_export_view),
+                name="study_response_stream_export",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def save_model(self, request, obj, form, change):
+        # Zähler des Dashboards mitführen (changeform_view läuft in einer Transaktion)
+        if change:
+            summary.discard([Response.objects.get(pk=obj.pk)])
+        super().save_model(request, obj, form, change)
+        summary.record([obj])
+
+    # Liest nur die Zählerstände pro Text, siehe summary.py
+    def dashboard_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        studies = Study.objects.order_by("name")
+        study_id = request.GET.get("study", "")
+        study = studies.filter(pk=study_id).first() if study_id.isdigit() else None
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": f"Study dashboard: {study}" if study else "Study dashboard",
+            "studies": studies,
+            "study": study,
+            **summary.dashboard(study),
+        }
+        return TemplateResponse(request, "admin/study/dashboard.html", context)
+
+    # Export aller Antworten ohne den Umweg über tablib, siehe export.py
+    def stream_export_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        format = request.GET.get("format", "csv")
+        if format not in FORMATS:
+            format = "csv"
+        filename = f"responses.{format}"
+
+        # Unter ASGI nur asynchrone Iteratoren, sonst liest Django alles in den Speicher
+        asgi = isinstance(request, ASGIRequest)
+        if format == "csv":
+            response = StreamingHttpResponse(
+                aiter_csv() if asgi else iter_csv(), content_type=CONTENT_TYPES["csv"]
+            )
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+            return response
+
+        file = tempfile.TemporaryFile()
+        try:
+            write_arrow(file, format)
+        except ImportError:
+            file.close()
+            self.message_user(
+                request, f"The {format} export needs pyarrow to be installed.", messages.ERROR
+            )
+            return redirect("admin:study_response_changelist")
+        file.seek(0)
+        if asgi:
+            response = StreamingHttpResponse(aiter_file(file), content_type=CONTENT_TYPES[format])
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+            response["Content-Length"] = os.fstat(file.fileno()).st_size
+            return response
+        return FileResponse(
+            file, as_attachment=True, filename=filename, content_type=CONTENT_TYPES[format]
+        )
 
 
 @admin.register(Response)
@@ -48,18 +134,56 @@ class ResponseInline(admin.TabularInline):
     extra = 0
     readonly_fields = ("text", "classification", "confidence", "response_time", "index")
     can_delete = False
+    ordering = ("index",)
+
+    def get_queryset(self, request):
+        # Sonst je Zeile eine Abfrage für die Textspalte und für __str__
+        return super().get_queryset(request).select_related("participant", "text")
 
 
 @admin.register(Participant)
 class ParticipantAdmin(ExportMixin, admin.ModelAdmin):
-    list_display = ("name", "experience", "department", "created_at")
+    list_display = ("name", "study", "experience", "department", "created_at")
     search_fields = ("name", "department")
-    list_filter = ("department",)
+    list_filter = ("study", "department")
+    list_select_related = ("study",)
     inlines = [ResponseInline]
 
 
 @admin.register(TextItem)
 class TextItemAdmin(admin.ModelAdmin):
-    list_display = ("title", "origin")
-    list_filter = ("origin",)
+    list_display = ("title", "study", "origin")
+    list_filter = ("study", "origin")
+    list_select_related = ("study",)
     search_fields = ("title", "body")
+
+    def get_search_results(self, request, queryset, search_term):
+        # Volltextindex statt LIKE über alle Texte, siehe search.py
+        if not search_term or not search.available(queryset.db):
+            return super().get_search_results(request, queryset, search_term)
+        return search.matching(queryset, search_term), False
+
+
+@admin.register(Study)
+class StudyAdmin(admin.ModelAdmin):
+    list_display = ("name", "slug", "sample_size", "texts", "participants", "is_active")
+    list_filter = ("is_active",)
+    search_fields = ("name", "slug")
+    prepopulated_fields = {"slug": ("name",)}
+
+    list_select_related = ("summary",)
+
+    def get_queryset(self, request):
+        # Poolgröße in einer Abfrage für die ganze Liste, Teilnehmende aus dem Zähler
+        return super().get_queryset(request).annotate(text_count=Count("texts"))
+
+    @admin.display(ordering="text_count")
+    def texts(self, obj):
+        return obj.text_count
+
+    @admin.display(ordering="summary__participants")
+    def participants(self, obj):
+        try:
+            return obj.summary.participants
+        except StudySummary.DoesNotExist:
+            return 0
@@ -0,0 +1,181 @@
+"""Adaptive text assignment (``STUDY_ORDER_STRATEGY = "adaptive"``).
+
+Instead of a fixed design, every new participant gets the texts of their
+study that have the fewest responses so far, and each position goes to the
+chosen text that was shown least often at that position. The counts live in
+memory per worker and study:
+
+- responses per text, loaded from the ``TextSummary`` counters and reloaded
+  every ``STUDY_ASSIGNMENT_REFRESH`` seconds, so responses stored by other
+  workers are picked up;
+- responses per text and position, loaded once from ``Response`` and then
+  counted for the responses stored by this worker;
+- reservations: the texts of participants who started but have not
+  answered them yet count as pending responses. A response (``record``)
+  turns its reservation into a real count; reservations of participants
+  who dropped out expire after ``STUDY_ASSIGNMENT_TTL`` seconds.
+
+``assign`` only reads these structures, apart from the (re)load, so it adds
+well under a millisecond to the start page for studies of a few dozen
+texts per participant. The chosen order cannot be recomputed later and is
+stored on the participant (``Participant.text_order``).
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db.models import Count
+
+from .corpus import get_corpus
+from .models import Response, TextSummary
+
+ADAPTIVE = "adaptive"
+
+_lock = threading.Lock()
+_studies = {}
+_reservations = {}
+_expiry = []
+_sequence = itertools.count()
+
+
+class _Counts:
+    def __init__(self, study_id):
+        # Pro Text eine Liste der Antworten je Position (Index 0 = Position 1),
+        # Reservierungen eingerechnet
+        self.slots = defaultdict(list)
+        for text_id, index, count in (
+            Response.objects.filter(text__study_id=study_id)
+            .values_list("text_id", "index")
+            .annotate(count=Count("id"))
+            .order_by()
+        ):
+            self.add_slot(text_id, index, count)
+        self.pending = Counter()
+        self.refresh(study_id)
+
+    def refresh(self, study_id):
+        summaries = TextSummary.objects.filter(text__study_id=study_id)
+        self.texts = Counter(dict(summaries.values_list("text_id", "responses")))
+        self.refreshed = time.monotonic()
+
+    def add_slot(self, text_id, index, count=1):
+        slots = self.slots[text_id]
+        if len(slots) < index:
+            slots.extend([0] * (index - len(slots)))
+        slots[index - 1] += count
+
+
+class Reservation:
+    def __init__(self, study_id, order, expires):
+        self.study_id = study_id
+        self.order = order
+        self.expires = expires
+        self.remaining = {(text_id, index) for index, text_id in enumerate(order, start=1)}
+        self.participant_id = None
+
+
+def _counts(study_id):
+    counts = _studies.get(study_id)
+    if counts is None:
+        counts = _studies[study_id] = _Counts(study_id)
+    elif time.monotonic() - counts.refreshed > settings.STUDY_ASSIGNMENT_REFRESH:
+        counts.refresh(study_id)
+    return counts
+
+
+def _release(reservation, entries, answered=False):
+    counts = _studies.get(reservation.study_id)
+    for text_id, index in entries:
+        reservation.remaining.discard((text_id, index))
+        if counts is None:
+            continue
+        counts.pending[text_id] -= 1
+        if answered:
+            # Aus der Reservierung wird eine Antwort, die Position bleibt belegt
+            counts.texts[text_id] += 1
+        else:
+            counts.add_slot(text_id, index, -1)
+
+
+def _expire(now):
+    while _expiry and _expiry[0][0] < now:
+        _, _, reservation = heapq.heappop(_expiry)
+        _release(reservation, list(reservation.remaining))
+        _reservations.pop(reservation.participant_id, None)
+
+
+def assign(study_id, pool, sample_size=None):
+    """Reserve and return the texts (in order) for a new participant of a study"""
+    rng = random.Random()
+    k = len(pool) if sample_size is None else min(sample_size, len(pool))
+    now = time.monotonic()
+    with _lock:
+        _expire(now)
+        counts = _counts(study_id)
+        texts, pending = counts.texts, counts.pending
+        # Zufällige Reihenfolge bei Gleichstand, sonst bekämen alle dieselben Texte
+        chosen = heapq.nsmallest(
+            k, pool, key=lambda text_id: (texts[text_id] + pending[text_id], rng.random())
+        )
+
+        # Je Position der gewählte Text, der dort bisher am seltensten stand;
+        # bei Gleichstand der mit den wenigsten Antworten (Rang in chosen)
+        slots = []
+        for text_id in chosen:
+            text_slots = counts.slots[text_id]
+            slots.append(text_slots + [0] * (k - len(text_slots)))
+        remaining = list(range(k))
+        order = []
+        for index in range(k):
+            best = min(remaining, key=lambda rank: slots[rank][index] * k + rank)
+            remaining.remove(best)
+            order.append(chosen[best])
+
+        reservation = Reservation(study_id, order, now + settings.STUDY_ASSIGNMENT_TTL)
+        for index, text_id in enumerate(order, start=1):
+            pending[text_id] += 1
+            counts.add_slot(text_id, index)
+        heapq.heappush(_expiry, (reservation.expires, next(_sequence), reservation))
+    return reservation
+
+
+def bind(reservation, participant_id):
+    """Attach a reservation to the participant it was made for, once saved"""
+    with _lock:
+        reservation.participant_id = participant_id
+        if reservation.remaining:
+            _reservations[participant_id] = reservation
+
+
+def record(responses):
+    """Count stored responses and release their reservations (after commit)"""
+    if not _studies:
+        # Andere Strategie oder noch niemand zugewiesen
+        return
+    corpus = get_corpus()
+    with _lock:
+        for response in responses:
+            entry = (response.text_id, response.index)
+            reservation = _reservations.get(response.participant_id)
+            if reservation is not None and entry in reservation.remaining:
+                _release(reservation, [entry], answered=True)
+                if not reservation.remaining:
+                    del _reservations[response.participant_id]
+                continue
+            text = corpus.texts.get(response.text_id)
+            counts = _studies.get(text.study_id) if text is not None else None
+            if counts is not None:
+                counts.texts[response.text_id] += 1
+                counts.add_slot(response.text_id, response.index)
+
+
+def reset():
+    with _lock:
+        _studies.clear()
+        _reservations.clear()
+        _expiry.clear()
@@ -0,0 +1,150 @@
+"""In-process cache of the TextItem corpus.
+
+Every worker keeps a snapshot of all texts and studies in memory, with the
+text ids of every study as a sorted tuple (``pool``) from which the
+participants' texts are sampled. The snapshot is tagged
+with a corpus version; saving or deleting a text (or a study) sets a new
+version (see ``signals.py``) and the snapshot is rebuilt lazily on the next
+access. The version is stored in the database (``CorpusVersion``), so that
+every process sees it, including ``ingest_texts`` and other management
+commands, and kept in Django's cache for ``STUDY_CORPUS_VERSION_TTL``
+seconds. With a shared cache backend (``CACHE_BACKEND``) a new version is
+seen by the other workers at once, otherwise after at most that many
+seconds. With ``STUDY_CORPUS_SHARED_CACHE`` the snapshot itself is shared
+too, so only one worker reads the texts from the database after a change.
+"""
+
+import threading
+import uuid
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from . import rendering
+from .models import CorpusVersion, Study, TextItem
+
+VERSION_KEY = "study:corpus:version"
+SNAPSHOT_KEY = "study:corpus:{version}"
+
+_lock = threading.Lock()
+_corpus = None
+
+
+class Corpus:
+    def __init__(self, version, texts, studies=()):
+        self.version = version
+        self.texts = {text.id: text for text in texts}
+        self.ids = tuple(self.texts)
+        self.studies = {study.id: study for study in studies}
+        self.slugs = {study.slug: study for study in studies}
+        pools = defaultdict(list)
+        for text in texts:
+            pools[text.study_id].append(text.id)
+        self.pools = {study_id: tuple(ids) for study_id, ids in pools.items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get(self, text_id):
+        try:
+            return self.texts[text_id]
+        except KeyError:
+            # Text ist neuer als der Snapshot
+            return TextItem.objects.get(id=text_id)
+
+    async def aget(self, text_id):
+        try:
+            return self.texts[text_id]
+        except KeyError:
+            return await TextItem.objects.aget(id=text_id)
+
+    def pool(self, study_id):
+        # Ohne Studie (Fortschritt von vor den Studien) alle Texte
+        if study_id is None:
+            return self.ids
+        return self.pools.get(study_id, ())
+
+    def sample_size(self, study_id):
+        study = self.studies.get(study_id)
+        return study.sample_size if study is not None else None
+
+    def in_order(self, text_ids):
+        """(position, text) of the texts that still exist, positions counted from 1"""
+        texts = []
+        for position, text_id in enumerate(text_ids, start=1):
+            try:
+                texts.append((position, self.get(text_id)))
+            except TextItem.DoesNotExist:
+                # Während der Teilnahme gelöscht, die Position bleibt leer
+                continue
+        return texts
+
+
+def _new_version():
+    # Ein zufälliger Wert statt eines Zählers, damit eine neu angelegte
+    # Datenbank nie eine alte Version wiederverwendet
+    return uuid.uuid4().hex
+
+
+def _stored_version():
+    version = CorpusVersion.objects.filter(pk=1).values_list("version", flat=True).first()
+    if version is None:
+        version = CorpusVersion.objects.get_or_create(
+            pk=1, defaults={"version": _new_version()}
+        )[0].version
+    return version
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = _stored_version()
+        cache.set(VERSION_KEY, version, timeout=settings.STUDY_CORPUS_VERSION_TTL)
+    return version
+
+
+def bump_version():
+    version = _new_version()
+    CorpusVersion.objects.update_or_create(pk=1, defaults={"version": version})
+    cache.set(VERSION_KEY, version, timeout=settings.STUDY_CORPUS_VERSION_TTL)
+
+
+def get_corpus():
+    global _corpus
+
+    version = get_version()
+    corpus = _corpus
+    if corpus is not None and corpus.version == version:
+        return corpus
+
+    with _lock:
+        if _corpus is not None and _corpus.version == version:
+            return _corpus
+        _corpus = _load(version)
+        return _corpus
+
+
+async def aget_corpus():
+    # Nur das Neuladen braucht einen Thread, der Normalfall bleibt im Event-Loop
+    version = await cache.aget(VERSION_KEY)
+    corpus = _corpus
+    if version is not None and corpus is not None and corpus.version == version:
+        return corpus
+    return await sync_to_async(get_corpus)()
+
+
+def _load(version):
+    shared = settings.STUDY_CORPUS_SHARED_CACHE
+    key = SNAPSHOT_KEY.format(version=version)
+
+    snapshot = cache.get(key) if shared else None
+    if snapshot is None:
+        snapshot = list(TextItem.objects.order_by("id")), list(Study.objects.order_by("id"))
+        if shared:
+            cache.set(key, snapshot, timeout=None)
+    texts, studies = snapshot
+    if settings.STUDY_PRERENDER_BODIES:
+        rendering.prerender(texts)
+    return Corpus(version, texts, studies)
@@ -0,0 +1,159 @@
+"""Streaming export of all responses (and of the texts).
+
+The rows are read with ``values_list(...).iterator(chunk_size=...)`` and
+written chunk by chunk, so memory use stays the same no matter how many
+responses there are. The columns match ``ResponseResource`` in ``admin.py``
+and can be loaded by ``responses/script.py``. The texts export
+(``kind="texts"``) holds the bodies for the feature extraction in
+``responses/features.py``, with the column names of the responses export.
+
+Parquet and Arrow output need ``pyarrow`` (``pip install pyarrow``).
+
+Under ASGI Django reads a synchronous iterator completely into memory before
+sending it, so ``aiter_csv`` and ``aiter_file`` yield the same data from an
+async iterator, one chunk at a time.
+"""
+
+import csv
+import io
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from .models import Response, TextItem
+
+EXPORT_FIELDS = (
+    "participant__id",
+    "participant__name",
+    "participant__experience",
+    "participant__department",
+    "text__id",
+    "text__title",
+    "text__origin",
+    "classification",
+    "confidence",
+    "response_time",
+    "index",
+)
+
+TEXT_FIELDS = ("id", "study__slug", "title", "origin", "content_hash", "body")
+TEXT_COLUMNS = ("text__id", "study", "text__title", "text__origin", "content_hash", "body")
+
+# Art -> (Modell, Felder für values_list, Spaltennamen)
+EXPORTS = {
+    "responses": (Response, EXPORT_FIELDS, EXPORT_FIELDS),
+    "texts": (TextItem, TEXT_FIELDS, TEXT_COLUMNS),
+}
+
+FORMATS = ("csv", "parquet", "arrow")
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def iter_rows(chunk_size=DEFAULT_CHUNK_SIZE, kind="responses"):
+    # values_list holt Teilnehmer und Text per JOIN in derselben Query
+    model, fields, _ = EXPORTS[kind]
+    return (
+        model.objects.order_by("id")
+        .values_list(*fields)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def iter_chunks(chunk_size=DEFAULT_CHUNK_SIZE, kind="responses"):
+    rows = iter_rows(chunk_size, kind)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def iter_csv(chunk_size=DEFAULT_CHUNK_SIZE, kind="responses"):
+    """Yield the CSV export as one string per chunk of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORTS[kind][2])
+    for chunk in iter_chunks(chunk_size, kind):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def aiter_csv(chunk_size=DEFAULT_CHUNK_SIZE, kind="responses"):
+    """Async version of ``iter_csv`` for StreamingHttpResponse under ASGI."""
+    # Der Cursor bleibt im Thread für synchronen Code (thread_sensitive)
+    chunks = iter_csv(chunk_size, kind)
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
+
+
+async def aiter_file(file, block_size=1024 * 1024):
+    """Yield the content of a binary file in blocks and close it at the end."""
+    read = sync_to_async(file.read, thread_sensitive=False)
+    try:
+        while block := await read(block_size):
+            yield block
+    finally:
+        file.close()
+
+
+def arrow_schema(kind="responses"):
+    import pyarrow as pa
+
+    if kind == "texts":
+        return pa.schema(
+            [
+                ("text__id", pa.int64()),
+                ("study", pa.string()),
+                ("text__title", pa.string()),
+                ("text__origin", pa.string()),
+                ("content_hash", pa.string()),
+                ("body", pa.large_string()),
+            ]
+        )
+    return pa.schema(
+        [
+            ("participant__id", pa.int64()),
+            ("participant__name", pa.string()),
+            ("participant__experience", pa.uint16()),
+            ("participant__department", pa.string()),
+            ("text__id", pa.int64()),
+            ("text__title", pa.string()),
+            ("text__origin", pa.string()),
+            ("classification", pa.string()),
+            ("confidence", pa.uint8()),
+            ("response_time", pa.uint32()),
+            ("index", pa.uint16()),
+        ]
+    )
+
+
+def write_arrow(file, format="parquet", chunk_size=DEFAULT_CHUNK_SIZE, kind="responses"):
+    """Write the export to ``file`` (path or binary file) as Parquet or Arrow IPC."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(kind)
+    if format == "parquet":
+        writer = pq.ParquetWriter(file, schema)
+    else:
+        writer = pa.ipc.new_file(file, schema)
+
+    with writer:
+        for chunk in iter_chunks(chunk_size, kind):
+            columns = [
+                pa.array(values, type=field.type)
+                for values, field in zip(zip(*chunk), schema)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
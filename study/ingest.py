@@ -0,0 +1,147 @@
+"""Bulk import of texts (``manage.py ingest_texts``).
+
+Texts are read one at a time from a directory tree of ``.txt`` files, a
+JSONL file or a CSV file and inserted with ``bulk_create`` in batches, all
+in one transaction, so memory use only depends on the batch size. Texts
+whose content hash (``models.body_hash``) already exists in the study, or
+appeared earlier in the same import, are skipped, so a second run over the
+same files inserts nothing.
+
+Records have a ``body`` (or ``text``), an optional ``title`` and an
+``origin`` (``ai``/``human``, or ``label``). In a directory tree the title
+is the file name and the origin the first directory named ``ai`` or
+``human`` on the path; ``--origin`` sets it for records without one.
+"""
+
+import csv
+import json
+import os
+import sys
+from pathlib import Path
+
+from django.db import transaction
+
+from .corpus import bump_version
+from .models import TextItem, body_hash
+
+FORMATS = ("dir", "jsonl", "csv")
+TEXT_SUFFIXES = (".txt", ".md")
+ORIGINS = {origin for origin, _ in TextItem.TEXT_ORIGIN_CHOICES}
+TITLE_LENGTH = TextItem._meta.get_field("title").max_length
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def detect_format(source):
+    path = Path(source)
+    if path.is_dir():
+        return "dir"
+    suffix = path.suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if suffix == ".csv":
+        return "csv"
+    raise ValueError(f"Cannot tell the format of {source}, use --format.")
+
+
+def read_directory(root):
+    root = Path(root)
+    for directory, dirs, files in os.walk(root):
+        # Feste Reihenfolge, damit Duplikate immer gleich aufgelöst werden
+        dirs.sort()
+        parts = Path(directory).relative_to(root).parts
+        origin = next((part.lower() for part in parts if part.lower() in ORIGINS), None)
+        for name in sorted(files):
+            path = Path(directory, name)
+            if path.suffix.lower() not in TEXT_SUFFIXES:
+                continue
+            try:
+                body = path.read_text(encoding="utf-8")
+            except UnicodeDecodeError as exc:
+                yield str(path), InvalidRecord(f"not UTF-8 ({exc.reason})")
+                continue
+            yield str(path), {"title": path.stem, "body": body, "origin": origin}
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                record = InvalidRecord(f"invalid JSON ({exc})")
+            yield f"{path}:{number}", record
+
+
+def read_csv(path):
+    # Aufsätze sind länger als das Standardlimit von 128 KiB pro Feld
+    csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+    with open(path, encoding="utf-8", newline="") as f:
+        for number, record in enumerate(csv.DictReader(f), start=2):
+            yield f"{path}:{number}", record
+
+
+READERS = {"dir": read_directory, "jsonl": read_jsonl, "csv": read_csv}
+
+
+def _text_item(record, study, origin):
+    if isinstance(record, InvalidRecord):
+        raise record
+    if not isinstance(record, dict):
+        raise InvalidRecord("not an object")
+    body = record.get("body") or record.get("text") or ""
+    if not isinstance(body, str) or not body.strip():
+        raise InvalidRecord("empty body")
+    record_origin = record.get("origin") or record.get("label") or origin or ""
+    if not isinstance(record_origin, str) or record_origin.strip().lower() not in ORIGINS:
+        raise InvalidRecord(f"origin must be one of {', '.join(sorted(ORIGINS))}")
+    title = record.get("title") or ""
+    if not isinstance(title, str):
+        raise InvalidRecord("title must be a string")
+    return TextItem(
+        study=study,
+        title=title.strip()[:TITLE_LENGTH],
+        body=body,
+        origin=record_origin.strip().lower(),
+        content_hash=body_hash(body),
+    )
+
+
+def ingest(records, study, origin=None, batch_size=1000, dry_run=False, on_invalid=None):
+    """Insert (location, record) pairs into a study; returns the counts"""
+    counts = {"created": 0, "duplicates": 0, "invalid": 0}
+    with transaction.atomic():
+        seen = set(study.texts.values_list("content_hash", flat=True))
+        batch = []
+        for location, record in records:
+            try:
+                item = _text_item(record, study, origin)
+            except InvalidRecord as exc:
+                counts["invalid"] += 1
+                if on_invalid is not None:
+                    on_invalid(location, exc)
+                continue
+            if item.content_hash in seen:
+                counts["duplicates"] += 1
+                continue
+            seen.add(item.content_hash)
+            batch.append(item)
+            if len(batch) >= batch_size:
+                counts["created"] += _flush(batch, dry_run)
+                batch = []
+        counts["created"] += _flush(batch, dry_run)
+
+        # bulk_create löst keine Signale aus, siehe signals.py
+        if counts["created"] and not dry_run:
+            transaction.on_commit(bump_version)
+    return counts
+
+
+def _flush(batch, dry_run):
+    if batch and not dry_run:
+        TextItem.objects.bulk_create(batch)
+    return len(batch)
@@ -0,0 +1,37 @@
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORT_RULE = re.compile(
+    r"^[ \t]*@import\s+(?:url\([^)]*\)|\"[^\"]*\"|'[^']*')[^;]*;[ \t]*$", re.MULTILINE
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Concatenate the stylesheets of every entry in CSS_BUNDLES into one file in "
+        "STATIC_BUILD_DIR. Run before collectstatic when STATIC_BUNDLE_CSS=1."
+    )
+
+    # Das Build-Verzeichnis existiert beim ersten Lauf noch nicht (staticfiles.W004)
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        for name, parts in settings.CSS_BUNDLES.items():
+            imports, bodies = [], []
+            for part in parts:
+                path = finders.find(part)
+                if path is None:
+                    raise CommandError(f"Stylesheet {part} of {name} not found.")
+                with open(path, encoding="utf-8") as f:
+                    css = f.read()
+                # @import ist nur am Anfang einer Datei gültig
+                imports += [rule.strip() for rule in IMPORT_RULE.findall(css)]
+                bodies.append(f"/* {part} */\n{IMPORT_RULE.sub('', css).strip()}\n")
+
+            target = settings.STATIC_BUILD_DIR / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text("\n".join(imports + bodies), encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Wrote {target} ({len(parts)} files)."))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from study import writebehind
+
+
+class Command(BaseCommand):
+    help = (
+        "Store the responses queued in write-behind mode (STUDY_WRITE_BEHIND) in the "
+        "database. With --loop the queue is drained continuously."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep running and drain new responses."
+        )
+        parser.add_argument(
+            "--interval", type=float, default=0.5,
+            help="Seconds to wait when the queue is empty (with --loop).",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            claimed, inserted = writebehind.drain(batch_size=options["batch_size"])
+            total += inserted
+            if claimed:
+                if options["loop"]:
+                    self.stdout.write(f"Stored {inserted} of {claimed} queued response(s).")
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Stored {total} response(s)."))
@@ -0,0 +1,46 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from study.export import DEFAULT_CHUNK_SIZE, FORMATS, iter_csv, write_arrow
+
+
+class Command(BaseCommand):
+    help = "Export all responses as CSV, Parquet or Arrow without loading them into memory."
+    kind = "responses"
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Output file, or - for CSV on stdout.")
+        parser.add_argument("--format", choices=FORMATS, help="Default: from the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        format = options["format"] or output.rsplit(".", 1)[-1].lower()
+        if format == "feather":
+            format = "arrow"
+        if format not in FORMATS:
+            raise CommandError(f"Unknown format {format!r}, use --format ({', '.join(FORMATS)}).")
+
+        started = time.perf_counter()
+        if format == "csv":
+            file = sys.stdout if output == "-" else open(output, "w", newline="")
+            try:
+                for chunk in iter_csv(options["chunk_size"], self.kind):
+                    file.write(chunk)
+            finally:
+                if file is not sys.stdout:
+                    file.close()
+        else:
+            if output == "-":
+                raise CommandError(f"{format} output needs a file name.")
+            try:
+                write_arrow(output, format, options["chunk_size"], self.kind)
+            except ImportError:
+                raise CommandError(f"{format} export needs pyarrow: pip install pyarrow")
+
+        if output != "-":
+            self.stderr.write(
+                f"Exported to {output} in {time.perf_counter() - started:.1f}s."
+            )
@@ -0,0 +1,9 @@
+from .export_responses import Command as ExportCommand
+
+
+class Command(ExportCommand):
+    help = (
+        "Export all texts with their bodies as CSV, Parquet or Arrow, e.g. for the text "
+        "features of the analysis (responses/script.py --texts)."
+    )
+    kind = "texts"
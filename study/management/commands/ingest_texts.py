@@ -0,0 +1,64 @@
+import itertools
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from study.ingest import FORMATS, ORIGINS, READERS, detect_format, ingest
+from study.models import Study
+
+
+class Command(BaseCommand):
+    help = (
+        "Import texts from directories of .txt files, JSONL or CSV files into a study. "
+        "Texts that are already in the study (same content) are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("sources", nargs="+", help="Directories, .jsonl or .csv files.")
+        parser.add_argument("--study", help="Study slug (default: STUDY_DEFAULT).")
+        parser.add_argument("--format", choices=FORMATS, help="Default: from each source.")
+        parser.add_argument(
+            "--origin", choices=sorted(ORIGINS), help="Origin of records that have none."
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report what would be imported."
+        )
+
+    def handle(self, *args, **options):
+        slug = options["study"] or settings.STUDY_DEFAULT
+        try:
+            study = Study.objects.get(slug=slug)
+        except Study.DoesNotExist:
+            raise CommandError(f"Study {slug!r} does not exist.")
+
+        readers = []
+        for source in options["sources"]:
+            try:
+                format = options["format"] or detect_format(source)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            readers.append(READERS[format](source))
+
+        def invalid(location, exc):
+            self.stderr.write(f"Skipped {location}: {exc}")
+
+        started = time.perf_counter()
+        try:
+            counts = ingest(
+                itertools.chain.from_iterable(readers), study,
+                origin=options["origin"], batch_size=options["batch_size"],
+                dry_run=options["dry_run"], on_invalid=invalid,
+            )
+        except OSError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        processed = sum(counts.values())
+        verb = "Would import" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {counts['created']} text(s) into {study}, skipped {counts['duplicates']} "
+            f"duplicate(s) and {counts['invalid']} invalid record(s) in {elapsed:.1f}s "
+            f"({processed / elapsed if elapsed else 0:.0f} records/s)."
+        ))
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions. With --older-than, also delete participant sessions "
+        "that have not been used for that many days. Sessions of logged-in admin users "
+        "are kept unless --all is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than", type=float, metavar="DAYS",
+            help="Also delete participant sessions without activity for DAYS days.",
+        )
+        parser.add_argument(
+            "--all", action="store_true", help="Delete every session, including admin logins."
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted, _ = Session.objects.filter(expire_date__lt=now).delete()
+
+        if options["all"]:
+            deleted += Session.objects.all().delete()[0]
+        elif options["older_than"] is not None:
+            # Jede Änderung der Session setzt expire_date auf jetzt + SESSION_COOKIE_AGE,
+            # die letzte Aktivität liegt also SESSION_COOKIE_AGE vor expire_date
+            cutoff = (
+                now - timedelta(days=options["older_than"])
+                + timedelta(seconds=settings.SESSION_COOKIE_AGE)
+            )
+            deleted += self.purge_participants(cutoff, options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} session(s)."))
+
+    def purge_participants(self, cutoff, batch_size):
+        deleted = 0
+        batch = []
+        sessions = Session.objects.filter(expire_date__lt=cutoff)
+        for session in sessions.iterator(chunk_size=batch_size):
+            if "_auth_user_id" not in session.get_decoded():
+                batch.append(session.session_key)
+            if len(batch) >= batch_size:
+                deleted += Session.objects.filter(session_key__in=batch).delete()[0]
+                batch = []
+        if batch:
+            deleted += Session.objects.filter(session_key__in=batch).delete()[0]
+        return deleted
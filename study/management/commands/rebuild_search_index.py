@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from study import search
+
+
+class Command(BaseCommand):
+    help = "Create the full-text index of the texts if needed and fill it from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        search.rebuild(options["database"])
+        if search.available(options["database"]):
+            self.stdout.write(self.style.SUCCESS("Rebuilt the full-text index."))
+        else:
+            self.stdout.write("No full-text index for this database, the admin uses LIKE.")
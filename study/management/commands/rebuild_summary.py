@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from study import summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-text response counters and the per-study participant counters "
+        "of the admin dashboard, e.g. after importing responses or editing them in the admin."
+    )
+
+    def handle(self, *args, **options):
+        texts = summary.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the counters of {texts} text(s)."))
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:18
+
+import sys
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_responses(apps, schema_editor):
+    # Doppelt abgeschickte Antworten verhindern sonst den Unique-Constraint,
+    # die erste Antwort je Teilnehmer und Position bleibt
+    Response = apps.get_model('study', 'Response')
+    keep = (
+        Response.objects.values('participant_id', 'index')
+        .annotate(first_id=Min('id'))
+        .values('first_id')
+    )
+    duplicates = Response.objects.exclude(id__in=keep)
+    removed = list(duplicates.order_by('id').values_list('id', flat=True))
+    if not removed:
+        return
+    duplicates.delete()
+    sys.stdout.write(
+        f"\n  Removed {len(removed)} duplicate response(s) (same participant and index, "
+        f"the first one was kept), ids: {', '.join(map(str, removed))}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0002_participant_response'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_responses, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='response',
+            name='participant',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='responses', to='study.participant'),
+        ),
+        migrations.AlterField(
+            model_name='response',
+            name='text',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='study.textitem'),
+        ),
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['text', 'classification'], name='response_text_class_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['classification'], name='response_class_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='response',
+            constraint=models.UniqueConstraint(fields=('participant', 'index'), name='unique_response_position'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_summary(apps, schema_editor):
+    # Zählerstände für die bereits vorhandenen Antworten
+    Response = apps.get_model('study', 'Response')
+    TextSummary = apps.get_model('study', 'TextSummary')
+    counts = Response.objects.values('text_id').annotate(
+        responses=Count('id'), classified_ai=Count('id', filter=Q(classification='ai'))
+    )
+    TextSummary.objects.bulk_create(
+        [TextSummary(text_id=row['text_id'], responses=row['responses'],
+                     classified_ai=row['classified_ai']) for row in counts]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0003_response_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextSummary',
+            fields=[
+                ('text', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='study.textitem')),
+                ('responses', models.PositiveIntegerField(default=0)),
+                ('classified_ai', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'text summaries',
+            },
+        ),
+        migrations.RunPython(fill_summary, migrations.RunPython.noop),
+    ]
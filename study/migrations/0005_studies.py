@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_default_study(apps, schema_editor):
+    # Bisherige Texte und Teilnehmende bilden die erste Studie
+    Study = apps.get_model('study', 'Study')
+    study = Study.objects.create(name='Default study', slug='default')
+    apps.get_model('study', 'TextItem').objects.update(study=study)
+    apps.get_model('study', 'Participant').objects.update(study=study)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0004_text_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Study',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('slug', models.SlugField(unique=True)),
+                ('sample_size', models.PositiveIntegerField(blank=True, help_text='Texts shown to each participant (empty: all texts of the study)', null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'studies',
+            },
+        ),
+        migrations.AddField(
+            model_name='textitem',
+            name='study',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='texts', to='study.study'),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='study',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='study.study'),
+        ),
+        migrations.RunPython(create_default_study, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='textitem',
+            name='study',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='texts', to='study.study'),
+        ),
+        migrations.AlterField(
+            model_name='participant',
+            name='study',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='study.study'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['study', 'created_at'], name='participant_study_idx'),
+        ),
+    ]
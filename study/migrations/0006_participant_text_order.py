@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0005_studies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='text_order',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
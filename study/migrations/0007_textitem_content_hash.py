@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:10
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_content_hash(apps, schema_editor):
+    # Wie models.body_hash; historische Modelle kennen die Funktion nicht
+    TextItem = apps.get_model('study', 'TextItem')
+    batch = []
+    for text in TextItem.objects.only('id', 'body').iterator(chunk_size=1000):
+        normalized = text.body.replace('\r\n', '\n').strip()
+        text.content_hash = hashlib.sha256(normalized.encode()).hexdigest()
+        batch.append(text)
+        if len(batch) == 1000:
+            TextItem.objects.bulk_update(batch, ['content_hash'])
+            batch = []
+    TextItem.objects.bulk_update(batch, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0006_participant_text_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='textitem',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(fill_content_hash, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='textitem',
+            index=models.Index(fields=['study', 'content_hash'], name='textitem_study_hash_idx'),
+        ),
+    ]
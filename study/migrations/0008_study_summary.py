@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_summary(apps, schema_editor):
+    # Zählerstände für die bereits vorhandenen Teilnehmenden
+    Study = apps.get_model('study', 'Study')
+    StudySummary = apps.get_model('study', 'StudySummary')
+    StudySummary.objects.bulk_create(
+        [StudySummary(study_id=study_id, participants=count) for study_id, count in
+         Study.objects.annotate(count=Count('participants')).values_list('id', 'count')]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0007_textitem_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudySummary',
+            fields=[
+                ('study', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='study.study')),
+                ('participants', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'study summaries',
+            },
+        ),
+        migrations.RunPython(fill_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+def number_participants(apps, schema_editor):
+    # Bisherige Teilnehmende je Studie in der Reihenfolge ihrer Anmeldung durchnummerieren
+    Participant = apps.get_model('study', 'Participant')
+    StudySummary = apps.get_model('study', 'StudySummary')
+    counts = {}
+    batch = []
+    for participant in Participant.objects.order_by('id').only('id', 'study_id').iterator():
+        counts[participant.study_id] = participant.sequence = counts.get(participant.study_id, 0) + 1
+        batch.append(participant)
+        if len(batch) >= 1000:
+            Participant.objects.bulk_update(batch, ['sequence'])
+            batch = []
+    Participant.objects.bulk_update(batch, ['sequence'])
+    for study_id, count in counts.items():
+        StudySummary.objects.update_or_create(study_id=study_id, defaults={'sequence': count})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0008_study_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='sequence',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studysummary',
+            name='sequence',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(number_participants, migrations.RunPython.noop),
+    ]
@@ -1,37 +1,92 @@
+import hashlib
+
 from django.db import models
 
 
+def body_hash(body):
+    # Zeilenenden und Leerraum am Rand zählen nicht als Änderung
+    normalized = body.replace("\r\n", "\n").strip()
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class Study(models.Model):
+    # Eigener Textpool pro Studie; jede Person sieht sample_size Texte daraus
+    name = models.CharField(max_length=200)
+    slug = models.SlugField(unique=True)
+    sample_size = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text="Texts shown to each participant (empty: all texts of the study)",
+    )
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "studies"
+
+    def __str__(self):
+        return self.name
+
+
 class TextItem(models.Model):
     TEXT_ORIGIN_CHOICES = [
         ("human", "Human-written"),
         ("ai", "AI-generated"),
     ]
 
+    study = models.ForeignKey(Study, on_delete=models.CASCADE, related_name="texts")
     title = models.CharField(max_length=200, blank=True)
     body = models.TextField()
     origin = models.CharField(max_length=5, choices=TEXT_ORIGIN_CHOICES)
+    # SHA-256 des Textes: Duplikate beim Import, Schlüssel des Render-Caches
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["study", "content_hash"], name="textitem_study_hash_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title or 'Text'} ({self.origin})"
 
+    def save(self, *args, **kwargs):
+        self.content_hash = body_hash(self.body)
+        if kwargs.get("update_fields") is not None and "body" in kwargs["update_fields"]:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "content_hash"}
+        super().save(*args, **kwargs)
+
 
 class Participant(models.Model):
+    # Index über (study, created_at) in Meta
+    study = models.ForeignKey(
+        Study, on_delete=models.CASCADE, related_name="participants", db_index=False
+    )
     name = models.CharField(max_length=200)
     experience = models.PositiveIntegerField(
         help_text="Years of teaching experience in this field of study"
     )
     department = models.CharField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Beim Start festgelegt, siehe progress.py
+    text_order = models.JSONField(null=True, blank=True, editable=False)
+    # Laufende Nummer innerhalb der Studie (Zeile des lateinischen Quadrats)
+    sequence = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["study", "created_at"], name="participant_study_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
 
 class Response(models.Model):
+    # Die Einzelindizes der Fremdschlüssel werden durch die zusammengesetzten
+    # Indizes in Meta abgedeckt
     participant = models.ForeignKey(
-        Participant, on_delete=models.CASCADE, related_name="responses"
+        Participant, on_delete=models.CASCADE, related_name="responses", db_index=False
     )
-    text = models.ForeignKey(TextItem, on_delete=models.CASCADE)
+    text = models.ForeignKey(TextItem, on_delete=models.CASCADE, db_index=False)
     classification = models.CharField(
         max_length=5, choices=TextItem.TEXT_ORIGIN_CHOICES
     )
@@ -39,5 +94,62 @@ class Response(models.Model):
     response_time = models.PositiveIntegerField(help_text="Time in milliseconds")
     index = models.PositiveSmallIntegerField(help_text="Order of the text shown")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["text", "classification"], name="response_text_class_idx"),
+            models.Index(fields=["classification"], name="response_class_idx"),
+        ]
+        constraints = [
+            # Auch der Index für finish (participant_id, sortiert nach index)
+            models.UniqueConstraint(
+                fields=["participant", "index"], name="unique_response_position"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.participant.name} - {self.text} ({self.classification})"
+
+
+class TextSummary(models.Model):
+    # Laufende Zählerstände pro Text für das Dashboard, siehe summary.py
+    text = models.OneToOneField(
+        TextItem, on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    responses = models.PositiveIntegerField(default=0)
+    classified_ai = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "text summaries"
+
+    def __str__(self):
+        return f"{self.text}: {self.responses} responses"
+
+    @property
+    def correct(self):
+        if self.text.origin == "ai":
+            return self.classified_ai
+        return self.responses - self.classified_ai
+
+
+class StudySummary(models.Model):
+    # Laufende Zahl der Teilnehmenden pro Studie, siehe summary.py
+    study = models.OneToOneField(
+        Study, on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    participants = models.PositiveIntegerField(default=0)
+    # Zuletzt vergebene Participant.sequence, wird beim Löschen nicht verringert
+    sequence = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "study summaries"
+
+    def __str__(self):
+        return f"{self.study}: {self.participants} participants"
+
+
+class CorpusVersion(models.Model):
+    # Eine einzige Zeile: Version des Corpus für alle Prozesse, siehe corpus.py
+    version = models.CharField(max_length=32)
+
+    def __str__(self):
+        return self.version
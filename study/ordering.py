@@ -0,0 +1,76 @@
+"""Deterministic presentation orders.
+
+The order of the texts for a participant is a pure function of the study
+seed, the participant's number within their study and the set of text
+ids. It is computed once when a participant starts and stored with them
+(``progress.py``), because the pool may change during a study, but it can
+be reproduced later, e.g. by the analysis, from the pool at that time::
+
+    from study.ordering import text_order
+    text_order(seed, participant.sequence, text_ids, strategy="balanced")
+
+With ``sample_size`` only the first ``sample_size`` texts of the order are
+shown (``random`` draws them with ``random.sample``). For ``latin`` and
+``balanced`` every text still appears equally often at each of these
+positions over a full cycle of participants.
+
+This module only uses the standard library and can be imported without
+Django.
+
+Strategies:
+
+- ``random``: an independent shuffle per participant.
+- ``latin``: cyclic Latin square over a seeded base order; over every ``n``
+  consecutive participant numbers each text appears once at each position.
+- ``balanced``: Williams design; like ``latin``, and in addition every text
+  directly follows every other text equally often (over ``n`` participants
+  for an even number of texts, ``2n`` for an odd number).
+"""
+
+import random
+
+STRATEGIES = ("random", "latin", "balanced")
+
+
+def text_order(seed, number, text_ids, strategy="random", sample_size=None):
+    order = _full_order(seed, number, text_ids, strategy, sample_size)
+    return order if sample_size is None else order[:sample_size]
+
+
+def _full_order(seed, number, text_ids, strategy, sample_size):
+    text_ids = sorted(text_ids)
+    n = len(text_ids)
+    if n == 0:
+        return []
+
+    if strategy == "random":
+        rng = random.Random(f"{seed}:{number}")
+        if sample_size is not None and sample_size < n:
+            return rng.sample(text_ids, sample_size)
+        rng.shuffle(text_ids)
+        return text_ids
+
+    # Gleiche Grundreihenfolge für alle Teilnehmenden, damit die Zeilen des
+    # Quadrats zusammenpassen
+    random.Random(f"{seed}").shuffle(text_ids)
+
+    if strategy == "latin":
+        row = number % n
+        return [text_ids[(row + j) % n] for j in range(n)]
+
+    if strategy == "balanced":
+        rows = n if n % 2 == 0 else 2 * n
+        row = number % rows
+        order = [text_ids[(_williams(j, n) + row) % n] for j in range(n)]
+        return order if row < n else order[::-1]
+
+    raise ValueError(f"Unknown ordering strategy: {strategy!r}")
+
+
+def _williams(j, n):
+    # Erste Zeile des Williams-Designs: 0, 1, n-1, 2, n-2, ...
+    if j == 0:
+        return 0
+    if j % 2 == 1:
+        return (j + 1) // 2
+    return n - j // 2
@@ -0,0 +1,202 @@
+"""Where a participant's progress through the study is kept.
+
+The text order is fixed when a participant starts: computed from
+``STUDY_ORDER_SEED``, the participant and the study's text pool (see
+``ordering.py``) or assigned adaptively (``assignment.py``), and stored on
+the participant (``Participant.text_order``). Recomputing it on every
+request would reshuffle everyone in progress as soon as a text is added or
+deleted or the sample size changes. The progress itself is the participant
+id, the study, the current index and that order. With
+``STUDY_PROGRESS = "session"`` (default) it lives in ``request.session``.
+With ``"token"`` it is carried in a signed token in the query string
+instead, so the participant views never read or write the session table.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.shortcuts import resolve_url
+
+from . import assignment, summary
+from .corpus import aget_corpus, get_corpus
+from .ordering import text_order
+
+TOKEN_PARAM = "p"
+TOKEN_SALT = "study.progress"
+
+
+class Progress:
+    def __init__(self, participant_id, text_order, current_index=0, study_id=None):
+        self.participant_id = participant_id
+        self.text_order = text_order
+        self.current_index = current_index
+        self.study_id = study_id
+
+    @property
+    def finished(self):
+        return self.current_index >= len(self.text_order)
+
+
+def order_for(number, study_id=None, corpus=None):
+    """The order for a new participant from the current pool of their study.
+
+    ``number`` is the participant's number within the study
+    (``Participant.sequence``), so the rows of the Latin square are balanced
+    per study even when several studies run at the same time.
+    """
+    corpus = corpus or get_corpus()
+    strategy = settings.STUDY_ORDER_STRATEGY
+    if strategy == assignment.ADAPTIVE:
+        # Nur für Fortschritt ohne gespeicherte Reihenfolge (vor dem Umstellen begonnen)
+        strategy = "random"
+    return text_order(
+        settings.STUDY_ORDER_SEED,
+        number,
+        corpus.pool(study_id),
+        strategy,
+        corpus.sample_size(study_id),
+    )
+
+
+async def aorder_for(number, study_id=None):
+    return order_for(number, study_id, await aget_corpus())
+
+
+def uses_token():
+    return settings.STUDY_PROGRESS == "token"
+
+
+def _assign(participant):
+    corpus = get_corpus()
+    study_id = participant.study_id
+    return assignment.assign(study_id, corpus.pool(study_id), corpus.sample_size(study_id))
+
+
+def _progress(participant, reservation):
+    if reservation is not None:
+        assignment.bind(reservation, participant.id)
+    return Progress(participant.id, participant.text_order, study_id=participant.study_id)
+
+
+@transaction.atomic
+def _create(participant):
+    # Teilnehmer, Zähler der Studie und Reihenfolge gemeinsam
+    participant.sequence = summary.next_sequence(participant.study_id)
+    if participant.text_order is None:
+        participant.text_order = order_for(participant.sequence, participant.study_id)
+    participant.save()
+
+
+def begin(request, participant):
+    """Save a new participant and start their progress"""
+    reservation = None
+    if settings.STUDY_ORDER_STRATEGY == assignment.ADAPTIVE:
+        reservation = _assign(participant)
+        participant.text_order = reservation.order
+    _create(participant)
+    progress = _progress(participant, reservation)
+    save(request, progress)
+    return progress
+
+
+async def abegin(request, participant):
+    reservation = None
+    if settings.STUDY_ORDER_STRATEGY == assignment.ADAPTIVE:
+        reservation = await sync_to_async(_assign)(participant)
+        participant.text_order = reservation.order
+    # Das async ORM kennt keine Transaktionen
+    await sync_to_async(_create)(participant)
+    progress = _progress(participant, reservation)
+    await asave(request, progress)
+    return progress
+
+
+def _load_token(request):
+    token = request.GET.get(TOKEN_PARAM)
+    if not token:
+        return None
+    try:
+        # Ältere Tokens haben keine Studie bzw. keine Reihenfolge
+        participant_id, current_index, *rest = signing.loads(token, salt=TOKEN_SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    study_id, order = (rest + [None, None])[:2]
+    return participant_id, current_index, study_id, order
+
+
+def load(request):
+    if uses_token():
+        state = _load_token(request)
+        if state is None:
+            return None
+        participant_id, current_index, study_id, order = state
+        if order is None:
+            # Token von vor dem Speichern der Reihenfolge, ab jetzt mitgeführt
+            # (damals aus der Teilnehmer-ID berechnet)
+            order = order_for(participant_id, study_id)
+        return Progress(participant_id, order, current_index, study_id)
+
+    participant_id = request.session.get("participant_id")
+    if participant_id is None:
+        return None
+    study_id = request.session.get("study_id")
+    order = request.session.get("text_order")
+    current_index = request.session.get("current_index", 0)
+    if not order:
+        # Session von vor dem Speichern der Reihenfolge, ab jetzt mitgeführt
+        order = order_for(participant_id, study_id)
+    return Progress(participant_id, order, current_index, study_id)
+
+
+async def aload(request):
+    if uses_token():
+        state = _load_token(request)
+        if state is None:
+            return None
+        participant_id, current_index, study_id, order = state
+        if order is None:
+            order = await aorder_for(participant_id, study_id)
+        return Progress(participant_id, order, current_index, study_id)
+
+    participant_id = await request.session.aget("participant_id")
+    if participant_id is None:
+        return None
+    study_id = await request.session.aget("study_id")
+    order = await request.session.aget("text_order")
+    current_index = await request.session.aget("current_index", 0)
+    if not order:
+        order = await aorder_for(participant_id, study_id)
+    return Progress(participant_id, order, current_index, study_id)
+
+
+def save(request, progress):
+    # Im Token-Modus steckt der Stand in der URL, siehe url()
+    if uses_token():
+        return
+    request.session["participant_id"] = progress.participant_id
+    request.session["study_id"] = progress.study_id
+    request.session["current_index"] = progress.current_index
+    request.session["text_order"] = progress.text_order
+
+
+async def asave(request, progress):
+    if uses_token():
+        return
+    await request.session.aset("participant_id", progress.participant_id)
+    await request.session.aset("study_id", progress.study_id)
+    await request.session.aset("current_index", progress.current_index)
+    await request.session.aset("text_order", progress.text_order)
+
+
+def dumps(progress):
+    state = [progress.participant_id, progress.current_index, progress.study_id,
+             progress.text_order]
+    return signing.dumps(state, salt=TOKEN_SALT, compress=True)
+
+
+def url(to, progress, *args, **kwargs):
+    location = resolve_url(to, *args, **kwargs)
+    if uses_token():
+        location = f"{location}?{TOKEN_PARAM}={dumps(progress)}"
+    return location
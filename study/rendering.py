@@ -0,0 +1,75 @@
+"""LRU cache of the rendered text bodies.
+
+``{{ text.body|linebreaks }}`` escapes the whole essay and wraps every
+paragraph on each request, although the result only depends on the body.
+``body_html`` keeps the rendered HTML per worker, keyed by text id and the
+content hash of the body, so an edited text never hits an old entry.
+``STUDY_BODY_CACHE_SIZE`` bounds the cache in characters of HTML; the
+least recently used bodies are dropped first. Saving or deleting a text
+removes its entries (``signals.py``), and with ``STUDY_PRERENDER_BODIES``
+every body is rendered as soon as a worker loads the corpus, so the text
+pages only render the form around it.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.template.defaultfilters import linebreaks_filter
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_size = 0
+
+
+def _key(text):
+    # content_hash wird beim Speichern gesetzt, sonst selbst hashen
+    return text.id, text.content_hash or hashlib.blake2b(text.body.encode()).hexdigest()
+
+
+def body_html(text):
+    """The body of a TextItem rendered like ``|linebreaks``"""
+    global _size
+
+    key = _key(text)
+    with _lock:
+        html = _entries.get(key)
+        if html is not None:
+            _entries.move_to_end(key)
+            return html
+
+    html = linebreaks_filter(text.body)
+    limit = settings.STUDY_BODY_CACHE_SIZE
+    if len(html) > limit:
+        return html
+    with _lock:
+        if key not in _entries:
+            _entries[key] = html
+            _size += len(html)
+        while _size > limit:
+            _, dropped = _entries.popitem(last=False)
+            _size -= len(dropped)
+    return html
+
+
+def discard(text_id):
+    """Drop every cached rendering of one text"""
+    global _size
+
+    with _lock:
+        for key in [key for key in _entries if key[0] == text_id]:
+            _size -= len(_entries.pop(key))
+
+
+def clear():
+    global _size
+
+    with _lock:
+        _entries.clear()
+        _size = 0
+
+
+def prerender(texts):
+    for text in texts:
+        body_html(text)
@@ -0,0 +1,130 @@
+"""Full-text search over the titles and bodies of the texts.
+
+``search_fields`` in the admin becomes ``LIKE '%term%'`` over every body.
+Instead, ``TextItemAdmin`` looks terms up in a full-text index:
+
+- SQLite: an FTS5 table ``study_textitem_fts`` with ``study_textitem`` as
+  external content. Triggers keep it in sync on every insert, update and
+  delete, including ``bulk_create`` and changes outside Django.
+- PostgreSQL: a GIN index over ``to_tsvector('simple', title || ' ' || body)``.
+
+Every search word matches as a prefix, all words must occur. ``install``
+creates the index after each ``migrate`` (``apps.py``), because Django
+rebuilds SQLite tables on schema changes and drops their triggers; it then
+fills the index again. ``manage.py rebuild_search_index`` does the same by
+hand. Other databases and SQLite builds without FTS5 keep the ``LIKE``
+search.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from django.db.utils import OperationalError
+
+FTS_TABLE = "study_textitem_fts"
+PG_INDEX = "study_textitem_fts_idx"
+PG_VECTOR = "to_tsvector('simple', title || ' ' || body)"
+
+SQLITE_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    title, body, content='study_textitem', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+SQLITE_TRIGGERS = {
+    f"{FTS_TABLE}_insert": f"""
+        CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON study_textitem BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (new.id, new.title, new.body);
+        END
+    """,
+    f"{FTS_TABLE}_delete": f"""
+        CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON study_textitem BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+        END
+    """,
+    f"{FTS_TABLE}_update": f"""
+        CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF title, body ON study_textitem BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+            INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (new.id, new.title, new.body);
+        END
+    """,
+}
+
+WORD = re.compile(r"\w+")
+
+_available = {}
+
+
+def install(using="default"):
+    """Create the index (and its triggers) if missing; returns True if it had to"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON study_textitem USING GIN ({PG_VECTOR})"
+            )
+            return False
+        if connection.vendor != "sqlite":
+            return False
+
+        try:
+            cursor.execute(SQLITE_TABLE)
+        except OperationalError:
+            # SQLite ohne FTS5
+            _available[using] = False
+            return False
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'study_textitem'"
+        )
+        existing = {name for name, in cursor.fetchall()}
+        missing = [sql for name, sql in SQLITE_TRIGGERS.items() if name not in existing]
+        for sql in missing:
+            cursor.execute(sql)
+        if missing:
+            # Änderungen ohne Trigger (z.B. Tabellenumbau) nachholen
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+    _available.pop(using, None)
+    return bool(missing)
+
+
+def rebuild(using="default"):
+    if install(using):
+        return
+    if connections[using].vendor == "sqlite" and available(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def available(using="default"):
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor != "sqlite":
+        return False
+    if using not in _available:
+        _available[using] = FTS_TABLE in connection.introspection.table_names()
+    return _available[using]
+
+
+def _query(words, vendor):
+    if vendor == "postgresql":
+        return " & ".join(f"{word}:*" for word in words)
+    # FTS5: jedes Wort als Phrase mit Präfixsuche, Anführungszeichen sind in \w nicht enthalten
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def matching(queryset, term):
+    """Restrict a TextItem queryset to texts matching all words of the term"""
+    words = WORD.findall(term)
+    if not words:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        sql = f"SELECT id FROM study_textitem WHERE {PG_VECTOR} @@ to_tsquery('simple', %s)"
+    else:
+        sql = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+    return queryset.filter(id__in=RawSQL(sql, [_query(words, vendor)]))
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import rendering, summary
+from .corpus import bump_version
+from .models import Participant, Response, Study, StudySummary, TextItem
+
+
+@receiver([post_save, post_delete], sender=TextItem)
+def invalidate_corpus(sender, **kwargs):
+    # Erst nach dem Commit, sonst laden andere Worker den alten Stand neu
+    transaction.on_commit(bump_version)
+    rendering.discard(kwargs["instance"].id)
+
+
+@receiver([post_save, post_delete], sender=Study)
+def invalidate_studies(sender, **kwargs):
+    transaction.on_commit(bump_version)
+    if kwargs.get("created"):
+        StudySummary.objects.create(study=kwargs["instance"])
+
+
+@receiver(post_delete, sender=Response)
+def discard_response(sender, instance, **kwargs):
+    # Gleiche Transaktion wie das Löschen
+    summary.discard([instance])
+
+
+@receiver(post_save, sender=Participant)
+def count_participant(sender, instance, created, **kwargs):
+    if created:
+        summary.add_participant(instance.study_id)
+
+
+@receiver(post_delete, sender=Participant)
+def discard_participant(sender, instance, **kwargs):
+    summary.remove_participant(instance.study_id)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    # DB_PROFILE=sqlite-wal, siehe settings
+    if connection.vendor != "sqlite" or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
@@ -0,0 +1,147 @@
+"""Per-text response counters behind the admin dashboard.
+
+``TextSummary`` holds the number of responses and of "ai" classifications
+per text. The views update it in the same transaction as the responses they
+insert (``record``), deleting responses decrements it (``signals.py``), so
+the dashboard reads one row per text instead of scanning ``Response``.
+Likewise ``StudySummary`` counts the participants of each study, updated
+whenever a participant is created (start page or admin) or deleted, and
+hands out their numbers within the study (``next_sequence``).
+``manage.py rebuild_summary`` recomputes the counters from scratch.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+
+from .models import Participant, Response, StudySummary, TextItem, TextSummary
+
+
+def _apply(counts, sign):
+    for text_id, (responses, classified_ai) in counts.items():
+        rows = TextSummary.objects.filter(text_id=text_id)
+        changes = {
+            "responses": F("responses") + sign * responses,
+            "classified_ai": F("classified_ai") + sign * classified_ai,
+        }
+        if not rows.update(**changes) and sign > 0:
+            # Erste Antwort für diesen Text; get_or_create fängt parallele Anlage ab
+            TextSummary.objects.get_or_create(text_id=text_id)
+            rows.update(**changes)
+
+
+def _count(responses):
+    totals = Counter()
+    ai = Counter()
+    for response in responses:
+        totals[response.text_id] += 1
+        ai[response.text_id] += response.classification == "ai"
+    return {text_id: (totals[text_id], ai[text_id]) for text_id in totals}
+
+
+def record(responses):
+    """Add newly inserted responses to the counters (call inside their transaction)"""
+    _apply(_count(responses), 1)
+
+
+def discard(responses):
+    _apply(_count(responses), -1)
+
+
+def next_sequence(study_id):
+    """Return the number of a new participant within the study.
+
+    Call inside the transaction that saves the participant: the updated row
+    stays locked until the commit, so no other participant gets the same
+    number.
+    """
+    rows = StudySummary.objects.filter(study_id=study_id)
+    if not rows.update(sequence=F("sequence") + 1):
+        StudySummary.objects.get_or_create(study_id=study_id)
+        rows.update(sequence=F("sequence") + 1)
+    return rows.values_list("sequence", flat=True).get()
+
+
+def add_participant(study_id):
+    # Bei jedem neuen Teilnehmer (signals.py), egal ob Startseite oder Admin
+    StudySummary.objects.filter(study_id=study_id).update(participants=F("participants") + 1)
+
+
+def remove_participant(study_id):
+    # Ohne Zähler angelegte Teilnehmende (bulk_create) nicht unter 0 zählen
+    StudySummary.objects.filter(study_id=study_id, participants__gt=0).update(
+        participants=F("participants") - 1
+    )
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute all counters from the Response and Participant tables"""
+    participants = Participant.objects.values("study_id").annotate(
+        participants=Count("id"), sequence=Max("sequence")
+    )
+    StudySummary.objects.all().delete()
+    StudySummary.objects.bulk_create(
+        [StudySummary(study_id=row["study_id"], participants=row["participants"],
+                      sequence=row["sequence"] or 0) for row in participants]
+    )
+
+    counts = Response.objects.values("text_id").annotate(
+        responses=Count("id"), classified_ai=Count("id", filter=Q(classification="ai"))
+    )
+    TextSummary.objects.all().delete()
+    TextSummary.objects.bulk_create(
+        [TextSummary(text_id=row["text_id"], responses=row["responses"],
+                     classified_ai=row["classified_ai"]) for row in counts]
+    )
+    return len(counts)
+
+
+def dashboard(study=None):
+    """Overall accuracy, confusion matrix and per-text accuracy from the counters"""
+    summaries = (
+        TextSummary.objects.select_related("text")
+        .only("responses", "classified_ai", "text__title", "text__origin")
+        .order_by("text_id")
+    )
+    studies = StudySummary.objects.all()
+    if study is not None:
+        summaries = summaries.filter(text__study=study)
+        studies = studies.filter(study=study)
+    confusion = {origin: {"ai": 0, "human": 0} for origin, _ in TextItem.TEXT_ORIGIN_CHOICES}
+    texts = []
+    for summary in summaries:
+        origin = summary.text.origin
+        confusion[origin]["ai"] += summary.classified_ai
+        confusion[origin]["human"] += summary.responses - summary.classified_ai
+        texts.append({
+            "text": summary.text,
+            "responses": summary.responses,
+            "correct": summary.correct,
+            "accuracy": _percent(summary.correct, summary.responses),
+        })
+    texts.sort(key=lambda row: (row["accuracy"] is None, row["accuracy"]))
+
+    responses = sum(row["responses"] for row in texts)
+    correct = sum(row["correct"] for row in texts)
+    by_origin = {
+        origin: {
+            "responses": sum(counts.values()),
+            "correct": counts[origin],
+            "accuracy": _percent(counts[origin], sum(counts.values())),
+        }
+        for origin, counts in confusion.items()
+    }
+    return {
+        "participants": sum(studies.values_list("participants", flat=True)),
+        "responses": responses,
+        "accuracy": _percent(correct, responses),
+        "confusion": confusion,
+        "by_origin": by_origin,
+        "texts": texts,
+    }
+
+
+def _percent(part, whole):
+    return part / whole * 100 if whole else None
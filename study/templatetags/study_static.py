@@ -0,0 +1,15 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def css_bundle(name):
+    # Gebündelt ein Request, sonst die Einzeldateien aus CSS_BUNDLES
+    files = [name] if settings.STATIC_BUNDLE_CSS else settings.CSS_BUNDLES[name]
+    return format_html_join(
+        "\n  ", '<link rel="stylesheet" href="{}">', ((static(path),) for path in files)
+    )
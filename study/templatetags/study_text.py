@@ -0,0 +1,11 @@
+from django import template
+
+from .. import rendering
+
+register = template.Library()
+
+
+@register.filter
+def body_html(text):
+    # Wie text.body|linebreaks, aber aus dem Cache in rendering.py
+    return rendering.body_html(text)
@@ -1,3 +1,1307 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from contextlib import redirect_stdout
+from datetime import timedelta
+from importlib.util import find_spec
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core import signing
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Count, F
+from django.test import (
+    AsyncRequestFactory, Client, RequestFactory, TestCase, TransactionTestCase,
+    override_settings,
+)
+from django.template import Context, Template
+from django.urls import reverse
+
+from . import (
+    assignment, corpus, progress, rendering, search, summary, views, writebehind,
+)
+from .corpus import bump_version, get_corpus
+from .export import EXPORT_FIELDS, arrow_schema, iter_csv
+from .models import (
+    Participant, Response, Study, StudySummary, TextItem, TextSummary, body_hash,
+)
+from .ordering import text_order
+
+
+def make_study(participants, texts, study=None):
+    study = study or Study.objects.get(slug="default")
+    text_items = TextItem.objects.bulk_create(
+        TextItem(study=study, title=f"Text {i}",
+                 body=f"Paragraph {i}\n\n" + "Lorem ipsum. " * 50,
+                 origin="ai" if i % 2 else "human")
+        for i in range(texts)
+    )
+    people = Participant.objects.bulk_create(
+        Participant(study=study, name=f"Participant {i}", experience=i, department="Test")
+        for i in range(participants)
+    )
+    # on_commit läuft in TestCase nicht, der Corpus muss die neuen Texte kennen
+    bump_version()
+    # Antworten in der Reihenfolge, in der die Texte gezeigt wurden
+    Response.objects.bulk_create(
+        Response(participant=participant, text_id=text_id, classification="ai", confidence=3,
+                 response_time=5000, index=position)
+        for participant in people
+        for position, text_id in enumerate(progress.order_for(participant.id, study.id), start=1)
+    )
+    return people, text_items
+
+
+@override_settings(STUDY_PROGRESS="token")
+class FinishQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        rendering.clear()
+
+    def finish_url(self, participant, name="study:finish", **kwargs):
+        order = list(Response.objects.filter(participant=participant)
+                     .order_by("index").values_list("text_id", flat=True))
+        state = progress.Progress(participant.id, order, len(order), participant.study_id)
+        return progress.url(name, state, **kwargs)
+
+    def test_constant_queries(self):
+        for texts in (3, 12):
+            with self.subTest(texts=texts):
+                TextItem.objects.all().delete()
+                (participant,), _ = make_study(1, texts)
+                url = self.finish_url(participant)
+                get_corpus()
+                with self.assertNumQueries(1):
+                    page = self.client.get(url)
+                self.assertEqual(len(page.context["results"]), texts)
+
+    def test_only_excerpts(self):
+        (participant,), text_items = make_study(1, 2)
+        page = self.client.get(self.finish_url(participant))
+        self.assertContains(page, "Paragraph 0")
+        self.assertNotContains(page, "Lorem ipsum. " * 20)
+        self.assertContains(page, self.finish_url(participant, "study:finish_text", index=2))
+
+    def test_full_text(self):
+        (participant,), text_items = make_study(1, 2)
+        url = self.finish_url(participant, "study:finish_text", index=2)
+        get_corpus()
+        with self.assertNumQueries(0):
+            body = self.client.get(url)
+        text = TextItem.objects.get(id=progress.order_for(participant.id, participant.study_id)[1])
+        self.assertContains(body, f"<p>{text.body.splitlines()[0]}</p>")
+        self.assertEqual(
+            self.client.get(self.finish_url(participant, "study:finish_text", index=3)).status_code,
+            404,
+        )
+
+
+class CorpusTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.study = Study.objects.get(slug="default")
+        _, self.texts = make_study(0, 3)
+
+    def test_snapshot_is_reused(self):
+        snapshot = get_corpus()
+        self.assertEqual(snapshot.pool(self.study.id), tuple(text.id for text in self.texts))
+        with self.assertNumQueries(0):
+            self.assertIs(get_corpus(), snapshot)
+            self.assertEqual(snapshot.get(self.texts[0].id).title, "Text 0")
+
+    def test_save_invalidates_after_commit(self):
+        snapshot = get_corpus()
+        text = self.texts[0]
+        with self.captureOnCommitCallbacks() as callbacks:
+            text.title = "Edited"
+            text.save()
+        # Vor dem Commit gilt noch der alte Stand
+        self.assertIs(get_corpus(), snapshot)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_corpus().get(text.id).title, "Edited")
+        self.assertNotEqual(get_corpus().version, snapshot.version)
+
+    def test_create_and_delete(self):
+        get_corpus()
+        with self.captureOnCommitCallbacks(execute=True):
+            new = TextItem.objects.create(study=self.study, title="New", body="New", origin="ai")
+            self.texts[0].delete()
+        self.assertEqual(get_corpus().pool(self.study.id),
+                         (self.texts[1].id, self.texts[2].id, new.id))
+
+    def test_study_changes(self):
+        get_corpus()
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Study.objects.create(name="Other", slug="other", sample_size=2)
+        self.assertEqual(get_corpus().slugs["other"].id, other.id)
+        self.assertEqual(get_corpus().sample_size(other.id), 2)
+        self.assertEqual(get_corpus().pool(other.id), ())
+
+    def test_newer_text_is_read(self):
+        snapshot = get_corpus()
+        # Ohne Commit-Hook, wie ein Text, den ein anderer Worker gerade angelegt hat
+        (new,) = TextItem.objects.bulk_create([
+            TextItem(study=self.study, title="Newer", body="Newer", origin="ai")
+        ])
+        with self.assertNumQueries(1):
+            self.assertEqual(snapshot.get(new.id).title, "Newer")
+        with self.assertRaises(TextItem.DoesNotExist):
+            snapshot.get(new.id + 1)
+
+    def test_cleared_cache_keeps_version(self):
+        snapshot = get_corpus()
+        cache.clear()
+        # Die Version steht in der Datenbank, der Snapshot bleibt gültig
+        with self.assertNumQueries(1):
+            self.assertIs(get_corpus(), snapshot)
+
+    def test_version_from_other_process(self):
+        snapshot = get_corpus()
+        # ingest_texts in einem eigenen Prozess mit eigenem lokalem Cache
+        other_cache = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                                   "LOCATION": "other-process"}}
+        with override_settings(CACHES=other_cache):
+            TextItem.objects.filter(id=self.texts[0].id).update(title="Imported")
+            bump_version()
+        self.assertIs(get_corpus(), snapshot)
+        # Nach STUDY_CORPUS_VERSION_TTL Sekunden liest der Worker die Version neu
+        cache.delete(corpus.VERSION_KEY)
+        self.assertEqual(get_corpus().get(self.texts[0].id).title, "Imported")
+
+    @override_settings(STUDY_CORPUS_SHARED_CACHE=True)
+    def test_shared_snapshot(self):
+        version = get_corpus().version
+        # Ein anderer Worker mit leerem Speicher übernimmt den Snapshot aus dem Cache
+        corpus._corpus = None
+        with self.assertNumQueries(0):
+            snapshot = get_corpus()
+        self.assertEqual(snapshot.version, version)
+        self.assertEqual(len(snapshot), 3)
+
+
+class RenderingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        rendering.clear()
+        self.study = Study.objects.get(slug="default")
+
+    def text(self, body):
+        with self.captureOnCommitCallbacks(execute=True):
+            return TextItem.objects.create(study=self.study, title="T", body=body, origin="ai")
+
+    def test_cached_like_linebreaks(self):
+        text = self.text("First <b>\n\nSecond")
+        html = rendering.body_html(text)
+        self.assertEqual(html, "<p>First &lt;b&gt;</p>\n\n<p>Second</p>")
+        self.assertIs(rendering.body_html(text), html)
+
+    def test_edit_invalidates(self):
+        text = self.text("Old body")
+        rendering.body_html(text)
+        with self.captureOnCommitCallbacks(execute=True):
+            text.body = "New body"
+            text.save()
+        self.assertEqual(rendering._entries, {})
+        self.assertEqual(rendering.body_html(get_corpus().get(text.id)), "<p>New body</p>")
+
+        # Eine alte Kopie (z.B. Snapshot eines anderen Workers) bekommt ihren eigenen Eintrag
+        stale = TextItem(id=text.id, body="Old body", content_hash=body_hash("Old body"))
+        self.assertEqual(rendering.body_html(stale), "<p>Old body</p>")
+        self.assertEqual(rendering.body_html(text), "<p>New body</p>")
+
+    def test_delete_discards(self):
+        text = self.text("Body")
+        rendering.body_html(text)
+        text.delete()
+        self.assertEqual(rendering._entries, {})
+        self.assertEqual(rendering._size, 0)
+
+    def test_least_recently_used_are_dropped(self):
+        texts = [self.text(f"Body {i}") for i in range(3)]
+        size = len(rendering.body_html(texts[0]))
+        with override_settings(STUDY_BODY_CACHE_SIZE=2 * size):
+            rendering.body_html(texts[1])
+            rendering.body_html(texts[0])
+            rendering.body_html(texts[2])
+            self.assertEqual([key[0] for key in rendering._entries],
+                             [texts[0].id, texts[2].id])
+            self.assertEqual(rendering._size, 2 * size)
+            # Größer als der ganze Cache: gerendert, aber nicht gespeichert
+            large = self.text("x" * 3 * size)
+            self.assertEqual(rendering.body_html(large), f"<p>{'x' * 3 * size}</p>")
+            self.assertNotIn(large.id, [key[0] for key in rendering._entries])
+
+    @override_settings(STUDY_PRERENDER_BODIES=True)
+    def test_prerender(self):
+        texts = [self.text(f"Body {i}") for i in range(2)]
+        get_corpus()
+        self.assertEqual({key[0] for key in rendering._entries}, {text.id for text in texts})
+
+
+@override_settings(STUDY_PROGRESS="token", STUDY_ORDER_STRATEGY="latin")
+class AsyncViewTests(TestCase):
+    # Django verbietet das synchrone ORM im Event-Loop (SynchronousOnlyOperation),
+    # daher schlägt jeder synchrone Datenbankzugriff hier fehl
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        make_study(0, 3)
+
+    def forget_corpus(self):
+        # Jeder Aufruf muss den Corpus neu laden
+        cache.clear()
+        corpus._corpus = None
+
+    async def test_flow_with_cold_corpus(self):
+        answer = {"classification": "ai", "confidence": 3, "response_time": 5000}
+        self.forget_corpus()
+        response = await views.astart(
+            self.factory.post("/", {"name": "A", "experience": 1, "department": "Test"})
+        )
+        location = response["Location"]
+        for index in (1, 2, 3):
+            self.forget_corpus()
+            response = await views.aclassify(self.factory.get(location), index=index)
+            self.assertEqual(response.status_code, 200)
+            self.forget_corpus()
+            response = await views.aclassify(self.factory.post(location, answer), index=index)
+            location = response["Location"]
+
+        self.forget_corpus()
+        response = await views.afinish(self.factory.get(location))
+        self.assertContains(response, "Paragraph", count=3)
+        participant = await Participant.objects.aget(name="A")
+        self.assertEqual(await participant.responses.acount(), 3)
+
+    async def test_token_without_order(self):
+        participant = await Participant.objects.acreate(
+            study_id=(await Study.objects.aget(slug="default")).id,
+            name="Old", experience=1, department="Test",
+        )
+        token = signing.dumps([participant.id, 0, participant.study_id], salt=progress.TOKEN_SALT)
+        self.forget_corpus()
+        response = await views.aclassify(
+            self.factory.get(f"/task/1/?{progress.TOKEN_PARAM}={token}"), index=1
+        )
+        self.assertContains(response, "Paragraph")
+
+
+class PurgeSessionsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_study(0, 2)
+        self.client.post("/", {"name": "Active", "experience": 1, "department": "Test"})
+        self.participant = self.client.session.session_key
+        admin = Client()
+        admin.force_login(get_user_model().objects.create_superuser("admin", "a@example.com", "pw"))
+        self.admin = admin.session.session_key
+        expired = SessionStore()
+        expired["participant_id"] = 1
+        expired.set_expiry(-60)
+        expired.save()
+        self.expired = expired.session_key
+
+    def purge(self, *args):
+        call_command("purge_sessions", *args, stdout=StringIO())
+        return set(Session.objects.values_list("session_key", flat=True))
+
+    def test_keeps_active_participants(self):
+        self.assertEqual(self.purge(), {self.participant, self.admin})
+        # Die Teilnahme läuft weiter
+        self.assertEqual(self.client.get("/task/1/").status_code, 200)
+
+    def test_older_than(self):
+        self.assertEqual(self.purge("--older-than", "1"), {self.participant, self.admin})
+        Session.objects.update(expire_date=F("expire_date") - timedelta(days=2))
+        self.assertEqual(self.purge("--older-than", "1"), {self.admin})
+
+    def test_all(self):
+        self.assertEqual(self.purge("--all"), set())
+
+
+class AdminQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(user)
+
+    def assert_constant_queries(self, num, url):
+        # Gleiche Anzahl Abfragen für wenige und viele Zeilen; der erste Aufruf
+        # füllt den ContentType-Cache
+        for participants, texts in ((2, 2), (6, 5)):
+            with self.subTest(participants=participants, texts=texts):
+                Participant.objects.all().delete()
+                TextItem.objects.all().delete()
+                people, _ = make_study(participants, texts)
+                self.client.get(url(people[0]))
+                with self.assertNumQueries(num):
+                    self.assertEqual(self.client.get(url(people[0])).status_code, 200)
+
+    def test_response_changelist(self):
+        self.assert_constant_queries(
+            7, lambda participant: reverse("admin:study_response_changelist")
+        )
+
+    def test_participant_inline(self):
+        self.assert_constant_queries(
+            5, lambda participant: reverse("admin:study_participant_change", args=[participant.id])
+        )
+
+
+class SummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.study = Study.objects.get(slug="default")
+
+    def start(self, name):
+        self.client.post("/", {"name": name, "experience": 1, "department": "Test"})
+        return Participant.objects.get(name=name)
+
+    def counts(self):
+        return dict(TextSummary.objects.values_list("text_id", "responses"))
+
+    def test_record_and_discard(self):
+        (participant,), texts = make_study(1, 2)
+        responses = list(participant.responses.all())
+        summary.record(responses)
+        self.assertEqual(self.counts(), {text.id: 1 for text in texts})
+        ai = TextSummary.objects.get(text=texts[0])
+        self.assertEqual((ai.classified_ai, ai.correct), (1, 0))
+
+        responses[0].delete()
+        self.assertEqual(sorted(self.counts().values()), [0, 1])
+
+    def test_rebuild(self):
+        (participant,), texts = make_study(1, 3)
+        TextSummary.objects.create(text=texts[0], responses=99)
+        StudySummary.objects.filter(study=self.study).update(participants=99)
+        call_command("rebuild_summary", stdout=StringIO())
+        self.assertEqual(self.counts(), {text.id: 1 for text in texts})
+        self.assertEqual(summary.dashboard(self.study)["participants"], 1)
+
+    def test_participant_counter(self):
+        other = Study.objects.create(name="Other", slug="other")
+        first = self.start("First")
+        self.start("Second")
+        self.client.post("/s/other/", {"name": "Third", "experience": 1, "department": "Test"})
+        self.assertEqual(summary.dashboard(self.study)["participants"], 2)
+        self.assertEqual(summary.dashboard(other)["participants"], 1)
+        self.assertEqual(summary.dashboard()["participants"], 3)
+
+        first.delete()
+        with self.assertNumQueries(2):
+            self.assertEqual(summary.dashboard(self.study)["participants"], 1)
+
+    def test_admin_participants_are_counted(self):
+        self.start("Started")
+        admin = get_user_model().objects.create_superuser("admin", "a@example.com", "pw")
+        self.client.force_login(admin)
+        response = self.client.post(reverse("admin:study_participant_add"), {
+            "name": "Added", "study": self.study.id, "experience": 1, "department": "Test",
+            "responses-TOTAL_FORMS": 0, "responses-INITIAL_FORMS": 0,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(summary.dashboard(self.study)["participants"], 2)
+
+        # Löschen zieht nur den eigenen Zähler ab
+        Participant.objects.get(name="Added").delete()
+        self.assertEqual(summary.dashboard(self.study)["participants"], 1)
+        self.assertEqual(
+            StudySummary.objects.get(study=self.study).participants,
+            Participant.objects.filter(study=self.study).count(),
+        )
+
+
+class OrderingTests(TestCase):
+    def test_sample(self):
+        pool = list(range(100, 120))
+        for strategy in ("random", "latin", "balanced"):
+            with self.subTest(strategy=strategy):
+                order = text_order("seed", 7, pool, strategy, sample_size=5)
+                self.assertEqual(len(set(order)), 5)
+                self.assertLessEqual(set(order), set(pool))
+                self.assertEqual(order, text_order("seed", 7, pool, strategy, sample_size=5))
+
+    def test_latin_sample_positions(self):
+        # Über n Teilnehmende jeder Text gleich oft an jeder gezeigten Position
+        pool = list(range(6))
+        orders = [text_order("seed", pid, pool, "latin", sample_size=3) for pid in range(6)]
+        for position in range(3):
+            self.assertEqual(sorted(order[position] for order in orders), pool)
+
+    def test_deterministic(self):
+        pool = list(range(10, 18))
+        for strategy in ("random", "latin", "balanced"):
+            with self.subTest(strategy=strategy):
+                order = text_order("seed", 5, pool, strategy)
+                self.assertEqual(sorted(order), pool)
+                self.assertEqual(order, text_order("seed", 5, reversed(pool), strategy))
+                self.assertNotEqual(order, text_order("other", 5, pool, strategy))
+
+    def test_balanced_carryover(self):
+        # Williams-Design: jeder Text folgt jedem anderen gleich oft
+        for n, rows in ((4, 4), (5, 10)):
+            with self.subTest(texts=n):
+                orders = [text_order("seed", pid, range(n), "balanced") for pid in range(rows)]
+                for position in range(n):
+                    column = sorted(order[position] for order in orders)
+                    self.assertEqual(column, sorted(list(range(n)) * (rows // n)))
+                pairs = Counter(pair for order in orders for pair in zip(order, order[1:]))
+                self.assertEqual(len(pairs), n * (n - 1))
+                self.assertEqual(set(pairs.values()), {rows // n})
+
+    def test_without_sample_unchanged(self):
+        pool = list(range(10))
+        self.assertEqual(text_order("seed", 3, pool), text_order("seed", 3, pool, sample_size=None))
+        self.assertEqual(text_order("seed", 3, pool, sample_size=10), text_order("seed", 3, pool))
+
+
+@override_settings(STUDY_PROGRESS="token")
+class StudyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.study = Study.objects.create(name="Law", slug="law", sample_size=3)
+        make_study(0, 4)
+        _, self.texts = make_study(0, 8, self.study)
+
+    def test_start_samples_from_pool(self):
+        response = self.client.post(
+            "/s/law/", {"name": "A", "experience": 3, "department": "Law"}
+        )
+        participant = Participant.objects.get(name="A")
+        self.assertEqual(participant.study, self.study)
+
+        request = RequestFactory().get(response["Location"])
+        state = progress.load(request)
+        self.assertEqual(state.study_id, self.study.id)
+        self.assertEqual(len(state.text_order), 3)
+        self.assertLessEqual(set(state.text_order), {text.id for text in self.texts})
+
+    def test_start_queries_independent_of_pool_size(self):
+        get_corpus()
+        # Savepoint, Nummer vergeben und lesen, Teilnehmer, Teilnehmerzähler, Release
+        with self.assertNumQueries(6):
+            self.client.post("/s/law/", {"name": "B", "experience": 1, "department": "Law"})
+
+    @override_settings(STUDY_ORDER_STRATEGY="latin")
+    def test_latin_balanced_per_study(self):
+        # Gleichzeitige Studien: die IDs wechseln sich ab, die Zeilen nicht
+        other = Study.objects.create(name="Other", slug="other", sample_size=4)
+        _, other_texts = make_study(0, 4, other)
+        self.study.sample_size = 4
+        self.study.save()
+        TextItem.objects.filter(id__in=[text.id for text in self.texts[4:]]).delete()
+        bump_version()
+        for i in range(4):
+            for slug in ("law", "other"):
+                self.client.post(f"/s/{slug}/", {"name": f"{slug}{i}", "experience": 1,
+                                                 "department": "Test"})
+        for study, texts in ((self.study, self.texts[:4]), (other, other_texts)):
+            orders = [participant.text_order for participant in study.participants.order_by("id")]
+            self.assertEqual([p.sequence for p in study.participants.order_by("id")], [1, 2, 3, 4])
+            for position in range(4):
+                self.assertEqual(sorted(order[position] for order in orders),
+                                 [text.id for text in texts])
+
+    def test_inactive_study(self):
+        self.study.is_active = False
+        self.study.save()
+        bump_version()
+        self.assertEqual(self.client.get("/s/law/").status_code, 404)
+        self.assertEqual(self.client.get("/s/unknown/").status_code, 404)
+
+
+@override_settings(STUDY_ORDER_STRATEGY="latin")
+class ProgressTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.study = Study.objects.get(slug="default")
+        self.study.sample_size = 3
+        self.study.save()
+        make_study(0, 5)
+
+    def start(self):
+        response = self.client.post("/", {"name": "A", "experience": 1, "department": "Test"})
+        return Participant.objects.get(name="A"), response["Location"]
+
+    def answer(self, location):
+        return self.client.post(location, {
+            "classification": "ai", "confidence": 3, "response_time": 5000,
+        })["Location"]
+
+    def assert_order_kept(self):
+        participant, location = self.start()
+        self.assertEqual(len(participant.text_order), 3)
+        location = self.answer(location)
+
+        # Pool und Stichprobengröße ändern sich während der Teilnahme
+        make_study(0, 4)
+        self.study.sample_size = 5
+        self.study.save()
+        bump_version()
+
+        while "/task/" in location:
+            location = self.answer(location)
+        self.assertEqual(
+            list(participant.responses.order_by("index").values_list("text_id", flat=True)),
+            participant.text_order,
+        )
+
+    def test_order_kept_session(self):
+        self.assert_order_kept()
+
+    @override_settings(STUDY_PROGRESS="token")
+    def test_order_kept_token(self):
+        self.assert_order_kept()
+
+    def test_session_without_order(self):
+        # Sessions von vor dem Speichern der Reihenfolge bekommen sie beim ersten Aufruf
+        participant, location = self.start()
+        session = self.client.session
+        del session["text_order"]
+        session.save()
+        location = self.answer(location)
+        order = self.client.session["text_order"]
+        make_study(0, 4)
+        bump_version()
+        self.answer(location)
+        self.assertEqual(self.client.session["text_order"], order)
+
+    def test_deleted_text_is_skipped(self):
+        participant, location = self.start()
+        TextItem.objects.filter(id=participant.text_order[0]).delete()
+        bump_version()
+        response = self.client.get(location)
+        self.assertRedirects(response, "/task/2/", fetch_redirect_response=False)
+        self.assertEqual(self.client.session["current_index"], 1)
+
+
+@override_settings(STUDY_CLASSIFY_MODE="single")
+class BatchSubmitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _, self.texts = make_study(0, 3)
+        response = self.client.post("/", {"name": "A", "experience": 1, "department": "Test"})
+        self.page = response["Location"]
+        self.participant = Participant.objects.get(name="A")
+
+    def submit(self, answers, url=None):
+        return self.client.post(
+            url or reverse("study:submit_responses"), json.dumps({"responses": answers}),
+            content_type="application/json",
+        )
+
+    def answers(self, order=None, **fields):
+        return [
+            {"text": text_id, "classification": "ai", "confidence": 3, "response_time": 5000,
+             **fields}
+            for text_id in (order or self.participant.text_order)
+        ]
+
+    def assert_rejected(self, response, status=400):
+        self.assertEqual(response.status_code, status)
+        self.assertIn("error", response.json())
+        self.assertFalse(Response.objects.exists())
+        self.assertEqual(self.client.session["current_index"], 0)
+
+    def test_page(self):
+        self.assertEqual(self.page, reverse("study:classify_all"))
+        response = self.client.get(self.page)
+        self.assertEqual([item["text"].id for item in response.context["items"]],
+                         self.participant.text_order)
+
+    def test_complete_submission(self):
+        response = self.submit(self.answers())
+        self.assertEqual(response.json(), {"redirect": reverse("study:finish")})
+        self.assertEqual(
+            list(Response.objects.order_by("index").values_list("text_id", "index")),
+            [(text_id, i) for i, text_id in enumerate(self.participant.text_order, start=1)],
+        )
+        self.assertEqual(self.client.session["current_index"], 3)
+        self.assertEqual(
+            sorted(TextSummary.objects.values_list("responses", flat=True)), [1, 1, 1]
+        )
+        self.assertRedirects(self.client.get(self.page), reverse("study:finish"),
+                             fetch_redirect_response=False)
+
+    def test_missing_or_reordered(self):
+        order = self.participant.text_order
+        for answers in (self.answers(order[:2]), self.answers(order[::-1]),
+                        self.answers(order + order[:1]), [], "not a list"):
+            with self.subTest(answers=answers):
+                self.assert_rejected(self.submit(answers))
+        response = self.client.post(reverse("study:submit_responses"), "{",
+                                    content_type="application/json")
+        self.assert_rejected(response)
+
+    def test_invalid_confidence(self):
+        for confidence in (0, 6, "high", None):
+            with self.subTest(confidence=confidence):
+                response = self.submit(self.answers(confidence=confidence))
+                self.assert_rejected(response)
+                self.assertIn("confidence", response.json()["fields"])
+        self.assertEqual(self.submit(self.answers()).status_code, 200)
+
+    def test_repeat_submission(self):
+        self.assertEqual(self.submit(self.answers()).status_code, 200)
+        self.assertEqual(self.submit(self.answers()).status_code, 409)
+        self.assertEqual(Response.objects.count(), 3)
+
+    @override_settings(STUDY_PROGRESS="token")
+    def test_repeat_with_old_token(self):
+        # Ein zweiter Tab hat noch den Token von vor dem Abschicken
+        self.client.post("/", {"name": "B", "experience": 1, "department": "Test"})
+        participant = Participant.objects.get(name="B")
+        url = progress.url("study:submit_responses", progress.Progress(
+            participant.id, participant.text_order, 0, participant.study_id,
+        ))
+        answers = self.answers(participant.text_order)
+        self.assertEqual(self.submit(answers, url).status_code, 200)
+        self.assertEqual(self.submit(answers, url).status_code, 409)
+        self.assertEqual(participant.responses.count(), 3)
+
+    def test_deleted_text(self):
+        order = self.participant.text_order
+        with self.captureOnCommitCallbacks(execute=True):
+            TextItem.objects.filter(id=order[1]).delete()
+        page = self.client.get(self.page)
+        self.assertEqual([item["text"].id for item in page.context["items"]],
+                         [order[0], order[2]])
+        self.assertContains(page, "Text 2 of 2")
+
+        self.assert_rejected(self.submit(self.answers()))
+        response = self.submit(self.answers([order[0], order[2]]))
+        self.assertEqual(response.status_code, 200)
+        # Die übrigen Antworten behalten ihre ursprüngliche Position
+        self.assertEqual(
+            list(Response.objects.order_by("index").values_list("text_id", "index")),
+            [(order[0], 1), (order[2], 3)],
+        )
+        self.assertEqual(self.client.session["current_index"], 3)
+        finish = self.client.get(reverse("study:finish"))
+        self.assertEqual(len(finish.context["results"]), 2)
+        self.assertEqual(self.client.get(reverse("study:finish_text", args=[2])).status_code, 404)
+
+    def test_without_participant(self):
+        self.client.session.flush()
+        self.client.cookies.clear()
+        self.assertEqual(self.submit(self.answers()).status_code, 403)
+
+
+@override_settings(STUDY_PROGRESS="token")
+class TokenTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_study(0, 3)
+        response = self.client.post("/", {"name": "A", "experience": 1, "department": "Test"})
+        self.location = response["Location"]
+        self.path, self.token = self.location.split(f"?{progress.TOKEN_PARAM}=")
+
+    def get(self, token):
+        return self.client.get(self.path, {progress.TOKEN_PARAM: token})
+
+    def test_roundtrip(self):
+        participant = Participant.objects.get(name="A")
+        self.assertEqual(
+            signing.loads(self.token, salt=progress.TOKEN_SALT),
+            [participant.id, 0, participant.study_id, participant.text_order],
+        )
+        self.assertEqual(self.get(self.token).status_code, 200)
+        # Der Stand steckt nur im Token
+        self.assertFalse(Session.objects.exists())
+
+    def test_tampered_token(self):
+        value, signature = self.token.rsplit(":", 1)
+        other = "A" if signature[-1] != "A" else "B"
+        for token in (f"{value}:{signature[:-1]}{other}", value, "", "garbage"):
+            with self.subTest(token=token):
+                self.assertRedirects(self.get(token), reverse("study:start"),
+                                     fetch_redirect_response=False)
+
+    def test_forged_state(self):
+        # Anderer Teilnehmer bzw. Index ohne passende Signatur
+        participant = Participant.objects.get(name="A")
+        state = [participant.id + 1, 2, participant.study_id, participant.text_order]
+        for token in (signing.dumps(state, salt="other"),
+                      signing.dumps(state, salt=progress.TOKEN_SALT, key="other-key")):
+            with self.subTest(token=token):
+                self.assertRedirects(self.get(token), reverse("study:start"),
+                                     fetch_redirect_response=False)
+        self.assertFalse(Response.objects.exists())
+
+
+@override_settings(STUDY_PROGRESS="token", STUDY_ORDER_STRATEGY="adaptive")
+class AdaptiveAssignmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        assignment.reset()
+        self.study = Study.objects.create(name="Adaptive", slug="adaptive", sample_size=2)
+        _, self.texts = make_study(0, 6, self.study)
+
+    def participate(self, name, answer=True):
+        response = self.client.post(
+            "/s/adaptive/", {"name": name, "experience": 1, "department": "Test"}
+        )
+        location = response["Location"]
+        while answer and "/task/" in location:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(location, {
+                    "classification": "ai", "confidence": 3, "response_time": 5000,
+                })
+            location = response["Location"]
+        return Participant.objects.get(name=name), location
+
+    def test_balances_texts_and_positions(self):
+        for i in range(12):
+            self.participate(f"P{i}")
+        counts = TextSummary.objects.filter(text__study=self.study).values_list(
+            "responses", flat=True
+        )
+        self.assertEqual(sorted(counts), [4] * 6)
+        for index in (1, 2):
+            per_text = Response.objects.filter(index=index).values("text_id").annotate(
+                n=Count("id")).values_list("n", flat=True)
+            # Positionen werden nach der Textauswahl verteilt, daher nur annähernd gleich
+            self.assertEqual(sum(per_text), 12)
+            self.assertLessEqual(max(per_text) - min(per_text), 2)
+
+    def test_order_is_stored(self):
+        participant, location = self.participate("Stored", answer=False)
+        self.assertEqual(len(participant.text_order), 2)
+        state = progress.load(RequestFactory().get(location))
+        self.assertEqual(state.text_order, participant.text_order)
+
+    def test_reservations(self):
+        # Wer abbricht, hält seine Texte bis zum Ablauf der Reservierung
+        first, _ = self.participate("Dropout", answer=False)
+        second, _ = self.participate("Next", answer=False)
+        self.assertFalse(set(first.text_order) & set(second.text_order))
+
+        assignment.reset()
+        with override_settings(STUDY_ASSIGNMENT_TTL=0):
+            for name in ("Expired", "Again", "Last"):
+                self.participate(name, answer=False)
+        # Nur die letzte Reservierung ist noch offen
+        self.assertEqual(sum(assignment._studies[self.study.id].pending.values()), 2)
+
+    def test_assign_without_queries(self):
+        # Die Laufzeit misst benchmarks/assignment.py
+        study = Study.objects.create(name="Large", slug="large", sample_size=20)
+        make_study(0, 300, study)
+        pool = get_corpus().pool(study.id)
+        assignment.assign(study.id, pool, 20)
+        with self.assertNumQueries(0):
+            orders = [assignment.assign(study.id, pool, 20).order for _ in range(14)]
+        # Reservierungen zählen mit: jeder Text genau einmal, bis der Pool verbraucht ist
+        texts = Counter(text_id for order in orders for text_id in order)
+        self.assertEqual(len(texts), 280)
+        self.assertEqual(set(texts.values()), {1})
+
+
+class WriteBehindTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp)
+        self.addCleanup(self.close_queue)
+        self.enterContext(override_settings(STUDY_WRITE_BEHIND=True,
+                                            STUDY_QUEUE_PATH=tmp / "queue.sqlite3"))
+        make_study(0, 3)
+        response = self.client.post("/", {"name": "A", "experience": 1, "department": "Test"})
+        self.location = response["Location"]
+        self.participant = Participant.objects.get(name="A")
+
+    def close_queue(self):
+        connection = getattr(writebehind._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            del writebehind._local.connection
+
+    def answer(self, times=1):
+        for _ in range(times):
+            response = self.client.post(self.location, {
+                "classification": "ai", "confidence": 3, "response_time": 5000,
+            })
+            self.location = response["Location"]
+
+    def claims(self):
+        return writebehind._connect().execute(
+            "SELECT position, claimed_by FROM pending ORDER BY position"
+        ).fetchall()
+
+    def expire_claims(self):
+        writebehind._connect().execute(
+            "UPDATE pending SET claimed_at = claimed_at - ?", (writebehind.CLAIM_TIMEOUT + 1,)
+        )
+
+    def test_enqueue(self):
+        self.answer(2)
+        self.assertFalse(Response.objects.exists())
+        self.assertEqual(writebehind.pending(self.participant.id), 2)
+        self.assertEqual(writebehind.pending(self.participant.id + 1), 0)
+
+        # Nochmal dieselbe Position (z.B. doppelt abgeschickt) wird ignoriert
+        writebehind.enqueue(Response(participant_id=self.participant.id, text_id=1,
+                                     classification="human", confidence=1, response_time=1,
+                                     index=1))
+        self.assertEqual(writebehind.pending(), 2)
+
+    def test_drain(self):
+        self.answer(3)
+        self.assertEqual(writebehind.drain(batch_size=2), (2, 2))
+        self.assertEqual(writebehind.drain(batch_size=2), (1, 1))
+        self.assertEqual(writebehind.drain(), (0, 0))
+        self.assertEqual(
+            list(self.participant.responses.order_by("index").values_list("text_id", flat=True)),
+            self.participant.text_order,
+        )
+        self.assertEqual(
+            sorted(TextSummary.objects.values_list("responses", flat=True)), [1, 1, 1]
+        )
+
+    def test_claimed_rows_are_skipped(self):
+        self.answer(2)
+        # Ein anderer Drainer hat die Zeilen übernommen
+        token, rows = writebehind._claim(None, 500)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(writebehind.drain(), (0, 0))
+        self.assertEqual({claimed_by for _, claimed_by in self.claims()}, {token})
+
+        # ... und ist abgestürzt, bevor er etwas gespeichert hat
+        self.expire_claims()
+        self.assertEqual(writebehind.drain(), (2, 2))
+        self.assertEqual(writebehind.pending(), 0)
+
+    def test_crash_after_commit(self):
+        # Gespeichert, aber abgestürzt, bevor die Zeilen aus der Queue gelöscht wurden
+        self.answer(2)
+        _, rows = writebehind._claim(None, 500)
+        writebehind._store(rows)
+        self.expire_claims()
+        self.assertEqual(writebehind.drain(), (2, 0))
+        self.assertEqual(self.participant.responses.count(), 2)
+        self.assertEqual(writebehind.pending(), 0)
+
+    def test_failed_store_releases_claim(self):
+        self.answer(2)
+        with patch.object(writebehind, "_store", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                writebehind.drain()
+        self.assertEqual(self.claims(), [(1, None), (2, None)])
+        self.assertEqual(writebehind.drain(), (2, 2))
+
+    def test_deleted_participant(self):
+        self.answer(1)
+        self.participant.delete()
+        self.assertEqual(writebehind.drain(), (1, 0))
+        self.assertEqual(writebehind.pending(), 0)
+
+    def test_finish_flushes(self):
+        self.answer(3)
+        self.assertEqual(writebehind.pending(), 3)
+        page = self.client.get(self.location)
+        self.assertEqual(len(page.context["results"]), 3)
+        self.assertEqual(writebehind.pending(), 0)
+
+    def test_drain_command(self):
+        self.answer(3)
+        out = StringIO()
+        call_command("drain_responses", "--batch-size", "2", stdout=out)
+        self.assertIn("Stored 3 response(s).", out.getvalue())
+        self.assertEqual(Response.objects.count(), 3)
+
+
+class DatabaseProfileTests(TestCase):
+    def settings_for(self, profile):
+        # Die Einstellungen werden beim Import ausgewertet, daher in einem eigenen Prozess
+        code = (
+            "import json, os; os.environ['DB_PROFILE'] = %r\n"
+            "from config.settings import base\n"
+            "print(json.dumps([base.DATABASES['default'], base.SQLITE_PRAGMAS], default=str))"
+        ) % profile
+        result = subprocess.run([sys.executable, "-c", code], cwd=settings.BASE_DIR,
+                                capture_output=True, text=True, check=True)
+        return json.loads(result.stdout)
+
+    def test_profiles(self):
+        database, pragmas = self.settings_for("sqlite")
+        self.assertEqual(pragmas, {})
+        self.assertNotIn("OPTIONS", database)
+
+        database, pragmas = self.settings_for("sqlite-wal")
+        self.assertEqual(database["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+        self.assertGreater(database["CONN_MAX_AGE"], 0)
+        self.assertEqual(pragmas["journal_mode"], "WAL")
+
+        database, _ = self.settings_for("postgres")
+        self.assertEqual(database["ENGINE"], "django.db.backends.postgresql")
+
+    def pragmas(self, **overrides):
+        tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp)
+        wrapper = type(connections["default"])(
+            {**connection.settings_dict, "NAME": str(tmp / "db.sqlite3")}, alias="profile"
+        )
+        self.addCleanup(wrapper.close)
+        with override_settings(**overrides), wrapper.cursor() as cursor:
+            return {
+                name: cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                for name in ("journal_mode", "synchronous", "busy_timeout")
+            }
+
+    def test_pragmas_on_connect(self):
+        self.assertEqual(self.pragmas(SQLITE_PRAGMAS={})["journal_mode"], "delete")
+        pragmas = self.pragmas(SQLITE_PRAGMAS={
+            "journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 1234,
+        })
+        # synchronous: 1 = NORMAL
+        self.assertEqual(pragmas, {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 1234})
+
+
+class StaticFilesTests(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        source = self.tmp / "static"
+        (source / "css").mkdir(parents=True)
+        (source / "css" / "a.css").write_text('@import url("fonts.css");\nbody { margin: 0; }\n')
+        (source / "css" / "b.css").write_text("@import 'theme.css' screen;\n"
+                                             + "p { color: red; }\n" * 40)
+        for name in ("tiny.css", "fonts.css", "theme.css"):
+            (source / "css" / name).write_text("a{}")
+        self.enterContext(override_settings(
+            STATICFILES_DIRS=[source],
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            STATIC_BUILD_DIR=self.tmp / "build",
+            STATIC_ROOT=self.tmp / "root",
+            CSS_BUNDLES={"css/bundle.css": ["css/a.css", "css/b.css"]},
+        ))
+
+    def test_bundle(self):
+        call_command("bundle_css", stdout=StringIO())
+        bundle = (self.tmp / "build" / "css" / "bundle.css").read_text()
+        # @import-Regeln stehen vorne, die Dateien in der angegebenen Reihenfolge
+        self.assertTrue(bundle.startswith(
+            '@import url("fonts.css");\n@import \'theme.css\' screen;\n/* css/a.css */\n'
+        ))
+        self.assertEqual(bundle.count("@import"), 2)
+        self.assertLess(bundle.index("body { margin: 0; }"), bundle.index("/* css/b.css */"))
+
+        with override_settings(CSS_BUNDLES={"css/bundle.css": ["css/missing.css"]}):
+            with self.assertRaises(CommandError):
+                call_command("bundle_css", stdout=StringIO())
+
+    def test_css_bundle_tag(self):
+        template = Template("{% load study_static %}{% css_bundle 'css/bundle.css' %}")
+        links = template.render(Context())
+        self.assertEqual(links.count("<link"), 2)
+        self.assertIn('href="/static/css/b.css"', links)
+        with override_settings(STATIC_BUNDLE_CSS=True):
+            self.assertEqual(template.render(Context()),
+                             '<link rel="stylesheet" href="/static/css/bundle.css">')
+
+    def test_hashed_and_precompressed(self):
+        with override_settings(STORAGES={
+            **settings.STORAGES,
+            "staticfiles": {"BACKEND": "config.storage.CompressedManifestStaticFilesStorage"},
+        }):
+            call_command("collectstatic", interactive=False, verbosity=0)
+        root = self.tmp / "root" / "css"
+        (hashed,) = root.glob("b.*.css")
+        self.assertEqual(gzip.decompress((root / f"{hashed.name}.gz").read_bytes()),
+                         hashed.read_bytes())
+        # Zu klein zum Komprimieren
+        (tiny,) = root.glob("tiny.*.css")
+        self.assertFalse((root / f"{tiny.name}.gz").exists())
+
+
+class ParticipantFlowBenchmarkTests(TestCase):
+    def run_benchmark(self, *args):
+        script = Path(settings.BASE_DIR, "benchmarks", "participant_flow.py")
+        result = subprocess.run(
+            [sys.executable, str(script), "--participants", "3", "--texts", "2",
+             "--think-ms", "0", *args],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=120,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def test_flow_and_compare(self):
+        tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp)
+        self.run_benchmark("--output", str(tmp / "before.json"))
+        result = json.loads((tmp / "before.json").read_text())
+
+        self.assertEqual(result["errors"], 0)
+        self.assertEqual(
+            {name: step["requests"] for name, step in result["steps"].items()},
+            {"start (GET)": 3, "start (POST)": 3, "classify (GET)": 6, "classify (POST)": 6,
+             "finish (GET)": 3},
+        )
+        self.assertEqual(result["requests"], 21)
+        self.assertGreater(result["steps"]["start (POST)"]["queries_mean"], 0)
+        self.assertGreater(result["write_statements"], 0)
+
+        output = self.run_benchmark("--compare", str(tmp / "before.json"))
+        self.assertIn("compared with", output)
+        self.assertRegex(output, r"throughput: .* req/s \([+-]\d+%\)")
+
+
+class DuplicateResponseMigrationTests(TransactionTestCase):
+    # Stellt die Studie aus 0005 für die folgenden Tests wieder her
+    serialized_rollback = True
+    before = [("study", "0002_participant_response")]
+    after = [("study", "0003_response_indexes")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.addCleanup(self.migrate_to_latest)
+        executor.loader.build_graph()
+        self.apps = executor.loader.project_state(self.before).apps
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        # Der Tabellenumbau verwirft die Trigger, post_migrate läuft hier nicht
+        search.install()
+
+    def test_duplicates_are_reported(self):
+        Participant = self.apps.get_model("study", "Participant")
+        Response = self.apps.get_model("study", "Response")
+        text = self.apps.get_model("study", "TextItem").objects.create(
+            title="Text", body="Body", origin="ai"
+        )
+        participant = Participant.objects.create(name="A", experience=1, department="Test")
+        responses = [
+            Response.objects.create(participant=participant, text=text, classification=label,
+                                    confidence=3, response_time=5000, index=index)
+            for index, label in ((1, "ai"), (1, "human"), (2, "ai"), (1, "ai"))
+        ]
+
+        out = StringIO()
+        with redirect_stdout(out):
+            MigrationExecutor(connection).migrate(self.after)
+        removed = f"{responses[1].id}, {responses[3].id}"
+        self.assertIn("Removed 2 duplicate response(s)", out.getvalue())
+        self.assertIn(f"ids: {removed}", out.getvalue())
+        self.assertEqual(
+            list(Response.objects.order_by("id").values_list("id", flat=True)),
+            [responses[0].id, responses[2].id],
+        )
+
+    def test_nothing_to_report(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            MigrationExecutor(connection).migrate(self.after)
+        self.assertEqual(out.getvalue(), "")
+
+
+class IngestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def ingest(self, *sources, **options):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("ingest_texts", *map(str, sources), stdout=out, stderr=StringIO(),
+                         **options)
+        return out.getvalue()
+
+    def test_formats_and_rerun(self):
+        for origin in ("ai", "human"):
+            (self.tmp / "essays" / origin).mkdir(parents=True)
+            (self.tmp / "essays" / origin / f"{origin}.txt").write_text(f"An essay by {origin}.")
+        (self.tmp / "texts.jsonl").write_text("\n".join(json.dumps(record) for record in [
+            {"title": "JSON", "body": "From JSONL.", "origin": "ai"},
+            {"body": "An essay by ai.\r\n", "origin": "ai"},  # Duplikat der Datei
+            {"body": "", "origin": "ai"},
+        ]))
+        (self.tmp / "texts.csv").write_text("title,text,label\nCSV,\"From, CSV.\",human\n")
+
+        output = self.ingest(self.tmp / "essays", self.tmp / "texts.jsonl", self.tmp / "texts.csv",
+                             batch_size=2)
+        self.assertIn("Imported 4 text(s)", output)
+        self.assertIn("skipped 1 duplicate(s) and 1 invalid", output)
+        self.assertEqual(
+            dict(TextItem.objects.values_list("title", "origin")),
+            {"ai": "ai", "human": "human", "JSON": "ai", "CSV": "human"},
+        )
+        self.assertEqual(len(get_corpus()), 4)
+
+        output = self.ingest(self.tmp / "essays", self.tmp / "texts.jsonl", self.tmp / "texts.csv")
+        self.assertIn("Imported 0 text(s)", output)
+        self.assertEqual(TextItem.objects.count(), 4)
+
+    def test_invalid_fields(self):
+        records = [
+            {"title": 123, "body": "Numeric title.", "origin": "ai"},
+            {"body": "Boolean origin.", "origin": True},
+            {"body": "List label.", "label": ["ai"]},
+            {"body": "Unknown origin.", "origin": "robot"},
+            {"body": ["not", "a", "string"], "origin": "ai"},
+            ["not", "an", "object"],
+            {"title": " Valid ", "body": "Valid.", "label": " AI "},
+        ]
+        (self.tmp / "texts.jsonl").write_text("\n".join(map(json.dumps, records)))
+        errors = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("ingest_texts", str(self.tmp / "texts.jsonl"), stdout=StringIO(),
+                         stderr=errors)
+        self.assertIn("title must be a string", errors.getvalue())
+        self.assertEqual(errors.getvalue().count("origin must be one of"), 3)
+        self.assertEqual(list(TextItem.objects.values_list("title", "origin")), [("Valid", "ai")])
+
+    def test_saved_texts_keep_their_hash(self):
+        _, (text,) = make_study(0, 1)
+        text.body = "Edited"
+        text.save()
+        (self.tmp / "edited.jsonl").write_text(json.dumps({"body": "Edited", "origin": "ai"}))
+        self.assertIn("skipped 1 duplicate(s)", self.ingest(self.tmp / "edited.jsonl"))
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(user)
+        study = Study.objects.get(slug="default")
+        self.texts = TextItem.objects.bulk_create([
+            TextItem(study=study, title="Climate", body="Renewable energy in Europe", origin="ai"),
+            TextItem(study=study, title="Schools", body="Digital classrooms", origin="human"),
+        ])
+
+    def search(self, term):
+        response = self.client.get(reverse("admin:study_textitem_changelist"), {"q": term})
+        return {text.title for text in response.context["cl"].result_list}
+
+    def test_index_is_available(self):
+        self.assertTrue(search.available())
+
+    def test_prefix_words(self):
+        self.assertEqual(self.search("renew"), {"Climate"})
+        self.assertEqual(self.search("climate europe"), {"Climate"})
+        self.assertEqual(self.search("digital energy"), set())
+        self.assertEqual(self.search('"class'), {"Schools"})
+
+    def test_triggers_follow_changes(self):
+        climate, schools = self.texts
+        schools.body = "Renewable classrooms"
+        schools.save()
+        self.assertEqual(self.search("renewable"), {"Climate", "Schools"})
+        climate.delete()
+        self.assertEqual(self.search("renewable"), {"Schools"})
+        self.assertEqual(self.search("digital"), set())
+
+    def test_rebuild_command(self):
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Rebuilt", out.getvalue())
+        self.assertEqual(self.search("classrooms"), {"Schools"})
+
+
+class ExportResponsesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_study(3, 2)
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.rows = list(Response.objects.order_by("id").values_list(*EXPORT_FIELDS))
+
+    def export(self, name, *args):
+        call_command("export_responses", str(self.tmp / name), *args, stderr=StringIO())
+        return self.tmp / name
+
+    def test_csv_chunks(self):
+        with self.assertNumQueries(1):
+            chunks = list(iter_csv(chunk_size=4))
+        # Kopfzeile mit den ersten 4 Zeilen, dann der Rest
+        self.assertEqual([chunk.count("\n") for chunk in chunks], [5, 2])
+        rows = list(csv.reader(StringIO("".join(chunks))))
+        self.assertEqual(tuple(rows[0]), EXPORT_FIELDS)
+        self.assertEqual(rows[1:], [[str(value) for value in row] for row in self.rows])
+
+    def test_csv_command(self):
+        with open(self.export("responses.csv", "--chunk-size", "4"), newline="") as f:
+            self.assertEqual(f.read(), "".join(iter_csv()))
+
+    def test_unknown_format(self):
+        with self.assertRaises(CommandError):
+            self.export("responses.xlsx")
+        with self.assertRaises(CommandError):
+            call_command("export_responses", "-", "--format", "parquet", stderr=StringIO())
+
+    @skipUnless(find_spec("pyarrow"), "needs pyarrow")
+    def test_parquet_and_arrow(self):
+        import pyarrow.feather
+        import pyarrow.parquet
+
+        for name, read in (("responses.parquet", pyarrow.parquet.read_table),
+                           ("responses.feather", pyarrow.feather.read_table)):
+            with self.subTest(name=name):
+                table = read(self.export(name, "--chunk-size", "4"))
+                self.assertEqual(table.schema, arrow_schema())
+                self.assertEqual([tuple(row.values()) for row in table.to_pylist()], self.rows)
+
+    def test_admin_stream(self):
+        admin = get_user_model().objects.create_superuser("admin", "a@example.com", "pw")
+        url = reverse("admin:study_response_stream_export")
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(admin)
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(b"".join(response.streaming_content).decode(), "".join(iter_csv()))
+
+    async def test_admin_stream_asgi(self):
+        admin = await sync_to_async(get_user_model().objects.create_superuser)(
+            "admin", "a@example.com", "pw"
+        )
+        await self.async_client.aforce_login(admin)
+        url = reverse("admin:study_response_stream_export")
+        formats = ["csv", "parquet"] if find_spec("pyarrow") else ["csv"]
+        for format in formats:
+            with self.subTest(format=format):
+                response = await self.async_client.get(url, {"format": format})
+                # Ein asynchroner Iterator wird stückweise gesendet
+                self.assertTrue(response.is_async)
+                content = b"".join([chunk async for chunk in response.streaming_content])
+                if format == "csv":
+                    self.assertEqual(content.decode(), "".join(await sync_to_async(list)(iter_csv())))
+                else:
+                    self.assertEqual(int(response["Content-Length"]), len(content))
+                    self.assertTrue(content.startswith(b"PAR1"))
+
+
+class ExportTextsTests(TestCase):
+    def test_csv(self):
+        _, texts = make_study(0, 2)
+        # bulk_create setzt content_hash nicht, save() schon
+        texts[0].save()
+        path = Path(tempfile.mkdtemp()) / "texts.csv"
+        self.addCleanup(shutil.rmtree, path.parent)
+        call_command("export_texts", str(path), stderr=StringIO())
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([int(row["text__id"]) for row in rows], [text.id for text in texts])
+        self.assertEqual(rows[0]["body"], texts[0].body)
+        self.assertEqual(rows[0]["content_hash"], body_hash(texts[0].body))
+        self.assertEqual(rows[1]["content_hash"], "")
@@ -1,12 +1,23 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = "study"
 
+# Unter ASGI die async Varianten der Teilnehmer-Views
+if settings.STUDY_ASYNC_VIEWS:
+    start, classify, finish = views.astart, views.aclassify, views.afinish
+else:
+    start, classify, finish = views.start, views.classify, views.finish
+
 urlpatterns = [
-    path("", views.start, name="start"),
-    path("task/<int:index>/", views.classify, name="classify"),
-    path("finish/", views.finish, name="finish"),
+    path("", start, name="start"),
+    path("s/<slug:slug>/", start, name="start_study"),
+    path("task/", views.classify_all, name="classify_all"),
+    path("task/submit/", views.submit_responses, name="submit_responses"),
+    path("task/<int:index>/", classify, name="classify"),
+    path("finish/", finish, name="finish"),
+    path("finish/text/<int:index>/", views.finish_text, name="finish_text"),
     path("impressum/", views.impressum, name="impressum"),
     path("datenschutz/", views.datenschutz, name="datenschutz"),
 ]
@@ -1,89 +1,298 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
+from django.utils.text import Truncator
+from django.views.decorators.http import require_POST
+
+from . import assignment, progress, rendering, summary, writebehind
+from .corpus import aget_corpus, get_corpus
 from .forms import ParticipantForm, ResponseForm
-from .models import TextItem, Participant, Response
+from .models import Response, TextItem
 
 # Startseite
 
 
-def start(request):
+def _study(corpus, slug):
+    # Ohne Slug die Standardstudie (STUDY_DEFAULT)
+    study = corpus.slugs.get(slug or settings.STUDY_DEFAULT)
+    if study is None or not study.is_active:
+        raise Http404("No such study.")
+    return study
+
+
+def start(request, slug=None):
+    study = _study(get_corpus(), slug)
     if request.method == "POST":
         form = ParticipantForm(request.POST)
         if form.is_valid():
-            participant = form.save()
-            request.session["participant_id"] = participant.id
+            participant = form.save(commit=False)
+            participant.study = study
 
-            # Randomisierte Textreihenfolge für diesen Teilnehmer speichern
-            text_ids = list(TextItem.objects.all().values_list("id", flat=True))
-            import random
+            # Speichert den Teilnehmer mit seiner Textreihenfolge
+            state = progress.begin(request, participant)
 
-            random.shuffle(text_ids)
-            request.session["text_order"] = text_ids
-            request.session["current_index"] = 0
+            if settings.STUDY_CLASSIFY_MODE == "single":
+                return redirect(progress.url("study:classify_all", state))
+            return redirect(progress.url("study:classify", state, index=1))
+    else:
+        form = ParticipantForm()
+    return render(request, "study/start.html", {"form": form, "study": study})
 
-            return redirect("study:classify", index=1)
+
+# Async-Varianten für den ASGI-Betrieb (STUDY_ASYNC_VIEWS), gleiches Verhalten
+async def astart(request, slug=None):
+    study = _study(await aget_corpus(), slug)
+    if request.method == "POST":
+        form = ParticipantForm(request.POST)
+        if form.is_valid():
+            participant = form.save(commit=False)
+            participant.study = study
+
+            state = await progress.abegin(request, participant)
+
+            if settings.STUDY_CLASSIFY_MODE == "single":
+                return redirect(progress.url("study:classify_all", state))
+            return redirect(progress.url("study:classify", state, index=1))
     else:
         form = ParticipantForm()
-    return render(request, "study/start.html", {"form": form})
+    return render(request, "study/start.html", {"form": form, "study": study})
+
+
+def _save_response(state, text, data):
+    # Das async ORM kennt keine Transaktionen, deshalb synchron im Thread
+    response = Response(
+        participant_id=state.participant_id,
+        text=text,
+        classification=data["classification"],
+        confidence=int(data["confidence"]),
+        response_time=int(data["response_time"]),
+        index=state.current_index + 1,
+    )
+    if writebehind.enabled():
+        writebehind.enqueue(response)
+        assignment.record([response])
+        return
+    try:
+        with transaction.atomic():
+            response.save(force_insert=True)
+            summary.record([response])
+            transaction.on_commit(lambda: assignment.record([response]))
+    except IntegrityError:
+        # Doppelt abgeschickt (z.B. Zurück-Taste): Antwort existiert bereits
+        pass
+
+
+def _skip(request, state):
+    # Text wurde während der Teilnahme gelöscht: Position ohne Antwort überspringen
+    state.current_index += 1
+    progress.save(request, state)
+    if state.finished:
+        return redirect(progress.url("study:finish", state))
+    return redirect(progress.url("study:classify", state, index=state.current_index + 1))
 
 
 # Klassifizierungsseite
 def classify(request, index):
-    participant_id = request.session.get("participant_id")
-    text_order = request.session.get("text_order")
-    current_index = request.session.get("current_index", 0)
+    state = progress.load(request)
 
-    if participant_id is None or text_order is None:
+    if state is None:
         return redirect("study:start")
 
-    if current_index >= len(text_order):
-        return redirect("study:finish")
+    if state.finished:
+        return redirect(progress.url("study:finish", state))
 
-    text_id = text_order[current_index]
-    text = TextItem.objects.get(id=text_id)
+    current_index = state.current_index
+    text_id = state.text_order[current_index]
+    try:
+        text = get_corpus().get(text_id)
+    except TextItem.DoesNotExist:
+        return _skip(request, state)
     form = ResponseForm(request.POST or None)
 
     if request.method == "POST" and form.is_valid():
-        participant = Participant.objects.get(id=participant_id)
-        Response.objects.create(
-            participant=participant,
-            text=text,
-            classification=form.cleaned_data["classification"],
-            confidence=int(form.cleaned_data["confidence"]),
-            response_time=int(form.cleaned_data["response_time"]),
-            index=current_index + 1,
-        )
+        _save_response(state, text, form.cleaned_data)
         # Index hochzählen
-        request.session["current_index"] = current_index + 1
+        state.current_index = current_index + 1
+        progress.save(request, state)
 
-        if current_index + 1 >= len(text_order):
-            return redirect("study:finish")
+        if state.finished:
+            return redirect(progress.url("study:finish", state))
         else:
             # +2, weil index=1-basiert
-            return redirect("study:classify", index=current_index + 2)
+            return redirect(progress.url("study:classify", state, index=current_index + 2))
+
+    context = {"form": form, "text": text, "index": index, "total": len(state.text_order)}
+    return render(request, "study/classify.html", context)
+
+
+async def aclassify(request, index):
+    state = await progress.aload(request)
+
+    if state is None:
+        return redirect("study:start")
+
+    if state.finished:
+        return redirect(progress.url("study:finish", state))
+
+    current_index = state.current_index
+    text_id = state.text_order[current_index]
+    try:
+        text = await (await aget_corpus()).aget(text_id)
+    except TextItem.DoesNotExist:
+        return await sync_to_async(_skip)(request, state)
+    form = ResponseForm(request.POST or None)
+
+    if request.method == "POST" and form.is_valid():
+        await sync_to_async(_save_response)(state, text, form.cleaned_data)
+        state.current_index = current_index + 1
+        await progress.asave(request, state)
+
+        if state.finished:
+            return redirect(progress.url("study:finish", state))
+        else:
+            return redirect(progress.url("study:classify", state, index=current_index + 2))
 
-    context = {"form": form, "text": text, "index": index, "total": len(text_order)}
+    context = {"form": form, "text": text, "index": index, "total": len(state.text_order)}
     return render(request, "study/classify.html", context)
 
 
+# Alle Texte auf einer Seite, Antworten werden im Browser gepuffert
+def classify_all(request):
+    state = progress.load(request)
+
+    if state is None:
+        return redirect("study:start")
+
+    if state.finished:
+        return redirect(progress.url("study:finish", state))
+
+    items = [
+        {"text": text, "form": ResponseForm(prefix=f"text-{position}")}
+        for position, text in get_corpus().in_order(state.text_order)
+    ]
+    context = {"items": items, "submit_url": progress.url("study:submit_responses", state)}
+    return render(request, "study/classify_all.html", context)
+
+
+@require_POST
+def submit_responses(request):
+    state = progress.load(request)
+
+    if state is None:
+        return JsonResponse({"error": "No active participant."}, status=403)
+
+    if state.current_index != 0:
+        return JsonResponse({"error": "Responses were already submitted."}, status=409)
+
+    try:
+        answers = json.loads(request.body)["responses"]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "Malformed request body."}, status=400)
+
+    # Genau eine Antwort pro angezeigtem Text, in der angezeigten Reihenfolge;
+    # gelöschte Texte fehlen auf der Seite und behalten ihre Position
+    shown = get_corpus().in_order(state.text_order)
+    if not isinstance(answers, list) or [
+        answer.get("text") if isinstance(answer, dict) else None for answer in answers
+    ] != [text.id for _, text in shown]:
+        return JsonResponse(
+            {"error": "Expected exactly one response per text, in order."}, status=400
+        )
+
+    responses = []
+    for number, ((position, _), answer) in enumerate(zip(shown, answers), start=1):
+        form = ResponseForm(answer)
+        if not form.is_valid():
+            return JsonResponse(
+                {"error": f"Invalid response for text {number}.", "fields": form.errors},
+                status=400,
+            )
+        responses.append(
+            Response(
+                participant_id=state.participant_id,
+                text_id=answer["text"],
+                classification=form.cleaned_data["classification"],
+                confidence=int(form.cleaned_data["confidence"]),
+                response_time=form.cleaned_data["response_time"],
+                index=position,
+            )
+        )
+
+    try:
+        with transaction.atomic():
+            Response.objects.bulk_create(responses)
+            summary.record(responses)
+            transaction.on_commit(lambda: assignment.record(responses))
+    except IntegrityError:
+        return JsonResponse({"error": "Responses were already submitted."}, status=409)
+
+    state.current_index = len(state.text_order)
+    progress.save(request, state)
+    return JsonResponse({"redirect": progress.url("study:finish", state)})
+
+
 def finish(request):
-    participant_id = request.session.get('participant_id')
-    if not participant_id:
+    state = progress.load(request)
+    if state is None:
+        return render(request, 'study/finish.html', {'results': None})
+
+    if writebehind.enabled():
+        writebehind.flush(state.participant_id)
+    corpus = get_corpus()
+    results = [_result(state, corpus.get(text_id), *row) for text_id, *row in _answers(state)]
+    return render(request, 'study/finish.html', {'results': results})
+
+
+async def afinish(request):
+    state = await progress.aload(request)
+    if state is None:
         return render(request, 'study/finish.html', {'results': None})
 
-    responses = Response.objects.filter(participant_id=participant_id).select_related('text')
-    results = []
-    for response in responses:
-        # Use 'origin' field from TextItem and 'classification' from Response
-        correct = (response.classification == response.text.origin)
-        results.append({
-            'text': response.text.body,
-            'classification': response.classification,
-            'actual_origin': response.text.origin,
-            'correct': correct,
-        })
+    if writebehind.enabled():
+        await sync_to_async(writebehind.flush)(state.participant_id)
+    corpus = await aget_corpus()
+    results = [
+        _result(state, await corpus.aget(text_id), *row) async for text_id, *row in _answers(state)
+    ]
     return render(request, 'study/finish.html', {'results': results})
 
 
+def _answers(state):
+    # Nur die Antworten selbst; Titel und Texte kommen aus dem Corpus-Snapshot
+    return Response.objects.filter(participant_id=state.participant_id).order_by('index').values_list(
+        'text_id', 'index', 'classification'
+    )
+
+
+def _result(state, text, index, classification):
+    # Use 'origin' field from TextItem and 'classification' from Response
+    correct = (classification == text.origin)
+    return {
+        'title': text.title,
+        'excerpt': Truncator(text.body).chars(100),
+        'body_url': progress.url('study:finish_text', state, index=index),
+        'classification': classification,
+        'actual_origin': text.origin,
+        'correct': correct,
+    }
+
+
+# Volltext eines Ergebnisses, wird auf der Ergebnisseite erst beim Aufklappen geladen
+def finish_text(request, index):
+    state = progress.load(request)
+    if state is None or not state.finished or not 1 <= index <= len(state.text_order):
+        raise Http404
+    try:
+        text = get_corpus().get(state.text_order[index - 1])
+    except TextItem.DoesNotExist:
+        raise Http404
+    return HttpResponse(rendering.body_html(text))
+
+
 def impressum(request):
     return render(request, "study/impressum.html")
 
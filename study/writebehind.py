@@ -0,0 +1,171 @@
+"""Write-behind queue for responses (``STUDY_WRITE_BEHIND``).
+
+The classify views append validated responses to a queue in a separate
+SQLite file (``STUDY_QUEUE_PATH``, WAL journal, fsync on commit) and
+redirect immediately, so they never wait for the write lock of the main
+database. ``drain`` moves queued responses into ``Response`` with
+``bulk_create`` and updates the dashboard counters in the same
+transaction; ``manage.py drain_responses --loop`` runs it in the
+background, and the finish views call ``flush`` for their participant
+first so the results page is complete.
+
+A drainer first claims rows in the queue, so two drainers never insert the
+same rows. Rows whose drainer died are claimed again after
+``CLAIM_TIMEOUT`` seconds; responses that already reached the database are
+skipped.
+"""
+
+import sqlite3
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+
+from . import summary
+from .models import Participant, Response, TextItem
+
+CLAIM_TIMEOUT = 60
+FLUSH_TIMEOUT = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    participant_id INTEGER NOT NULL,
+    text_id INTEGER NOT NULL,
+    classification TEXT NOT NULL,
+    confidence INTEGER NOT NULL,
+    response_time INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    claimed_by TEXT,
+    claimed_at REAL,
+    UNIQUE (participant_id, position)
+);
+CREATE INDEX IF NOT EXISTS pending_claim_idx ON pending (claimed_by, participant_id);
+"""
+
+FIELDS = ("participant_id", "text_id", "classification", "confidence", "response_time", "position")
+
+_local = threading.local()
+
+
+def enabled():
+    return settings.STUDY_WRITE_BEHIND
+
+
+def _connect():
+    path = str(settings.STUDY_QUEUE_PATH)
+    connection = getattr(_local, "connection", None)
+    if connection is None or _local.path != path:
+        # Autocommit; Transaktionen werden explizit mit BEGIN IMMEDIATE geöffnet
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = FULL")
+        connection.executescript(SCHEMA)
+        _local.connection, _local.path = connection, path
+    return connection
+
+
+def enqueue(response):
+    """Queue an unsaved Response; a second answer for the same position is ignored"""
+    _connect().execute(
+        f"INSERT OR IGNORE INTO pending ({', '.join(FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+        (response.participant_id, response.text_id, response.classification,
+         response.confidence, response.response_time, response.index),
+    )
+
+
+def pending(participant_id=None):
+    """Number of queued responses (of one participant)"""
+    query, params = "SELECT COUNT(*) FROM pending", ()
+    if participant_id is not None:
+        query, params = query + " WHERE participant_id = ?", (participant_id,)
+    return _connect().execute(query, params).fetchone()[0]
+
+
+def _claim(participant_id, batch_size):
+    token = uuid.uuid4().hex
+    now = time.time()
+    connection = _connect()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        where = "(claimed_by IS NULL OR claimed_at < ?)"
+        params = [now - CLAIM_TIMEOUT]
+        if participant_id is not None:
+            where += " AND participant_id = ?"
+            params.append(participant_id)
+        connection.execute(
+            f"UPDATE pending SET claimed_by = ?, claimed_at = ? WHERE id IN "
+            f"(SELECT id FROM pending WHERE {where} ORDER BY id LIMIT ?)",
+            [token, now, *params, batch_size],
+        )
+        rows = connection.execute(
+            f"SELECT {', '.join(FIELDS)} FROM pending WHERE claimed_by = ? ORDER BY id", (token,)
+        ).fetchall()
+        connection.execute("COMMIT")
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    return token, rows
+
+
+def _store(rows):
+    responses = [
+        Response(participant_id=participant_id, text_id=text_id, classification=classification,
+                 confidence=confidence, response_time=response_time, index=position)
+        for participant_id, text_id, classification, confidence, response_time, position in rows
+    ]
+    participant_ids = {response.participant_id for response in responses}
+
+    with transaction.atomic():
+        # Schon gespeichert (Drainer nach dem Commit abgebrochen) oder
+        # Teilnehmer/Text inzwischen gelöscht: überspringen
+        stored = set(
+            Response.objects.filter(participant_id__in=participant_ids)
+            .values_list("participant_id", "index")
+        )
+        participants = set(
+            Participant.objects.filter(id__in=participant_ids).values_list("id", flat=True)
+        )
+        texts = set(
+            TextItem.objects.filter(id__in={response.text_id for response in responses})
+            .values_list("id", flat=True)
+        )
+        new = [
+            response for response in responses
+            if (response.participant_id, response.index) not in stored
+            and response.participant_id in participants and response.text_id in texts
+        ]
+        Response.objects.bulk_create(new)
+        summary.record(new)
+    return len(new)
+
+
+def drain(participant_id=None, batch_size=500):
+    """Move one batch of queued responses into the database; returns (claimed, inserted)"""
+    token, rows = _claim(participant_id, batch_size)
+    if not rows:
+        return 0, 0
+    try:
+        inserted = _store(rows)
+    except BaseException:
+        # Freigeben, damit der nächste Lauf es sofort erneut versucht
+        _connect().execute(
+            "UPDATE pending SET claimed_by = NULL, claimed_at = NULL WHERE claimed_by = ?", (token,)
+        )
+        raise
+    _connect().execute("DELETE FROM pending WHERE claimed_by = ?", (token,))
+    return len(rows), inserted
+
+
+def flush(participant_id, timeout=FLUSH_TIMEOUT):
+    """Store all queued responses of one participant before reading them"""
+    deadline = time.monotonic() + timeout
+    while pending(participant_id):
+        claimed, _ = drain(participant_id)
+        if not claimed:
+            # Gerade von einem anderen Drainer übernommen
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.05)